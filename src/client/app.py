@@ -1,16 +1,18 @@
 # reddit-research-gemini/client/app.py
 import os
-import asyncio
 import streamlit as st
+from connection import MCPConnection
 from google import genai
 from google.genai import types
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
+from mcp import StdioServerParameters
 
 # Constants
 REDDIT_USER_AGENT = "ResearchBot/1.0 (IRB Approved)"
 MODEL_ID = "gemini-2.0-flash"
 
+# URL of a shared research server (e.g. http://127.0.0.1:8000/mcp); unset spawns one locally
+MCP_SERVER_URL = os.environ.get("MCP_SERVER_URL")
+
 # Page Configuration
 st.set_page_config(page_title="Reddit Research Gemini", layout="wide")
 st.title("🧪 Reddit Research Chatbot")
@@ -21,12 +23,16 @@ with st.sidebar:
     st.info("Keys are only stored in memory during this session and never saved to disk.")
     
     gemini_api_key = st.text_input("Google Gemini API Key", type="password")
-    reddit_client_id = st.text_input("Reddit Client ID", type="password")
-    reddit_client_secret = st.text_input("Reddit Client Secret", type="password")
+    shared_note = " (Optional: the shared server has its own)" if MCP_SERVER_URL else ""
+    reddit_client_id = st.text_input(f"Reddit Client ID{shared_note}", type="password")
+    reddit_client_secret = st.text_input(f"Reddit Client Secret{shared_note}", type="password")
     reddit_username = st.text_input("Reddit Username (Optional)", help="Required for moderation/posting")
     reddit_password = st.text_input("Reddit Password (Optional)", type="password", help="Required for moderation/posting")
     
     st.divider()
+    stream_responses = st.toggle(
+        "Stream responses", value=True, help="Show text as Gemini writes it"
+    )
     st.markdown(f"**Compliance Agent:** `{REDDIT_USER_AGENT}`")
 
 # --- HELPER FUNCTIONS ---
@@ -43,34 +49,101 @@ def convert_mcp_to_gemini_tool(mcp_tool):
         parameters=mcp_tool.inputSchema
     )
 
-async def run_chat():
-    if not (gemini_api_key and reddit_client_id and reddit_client_secret):
-        st.warning("Please provide all API keys in the sidebar to start.")
-        return
+def response_text(response):
+    """Return the text parts of a Gemini response (empty for function calls only)."""
+    content = response.candidates[0].content if response.candidates else None
+    if content is None or not content.parts:
+        return ""
+    return "".join(part.text for part in content.parts if part.text)
 
-    # Initialize Gemini Client
-    client = genai.Client(api_key=gemini_api_key)
+def send_turn(chat, message, stream):
+    """
+    Send a message to Gemini and render its reply in a new placeholder.
 
+    With stream, text is rendered chunk by chunk as it arrives.
+
+    Returns:
+        tuple: (reply text, function calls requested by the reply).
+    """
+    placeholder = st.empty()
+    text = ""
+    calls = []
+    responses = chat.send_message_stream(message) if stream else [chat.send_message(message)]
+    for response in responses:
+        calls.extend(response.function_calls or [])
+        chunk = response_text(response)
+        if chunk:
+            text += chunk
+            placeholder.markdown(text + ("▌" if stream else ""))
+    if text:
+        placeholder.markdown(text)
+    return text, calls
+
+def show_progress(bars, calls):
+    """Build an on_progress callback that updates one progress bar per tool call."""
+    def on_progress(index, progress, total, message):
+        fraction = min(progress / total, 1.0) if total else 0.0
+        label = f"`{calls[index].name}`: {message}" if message else f"`{calls[index].name}`"
+        bars[index].progress(fraction, text=label)
+    return on_progress
+
+@st.cache_resource(show_spinner="Starting research server...")
+def get_mcp_connection(client_id, client_secret, username=None, password=None):
+    """
+    Start the MCP server once per set of credentials and keep its session open.
+
+    The connection outlives Streamlit reruns, so each chat message reuses the
+    running server instead of spawning a new process and re-listing its tools.
+    """
     # MCP Server Parameters (launching the local server)
     env = {
         **os.environ,
-        "REDDIT_CLIENT_ID": reddit_client_id,
-        "REDDIT_CLIENT_SECRET": reddit_client_secret,
+        "REDDIT_CLIENT_ID": client_id,
+        "REDDIT_CLIENT_SECRET": client_secret,
         "REDDIT_USER_AGENT": REDDIT_USER_AGENT,
-        "PYTHONPATH": os.getcwd()
+        "PYTHONPATH": os.getcwd(),
     }
-    
+
     # Add optional account credentials
-    if reddit_username:
-        env["REDDIT_USERNAME"] = reddit_username
-    if reddit_password:
-        env["REDDIT_PASSWORD"] = reddit_password
+    if username:
+        env["REDDIT_USERNAME"] = username
+    if password:
+        env["REDDIT_PASSWORD"] = password
 
     server_params = StdioServerParameters(
         command="python",
         args=[os.path.join("src", "server", "main.py")],
         env=env
     )
+    connection = MCPConnection(server_params)
+    connection.connect()
+    return connection
+
+@st.cache_resource(show_spinner="Connecting to research server...")
+def get_shared_connection(url, client_id=None, client_secret=None, username=None, password=None):
+    """
+    Open a session on the shared research server once per set of credentials.
+
+    The server's own read-only client serves every session's searches; account
+    credentials are sent as headers so account tools act as this user only.
+    """
+    credentials = {
+        "X-Reddit-Client-Id": client_id,
+        "X-Reddit-Client-Secret": client_secret,
+        "X-Reddit-Username": username,
+        "X-Reddit-Password": password,
+    }
+    connection = MCPConnection(url, headers={k: v for k, v in credentials.items() if v})
+    connection.connect()
+    return connection
+
+def run_chat():
+    if not (gemini_api_key and (MCP_SERVER_URL or (reddit_client_id and reddit_client_secret))):
+        st.warning("Please provide all API keys in the sidebar to start.")
+        return
+
+    # Initialize Gemini Client
+    client = genai.Client(api_key=gemini_api_key)
 
     # Initialize Session State for Chat History
     if "messages" not in st.session_state:
@@ -88,60 +161,67 @@ async def run_chat():
         with st.chat_message("user"):
             st.markdown(prompt)
 
-        # Start MCP Connection
+        # Reuse the running MCP server, restarting it if it stopped responding
         try:
-            async with stdio_client(server_params) as (read, write):
-                async with ClientSession(read, write) as session:
-                    await session.initialize()
-
-                    # List and Convert Tools
-                    mcp_tools = await session.list_tools()
-                    gemini_tools = [
-                        convert_mcp_to_gemini_tool(t) for t in mcp_tools.tools
-                    ]
-                    
-                    # Wrap in Gemini Tool object
-                    tools_declaration = [types.Tool(function_declarations=gemini_tools)]
-
-                    # Send to Gemini
-                    with st.chat_message("assistant"):
-                        response_placeholder = st.empty()
-                        full_response = ""
-                        
-                        # Note: Simple non-streaming call for tool handling logic
-                        # Real implementations might stream tokens
-                        chat = client.chats.create(model=MODEL_ID, config=types.GenerateContentConfig(
-                            tools=tools_declaration
-                        ))
-                        
-                        res = chat.send_message(prompt)
-                        
-                        # Handle Tool Calls
-                        while res.candidates[0].content.parts[0].function_call:
-                            call = res.candidates[0].content.parts[0].function_call
-                            tool_name = call.name
-                            tool_args = call.args
-                            
-                            with st.status(f"Executing tool: `{tool_name}`...", expanded=True) as status:
-                                # Call MCP tool
-                                tool_result = await session.call_tool(tool_name, tool_args)
-                                status.write("Result captured from MCP server.")
-                                status.update(label="Tool execution complete", state="complete")
-                            
-                            # Send result back to Gemini
-                            res = chat.send_message(
-                                types.Part.from_function_response(
-                                    name=tool_name,
-                                    response={"result": tool_result.content}
-                                )
-                            )
-
-                        full_response = res.text
-                        response_placeholder.markdown(full_response)
-                        st.session_state.messages.append({"role": "assistant", "content": full_response})
+            credentials = (reddit_client_id, reddit_client_secret, reddit_username, reddit_password)
+            if MCP_SERVER_URL:
+                connection = get_shared_connection(MCP_SERVER_URL, *credentials)
+            else:
+                connection = get_mcp_connection(*credentials)
+            connection.ensure_healthy()
+
+            # Convert the tools listed when the session was opened
+            gemini_tools = [convert_mcp_to_gemini_tool(t) for t in connection.tools]
+
+            # Wrap in Gemini Tool object
+            tools_declaration = [types.Tool(function_declarations=gemini_tools)]
+
+            # Send to Gemini
+            with st.chat_message("assistant"):
+                # Text of every turn, including any written before tool calls
+                replies = []
+
+                chat = client.chats.create(model=MODEL_ID, config=types.GenerateContentConfig(
+                    tools=tools_declaration
+                ))
+
+                text, calls = send_turn(chat, prompt, stream_responses)
+                replies.append(text)
+
+                # Handle Tool Calls (Gemini may request several in one response)
+                while calls:
+                    names = ", ".join(f"`{call.name}`" for call in calls)
+                    with st.status(f"Executing tools: {names}...", expanded=True) as status:
+                        # Call all MCP tools concurrently, showing their progress notifications
+                        bars = [status.progress(0.0, text=f"`{c.name}`") for c in calls]
+                        results = connection.call_tools(
+                            [(c.name, c.args) for c in calls],
+                            on_progress=show_progress(bars, calls),
+                        )
+                        for call, result in zip(calls, results, strict=True):
+                            if isinstance(result, Exception):
+                                status.write(f"`{call.name}` failed: {result}")
+                            else:
+                                status.write(f"`{call.name}`: result captured from MCP server.")
+                        status.update(label="Tool execution complete", state="complete")
+
+                    # Send all results back to Gemini in one message
+                    text, calls = send_turn(chat, [
+                        types.Part.from_function_response(
+                            name=call.name,
+                            response={"error": str(result)}
+                            if isinstance(result, Exception)
+                            else {"result": result.content},
+                        )
+                        for call, result in zip(calls, results, strict=True)
+                    ], stream_responses)
+                    replies.append(text)
+
+                full_response = "\n\n".join(r for r in replies if r)
+                st.session_state.messages.append({"role": "assistant", "content": full_response})
 
         except Exception as e:
             st.error(f"Error connecting to MCP server: {str(e)}")
 
 if __name__ == "__main__":
-    asyncio.run(run_chat())
+    run_chat()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# SPDX-FileCopyrightText: 2025 stharrold
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Long-lived MCP client session for the Streamlit app.
+
+Streamlit re-runs the whole script on every interaction, so the session lives on a
+background event loop thread instead: the server subprocess is started once (or the
+shared HTTP server is connected to once), the tool list is fetched once, and each chat
+message only pays for its tool calls.
+"""
+
+import asyncio
+import queue
+import threading
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+from mcp.client.streamable_http import streamablehttp_client
+
+# Seconds to wait for the server to start (PRAW init and the auth check included)
+CONNECT_TIMEOUT_S = 60.0
+
+# Seconds a health check ping may take before the server is restarted
+PING_TIMEOUT_S = 5.0
+
+# Seconds between checks for progress notifications while tools run
+PROGRESS_POLL_S = 0.1
+
+
+class MCPConnection:
+    """
+    An MCP client session to the research server, owned by a background event loop.
+
+    The transport and session are entered and exited by one long-running task, as
+    their anyio cancel scopes require; every other coroutine only uses the open
+    session. Synchronous callers submit coroutines with run().
+
+    Args:
+        server_params: Parameters to spawn a stdio server, or the URL of a shared
+            streamable HTTP server.
+        headers: HTTP headers sent with every request to a shared server (the
+            X-Reddit-* account credentials); unused over stdio.
+    """
+
+    def __init__(
+        self, server_params: StdioServerParameters | str, headers: dict[str, str] | None = None
+    ):
+        self.server_params = server_params
+        self.headers = headers
+        self.tools = []
+        self.session: ClientSession | None = None
+        self.restarts = 0
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        self._owner = None
+        self._stop: asyncio.Event | None = None
+        self._lock = threading.Lock()
+
+    def run(self, coro, timeout: float | None = None):
+        """Run a coroutine on the connection's event loop and wait for its result."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    def _transport(self):
+        if isinstance(self.server_params, str):
+            return streamablehttp_client(self.server_params, headers=self.headers)
+        return stdio_client(self.server_params)
+
+    async def _serve(self, ready: asyncio.Future):
+        try:
+            # stdio yields (read, write); streamable HTTP adds a session id getter
+            async with self._transport() as (read, write, *_):
+                async with ClientSession(read, write) as session:
+                    await session.initialize()
+                    self.tools = (await session.list_tools()).tools
+                    self.session = session
+                    self._stop = asyncio.Event()
+                    ready.set_result(None)
+                    await self._stop.wait()
+        except BaseException as exc:
+            if not ready.done():
+                ready.set_exception(exc)
+            raise
+        finally:
+            self.session = None
+
+    async def _start(self):
+        ready = self._loop.create_future()
+        self._owner = asyncio.create_task(self._serve(ready))
+        await ready
+
+    async def _shutdown(self):
+        if self._owner is None:
+            return
+        if self._stop is not None:
+            self._stop.set()
+        try:
+            await asyncio.wait_for(self._owner, PING_TIMEOUT_S)
+        except BaseException:
+            # A dead or hung server can't shut down cleanly; drop it
+            self._owner.cancel()
+        self._owner = None
+        self._stop = None
+
+    def connect(self):
+        """Start or connect to the server and open the session (no-op if already open)."""
+        with self._lock:
+            if self.session is None:
+                self.run(self._shutdown())
+                self.run(self._start(), CONNECT_TIMEOUT_S)
+
+    def ensure_healthy(self) -> bool:
+        """
+        Ping the server, restarting it if the session died or stopped responding.
+
+        Returns:
+            bool: True if the existing session was healthy, False if it was restarted.
+        """
+        if self.session is not None:
+            try:
+                self.run(self.session.send_ping(), PING_TIMEOUT_S)
+                return True
+            except Exception:
+                with self._lock:
+                    self.run(self._shutdown())
+        self.restarts += 1
+        self.connect()
+        return False
+
+    def call_tool(self, name: str, arguments: dict | None = None):
+        """Call a tool on the server and wait for its result."""
+        self.connect()
+        return self.run(self.session.call_tool(name, arguments))
+
+    def call_tools(self, calls: list[tuple[str, dict | None]], on_progress=None) -> list:
+        """
+        Call several tools concurrently and wait for all of them.
+
+        The requests are multiplexed over the one session without waiting for each
+        other's responses. Results come back in the order of calls, with the raised
+        exception in place of any failed call.
+
+        Args:
+            calls: (tool name, arguments) pairs.
+            on_progress: Optional function (call index, progress, total, message)
+                called with the progress notifications of long-running tools. It
+                runs in the calling thread, so it may update Streamlit elements.
+        """
+        self.connect()
+        session = self.session
+        updates = queue.SimpleQueue()
+
+        def progress_callback(index):
+            async def report(progress, total, message):
+                updates.put((index, progress, total, message))
+
+            return report if on_progress is not None else None
+
+        async def gather():
+            return await asyncio.gather(
+                *(
+                    session.call_tool(name, arguments, progress_callback=progress_callback(i))
+                    for i, (name, arguments) in enumerate(calls)
+                ),
+                return_exceptions=True,
+            )
+
+        future = asyncio.run_coroutine_threadsafe(gather(), self._loop)
+        if on_progress is not None:
+            # Relay notifications from the event loop thread until every call is done
+            while not future.done() or not updates.empty():
+                try:
+                    on_progress(*updates.get(timeout=PROGRESS_POLL_S))
+                except queue.Empty:
+                    pass
+        return future.result()
+
+    def close(self):
+        """Close the session (stopping a stdio server) and the event loop thread."""
+        with self._lock:
+            self.run(self._shutdown())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(PING_TIMEOUT_S)
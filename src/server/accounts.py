@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# SPDX-FileCopyrightText: 2025 stharrold
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Per-session Reddit accounts for the account-scoped tools.
+
+Over stdio the server belongs to one user, and every tool uses the Reddit client
+configured from the environment. Over HTTP one server process serves many client
+sessions: the read tools share its read-only client (and with it the cache, corpus
+and rate limiter), while moderation, posting and inbox tools act as the account whose
+credentials the session sent in X-Reddit-* request headers. Those credentials are kept
+in memory only, in a client bound to that session.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+
+import praw
+
+# Request headers a client sends to act as its own Reddit account over HTTP
+CREDENTIAL_HEADERS = {
+    "username": "x-reddit-username",
+    "password": "x-reddit-password",
+    "client_id": "x-reddit-client-id",
+    "client_secret": "x-reddit-client-secret",
+}
+
+SESSION_HEADER = "mcp-session-id"
+
+# Sessions whose clients are kept; the least recently used one is dropped beyond this
+DEFAULT_MAX_SESSIONS = 256
+
+
+def request_credentials(ctx) -> dict | None:
+    """
+    Return the credentials in the HTTP request of a tool call.
+
+    Returns:
+        dict: The non-empty credential headers by field name, or None for stdio calls
+        and HTTP calls that did not send a username.
+    """
+    request = getattr(getattr(ctx, "request_context", None), "request", None)
+    if request is None:
+        return None
+    credentials = {
+        field: request.headers.get(header)
+        for field, header in CREDENTIAL_HEADERS.items()
+        if request.headers.get(header)
+    }
+    return credentials if credentials.get("username") else None
+
+
+class AccountClients:
+    """
+    Resolve the Reddit client an account-scoped tool call acts as.
+
+    Args:
+        shared: The server's own client, used over stdio and by HTTP sessions that
+            sent no credentials.
+        make_client: Builds a client from a credentials dict (username, password and
+            optionally the session's own client_id/client_secret). None disables
+            per-session accounts.
+        max_sessions: Number of session clients kept.
+    """
+
+    def __init__(
+        self,
+        shared: praw.Reddit,
+        make_client: Callable[[dict], praw.Reddit] | None = None,
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+    ):
+        self.shared = shared
+        self.make_client = make_client
+        self.max_sessions = max_sessions
+        self._clients: OrderedDict[str, tuple[str, praw.Reddit]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def client(self, ctx=None) -> praw.Reddit:
+        """Return the client for the session of a tool call's context."""
+        credentials = request_credentials(ctx) if self.make_client is not None else None
+        if credentials is None:
+            return self.shared
+
+        request = ctx.request_context.request
+        # Tool calls always follow initialize, so the session id is known; the hash
+        # keys clients of sessionless (stateless) requests by their credentials alone
+        fingerprint = hashlib.sha256(repr(sorted(credentials.items())).encode()).hexdigest()
+        key = request.headers.get(SESSION_HEADER) or fingerprint
+
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry is not None and entry[0] == fingerprint:
+                self._clients.move_to_end(key)
+                return entry[1]
+
+        reddit = self.make_client(credentials)
+        with self._lock:
+            self._clients[key] = (fingerprint, reddit)
+            self._clients.move_to_end(key)
+            while len(self._clients) > self.max_sessions:
+                self._clients.popitem(last=False)
+        return reddit
+
+    def __len__(self) -> int:
+        return len(self._clients)
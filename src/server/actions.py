@@ -3,16 +3,24 @@
 # SPDX-License-Identifier: Apache-2.0
 
 
-import praw
+from mcp.server.fastmcp import Context
 from praw.exceptions import PRAWException
 
+from .accounts import AccountClients
+from .ratelimit import report_queue_wait
 
-def register_action_tools(mcp, reddit: praw.Reddit):
-    """Register interaction and moderation tools with the MCP server."""
+
+def register_action_tools(mcp, accounts: AccountClients):
+    """
+    Register interaction and moderation tools with the MCP server.
+
+    Each call acts as the Reddit account of its client session (see AccountClients).
+    """
 
     # --- MODERATION TOOLS ---
 
     @mcp.tool()
+    @report_queue_wait
     def moderate_user(
         subreddit_name: str,
         username: str,
@@ -20,6 +28,7 @@ def register_action_tools(mcp, reddit: praw.Reddit):
         reason: str | None = None,
         note: str | None = None,
         duration: int | None = None,
+        ctx: Context | None = None,
     ) -> dict:
         """
         Perform moderation actions on a user (ban, unban, approve, invite).
@@ -35,6 +44,7 @@ def register_action_tools(mcp, reddit: praw.Reddit):
         Returns:
             dict: Result of the operation with 'success' boolean and details or error.
         """
+        reddit = accounts.client(ctx)
         if not username:
             return {"success": False, "error": "Username is required"}
 
@@ -58,8 +68,13 @@ def register_action_tools(mcp, reddit: praw.Reddit):
         return {"success": True, "action": action, "user": username}
 
     @mcp.tool()
+    @report_queue_wait
     def moderate_content(
-        content_id: str, action: str, reason: str | None = None, is_comment: bool = False
+        content_id: str,
+        action: str,
+        reason: str | None = None,
+        is_comment: bool = False,
+        ctx: Context | None = None,
     ) -> dict:
         """
         Perform moderation actions on a post or comment.
@@ -73,6 +88,7 @@ def register_action_tools(mcp, reddit: praw.Reddit):
         Returns:
             dict: Result of the operation with 'success' boolean and details or error.
         """
+        reddit = accounts.client(ctx)
         try:
             content = reddit.comment(content_id) if is_comment else reddit.submission(content_id)
 
@@ -98,8 +114,13 @@ def register_action_tools(mcp, reddit: praw.Reddit):
         return {"success": True, "action": action, "id": content_id}
 
     @mcp.tool()
+    @report_queue_wait
     def get_moderation_log(
-        subreddit_name: str, limit: int = 25, mod_name: str | None = None, action: str | None = None
+        subreddit_name: str,
+        limit: int = 25,
+        mod_name: str | None = None,
+        action: str | None = None,
+        ctx: Context | None = None,
     ) -> dict:
         """
         Retrieve the moderation log for a subreddit.
@@ -113,6 +134,7 @@ def register_action_tools(mcp, reddit: praw.Reddit):
         Returns:
             dict: 'log' list of entries or 'error'.
         """
+        reddit = accounts.client(ctx)
         try:
             subreddit = reddit.subreddit(subreddit_name)
             log = []
@@ -134,12 +156,14 @@ def register_action_tools(mcp, reddit: praw.Reddit):
     # --- INTERACTION TOOLS ---
 
     @mcp.tool()
+    @report_queue_wait
     def submit_content(
         subreddit_name: str,
         title: str,
         text: str | None = None,
         url: str | None = None,
         flair_id: str | None = None,
+        ctx: Context | None = None,
     ) -> dict:
         """
         Submit a new post to a subreddit.
@@ -154,6 +178,7 @@ def register_action_tools(mcp, reddit: praw.Reddit):
         Returns:
             dict: 'id' and 'url' of new post or 'error'.
         """
+        reddit = accounts.client(ctx)
         try:
             subreddit = reddit.subreddit(subreddit_name)
             submission = subreddit.submit(title, selftext=text, url=url, flair_id=flair_id)
@@ -162,8 +187,13 @@ def register_action_tools(mcp, reddit: praw.Reddit):
             return {"success": False, "error": str(e), "error_type": e.__class__.__name__}
 
     @mcp.tool()
+    @report_queue_wait
     def interact_with_content(
-        content_id: str, action: str, is_comment: bool = False, text: str | None = None
+        content_id: str,
+        action: str,
+        is_comment: bool = False,
+        text: str | None = None,
+        ctx: Context | None = None,
     ) -> dict:
         """
         Vote, save, reply, or edit content.
@@ -177,6 +207,7 @@ def register_action_tools(mcp, reddit: praw.Reddit):
         Returns:
             dict: Result of operation or error.
         """
+        reddit = accounts.client(ctx)
         try:
             content = reddit.comment(content_id) if is_comment else reddit.submission(content_id)
 
@@ -209,12 +240,14 @@ def register_action_tools(mcp, reddit: praw.Reddit):
         return {"success": True, "action": action, "id": content_id}
 
     @mcp.tool()
+    @report_queue_wait
     def manage_inbox(
         action: str,
         message_id: str | None = None,
         username: str | None = None,
         subject: str | None = None,
         body: str | None = None,
+        ctx: Context | None = None,
     ) -> dict:
         """
         Read or send private messages.
@@ -229,6 +262,7 @@ def register_action_tools(mcp, reddit: praw.Reddit):
         Returns:
             dict: Messages list or send status or error.
         """
+        reddit = accounts.client(ctx)
         try:
             if action == "list_unread":
                 messages = []
@@ -253,6 +287,7 @@ def register_action_tools(mcp, reddit: praw.Reddit):
             return {"success": False, "error": str(e), "error_type": e.__class__.__name__}
 
     @mcp.tool()
+    @report_queue_wait
     def gild_content(content_id: str, is_comment: bool = False) -> dict:
         """
         DEPRECATED: Gilding is no longer supported by Reddit API.
@@ -266,13 +301,15 @@ def register_action_tools(mcp, reddit: praw.Reddit):
         }
 
     @mcp.tool()
-    def get_subreddit_traffic(subreddit_name: str) -> dict:
+    @report_queue_wait
+    def get_subreddit_traffic(subreddit_name: str, ctx: Context | None = None) -> dict:
         """
         Get traffic statistics for a subreddit (requires moderator permissions).
 
         Args:
             subreddit_name: Subreddit name.
         """
+        reddit = accounts.client(ctx)
         try:
             subreddit = reddit.subreddit(subreddit_name)
             traffic = subreddit.traffic()
@@ -281,8 +318,12 @@ def register_action_tools(mcp, reddit: praw.Reddit):
             return {"success": False, "error": str(e), "error_type": e.__class__.__name__}
 
     @mcp.tool()
+    @report_queue_wait
     def manage_modmail(
-        subreddit_name: str, action: str, conversation_id: str | None = None
+        subreddit_name: str,
+        action: str,
+        conversation_id: str | None = None,
+        ctx: Context | None = None,
     ) -> dict:
         """
         Read or respond to Modmail (requires moderator permissions).
@@ -292,6 +333,7 @@ def register_action_tools(mcp, reddit: praw.Reddit):
             action: Action ('list', 'read').
             conversation_id: Modmail conversation ID.
         """
+        reddit = accounts.client(ctx)
         try:
             subreddit = reddit.subreddit(subreddit_name)
             if action == "list":
@@ -309,7 +351,8 @@ def register_action_tools(mcp, reddit: praw.Reddit):
             return {"success": False, "error": str(e), "error_type": e.__class__.__name__}
 
     @mcp.tool()
-    def manage_subscriptions(subreddit_name: str, action: str) -> dict:
+    @report_queue_wait
+    def manage_subscriptions(subreddit_name: str, action: str, ctx: Context | None = None) -> dict:
         """
         Subscribe or unsubscribe from a subreddit.
 
@@ -317,6 +360,7 @@ def register_action_tools(mcp, reddit: praw.Reddit):
             subreddit_name: Subreddit name.
             action: Action ('subscribe', 'unsubscribe').
         """
+        reddit = accounts.client(ctx)
         try:
             subreddit = reddit.subreddit(subreddit_name)
             if action == "subscribe":
@@ -330,8 +374,10 @@ def register_action_tools(mcp, reddit: praw.Reddit):
             return {"success": False, "error": str(e), "error_type": e.__class__.__name__}
 
     @mcp.tool()
-    def get_my_identity() -> dict:
+    @report_queue_wait
+    def get_my_identity(ctx: Context | None = None) -> dict:
         """Get information about the authenticated Reddit account."""
+        reddit = accounts.client(ctx)
         if getattr(reddit, "read_only", False):
             return {
                 "success": False,
@@ -351,4 +397,4 @@ def register_action_tools(mcp, reddit: praw.Reddit):
                 "is_mod": me.is_mod,
             }
         except Exception as e:
-            return {"success": False, "error": f"Unable to retrieve identity: {e}"}
\ No newline at end of file
+            return {"success": False, "error": f"Unable to retrieve identity: {e}"}
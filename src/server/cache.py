@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+# SPDX-FileCopyrightText: 2025 stharrold
+# SPDX-License-Identifier: Apache-2.0
+
+import contextvars
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Time-to-live (seconds) of cached responses per read tool
+DEFAULT_TTLS = {
+    "search_reddit_threads": 10 * 60,
+    "get_thread_details": 5 * 60,
+    "get_threads_bulk": 5 * 60,
+    "get_subreddit_info": 60 * 60,
+    "read_wiki_page": 30 * 60,
+    "list_wiki_pages": 60 * 60,
+}
+
+# Seconds past its TTL a response is still served, while it is refreshed in the
+# background (stale-while-revalidate), for tools whose data rarely changes
+DEFAULT_STALE_TTLS = {
+    "get_subreddit_info": 24 * 60 * 60,
+    "read_wiki_page": 24 * 60 * 60,
+}
+
+# Background refreshes running at once
+REVALIDATE_WORKERS = 2
+
+DEFAULT_MAX_ENTRIES = 128
+
+# Arguments that force a fresh fetch; they are left out of the cache key
+BYPASS_ARGS = ("refresh",)
+
+_MISSING = object()
+
+
+def _cache_key(arguments: dict) -> str:
+    return json.dumps(arguments, sort_keys=True, default=str)
+
+
+class TTLCache:
+    """Size-bounded LRU cache whose entries expire after a per-entry TTL."""
+
+    def __init__(self, max_size: int = DEFAULT_MAX_ENTRIES):
+        self.max_size = max(1, max_size)
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.stale_hits = 0
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default if missing or expired."""
+        value, stale = self.lookup(key, allow_stale=False)
+        return default if value is _MISSING else value
+
+    def lookup(self, key, allow_stale: bool = True) -> tuple:
+        """
+        Return (value, stale) for key.
+
+        An entry past its TTL but within its stale window is returned with
+        stale=True; value is _MISSING if there is no usable entry.
+        """
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return _MISSING, False
+
+            value, expiry, stale_until = entry
+            now = time.monotonic()
+            stale = now > expiry
+            if stale and (now > stale_until or not allow_stale):
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return _MISSING, False
+
+            # Mark as most recently used
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.stale_hits += stale
+            return value, stale
+
+    def set(self, key, value, ttl: float, stale_ttl: float = 0.0):
+        with self._lock:
+            if key in self._entries:
+                del self._entries[key]
+            elif len(self._entries) >= self.max_size:
+                # Evict the least recently used entry
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            expiry = time.monotonic() + ttl
+            self._entries[key] = (value, expiry, expiry + stale_ttl)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = self.expirations = self.stale_hits = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "stale_hits": self.stale_hits,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls with the same key into one execution.
+
+    The first caller of a key runs the function; callers arriving while it runs wait
+    for it and share its result (or exception) instead of repeating the work.
+    """
+
+    def __init__(self):
+        self._flights: dict = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.collapsed = 0
+
+    def do(self, key, fn):
+        """Return fn(), or the result of the identical call already in flight."""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.calls += 1
+            else:
+                self.collapsed += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn()
+            return flight.result
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def in_flight(self, key) -> bool:
+        with self._lock:
+            return key in self._flights
+
+    def stats(self) -> dict:
+        return {"calls": self.calls, "collapsed": self.collapsed}
+
+
+class ResponseCache:
+    """
+    In-process cache of read tool responses, one TTL cache per tool.
+
+    Only successful responses are cached. Calls passing refresh=True skip the lookup
+    but still repopulate the cache with the fresh response; calls matching a tool's
+    bypass_if predicate skip the cache entirely. Concurrent identical
+    calls that miss the cache share one upstream fetch (see SingleFlight).
+
+    Tools with a stale TTL are served stale-while-revalidate: past its TTL a response
+    is returned at once and refreshed on a background thread, so callers only wait
+    for Reddit on a cold cache.
+
+    Args:
+        max_entries: Entries kept per tool.
+        ttls: Per-tool TTLs overriding DEFAULT_TTLS.
+        stale_ttls: Per-tool stale windows overriding DEFAULT_STALE_TTLS.
+        executor: Runs background refreshes (default: a small thread pool).
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttls: dict | None = None,
+        stale_ttls: dict | None = None,
+        executor=None,
+    ):
+        self.max_entries = max_entries
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.stale_ttls = {**DEFAULT_STALE_TTLS, **(stale_ttls or {})}
+        self._caches: dict[str, TTLCache] = {}
+        self._flights: dict[str, SingleFlight] = {}
+        self._executor = executor
+        self._lock = threading.Lock()
+        self.revalidations: dict[str, dict] = {}
+
+    @classmethod
+    def from_env(cls) -> "ResponseCache":
+        """Build a cache sized by CACHE_MAX_ENTRIES (entries per tool)."""
+        return cls(int(os.environ.get("CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)))
+
+    def cache_for(self, tool_name: str) -> TTLCache:
+        if tool_name not in self._caches:
+            self._caches[tool_name] = TTLCache(self.max_entries)
+        return self._caches[tool_name]
+
+    def flights_for(self, tool_name: str) -> SingleFlight:
+        if tool_name not in self._flights:
+            self._flights[tool_name] = SingleFlight()
+        return self._flights[tool_name]
+
+    def _count_revalidation(self, tool_name: str, outcome: str):
+        with self._lock:
+            counts = self.revalidations.setdefault(tool_name, {"refreshed": 0, "unchanged": 0})
+            counts[outcome] += 1
+
+    def _revalidate(self, tool_name: str, key: str, refresh):
+        flights = self.flights_for(tool_name)
+        if flights.in_flight(key):
+            return
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=REVALIDATE_WORKERS, thread_name_prefix="revalidate"
+                    )
+        self._executor.submit(contextvars.copy_context().run, flights.do, key, refresh)
+
+    def wrap(self, fn, revalidate=None, bypass_if=None):
+        """
+        Decorate a tool function so its responses are served from the cache.
+
+        Args:
+            fn: The tool function.
+            revalidate: Optional function (cached response, **tool arguments) returning
+                True if the cached response is still current, checked before a stale
+                response is refetched (e.g. by comparing a revision ID).
+            bypass_if: Optional function (**tool arguments) returning True for calls
+                that are run directly, neither looked up nor stored (e.g. corpus
+                queries, which are cheap and must see the latest writes).
+        """
+        tool_name = fn.__name__
+        signature = inspect.signature(fn)
+        ttl = self.ttls.get(tool_name, min(DEFAULT_TTLS.values()))
+        stale_ttl = self.stale_ttls.get(tool_name, 0.0)
+        cache = self.cache_for(tool_name)
+        flights = self.flights_for(tool_name)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = dict(bound.arguments)
+            bypass = any(arguments.pop(name, False) for name in BYPASS_ARGS)
+            if bypass_if is not None and bypass_if(**arguments):
+                return fn(*args, **kwargs)
+            key = _cache_key(arguments)
+
+            def fetch():
+                result = fn(*args, **kwargs)
+                if not (isinstance(result, dict) and result.get("success") is False):
+                    cache.set(key, result, ttl, stale_ttl)
+                return result
+
+            def refresh(stale_result):
+                try:
+                    if revalidate is not None and revalidate(stale_result, **arguments):
+                        # Unchanged upstream: keep the response and restart its TTL
+                        cache.set(key, stale_result, ttl, stale_ttl)
+                        self._count_revalidation(tool_name, "unchanged")
+                        return stale_result
+                except Exception:
+                    pass  # Refetch below
+                self._count_revalidation(tool_name, "refreshed")
+                return fetch()
+
+            if not bypass:
+                result, stale = cache.lookup(key, allow_stale=stale_ttl > 0)
+                if result is not _MISSING:
+                    if stale:
+                        self._revalidate(tool_name, key, functools.partial(refresh, result))
+                    return result
+
+            # A refresh may join a fetch in flight: it started after the cached copy
+            return flights.do(key, fetch)
+
+        return wrapper
+
+    def invalidate(self, tool_name: str, **arguments):
+        """Drop the cached response of a tool call (all arguments, defaults included)."""
+        if tool_name in self._caches:
+            self._caches[tool_name].delete(_cache_key(arguments))
+
+    def clear(self):
+        for cache in self._caches.values():
+            cache.clear()
+
+    def stats(self) -> dict:
+        tools = {
+            name: {
+                **cache.stats(),
+                "collapsed": self.flights_for(name).collapsed,
+                **self.revalidations.get(name, {}),
+            }
+            for name, cache in self._caches.items()
+        }
+        hits = sum(s["hits"] for s in tools.values())
+        misses = sum(s["misses"] for s in tools.values())
+        return {
+            "hits": hits,
+            "misses": misses,
+            "evictions": sum(s["evictions"] for s in tools.values()),
+            "collapsed": sum(s["collapsed"] for s in tools.values()),
+            "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            "tools": tools,
+        }
+
+
+def cached(cache: ResponseCache | None, revalidate=None, bypass_if=None):
+    """Decorator applying a ResponseCache to a tool, or a no-op when caching is off."""
+    if cache is None:
+        return lambda fn: fn
+    return functools.partial(cache.wrap, revalidate=revalidate, bypass_if=bypass_if)
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# SPDX-FileCopyrightText: 2025 stharrold
+# SPDX-License-Identifier: Apache-2.0
+
+from datetime import datetime
+
+import praw
+
+from .ratelimit import lane, report_queue_wait
+from .records import submission_record
+from .store import CorpusStore
+from .timeslice import SEARCH_LISTING_CAP, crawl_window, narrowest_time_filter, plan_windows
+from .utils import map_concurrently
+
+# Subreddits crawled concurrently per collection run
+MAX_COLLECTION_WORKERS = 4
+
+
+def register_collection_tools(mcp, reddit: praw.Reddit, store: CorpusStore | None = None):
+    """Register incremental corpus collection tools with the MCP server."""
+
+    def fill_gap(subreddit, query: str, gap: tuple[float, float]):
+        """
+        Crawl a range left behind by an earlier run slice by slice (see timeslice).
+
+        Returns:
+            tuple: (records found, the part of the gap still not known to be complete
+            or None).
+        """
+
+        def search(sort, time_filter, limit):
+            return subreddit.search(query, sort=sort, time_filter=time_filter, limit=limit)
+
+        records = []
+        saturated = []
+        for window in plan_windows(*gap):
+            found = crawl_window(search, window, cap=SEARCH_LISTING_CAP)
+            records.extend(submission_record(s) for s in found)
+            if window.saturated:
+                saturated.append(window)
+        if not saturated:
+            return records, None
+        return records, (min(w.start for w in saturated), max(w.end for w in saturated))
+
+    def collect_subreddit(subreddit_name: str, query: str, start_ts: float) -> dict:
+        """Collect threads newer than the subreddit's high-water mark for a query."""
+        state = store.get_crawl_state(subreddit_name, query)
+        since = state["newest_created_utc"] if state else None
+        since_id = state["newest_id"] if state else None
+        floor = since if since is not None else start_ts
+        gap = (state["gap_start"], state["gap_end"]) if state and state["gap_end"] else None
+
+        subreddit = reddit.subreddit(subreddit_name)
+        records = []
+        scanned = 0
+        reached_mark = False
+        search_results = subreddit.search(
+            query,
+            sort="new",
+            time_filter=narrowest_time_filter(floor),
+            limit=SEARCH_LISTING_CAP,
+        )
+        for submission in search_results:
+            scanned += 1
+            # Listing is newest first: stop at the first item already collected
+            already_collected = since is not None and submission.created_utc <= since
+            if already_collected or submission.id == since_id or submission.created_utc < floor:
+                reached_mark = True
+                break
+            records.append(submission_record(submission))
+        newest = max(records, key=lambda r: r["created_utc"]) if records else None
+
+        # Resume the range an earlier run could not reach
+        gap_records = []
+        if gap is not None:
+            gap_records, gap = fill_gap(subreddit, query, gap)
+
+        # Hitting the listing cap before the mark leaves a gap down to the mark, which
+        # the next run collects through narrower, time-sliced listings
+        hit_cap = not reached_mark and scanned >= SEARCH_LISTING_CAP
+        if hit_cap:
+            oldest = min(r["created_utc"] for r in records)
+            gap = (min(floor, gap[0]), oldest) if gap else (floor, oldest)
+
+        store.upsert_threads(records + gap_records)
+        store.update_crawl_state(
+            subreddit_name,
+            query,
+            newest["created_utc"] if newest else None,
+            newest["thread_id"] if newest else None,
+            len(records) + len(gap_records),
+            gap=gap,
+        )
+
+        return {
+            "new_threads": len(records),
+            "gap_threads": len(gap_records),
+            "scanned": scanned,
+            "previous_mark": datetime.fromtimestamp(since).isoformat() if since else None,
+            "newest_date": (
+                datetime.fromtimestamp(newest["created_utc"]).isoformat() if newest else None
+            ),
+            "gap": hit_cap,
+            "pending_gap": (
+                {
+                    "start_date": datetime.fromtimestamp(gap[0]).isoformat(),
+                    "end_date": datetime.fromtimestamp(gap[1]).isoformat(),
+                }
+                if gap
+                else None
+            ),
+            "thread_ids": [r["thread_id"] for r in records + gap_records],
+        }
+
+    @mcp.tool()
+    @report_queue_wait
+    def collect_new_threads(
+        medication_name: str, subreddits: list[str], start_date: str = "2019-01-01"
+    ) -> dict:
+        """
+        Incrementally collect new threads for a medication into the local corpus.
+
+        Each (subreddit, medication) pair keeps a high-water mark of the newest thread
+        collected, so re-running only fetches threads posted since the previous run.
+        When more than 1000 threads were posted since the mark (e.g. a first run on an
+        active subreddit), the range Reddit's listing could not reach is kept as a
+        'pending_gap' and crawled slice by slice on the next runs. Parts older than a
+        year may never be complete; load them from Reddit dumps (src.server.ingest).
+
+        Args:
+            medication_name: Name of medication to collect threads for.
+            subreddits: List of subreddits to collect from.
+            start_date: Oldest date (YYYY-MM-DD) to collect on the first run.
+
+        Returns:
+            dict: Per-subreddit counts of new threads and their IDs, or 'error'.
+        """
+        if store is None:
+            return {"success": False, "error": "Incremental collection requires the local corpus."}
+        if not subreddits:
+            return {"success": False, "error": "subreddits must be a non-empty list"}
+
+        try:
+            start_ts = datetime.strptime(start_date, "%Y-%m-%d").timestamp()
+        except ValueError as exc:
+            return {
+                "success": False,
+                "error": f"Invalid date format: {exc}. Expected YYYY-MM-DD.",
+            }
+
+        def collect(subreddit_name):
+            with lane("bulk"):
+                return collect_subreddit(subreddit_name, medication_name, start_ts)
+
+        outcomes = map_concurrently(collect, subreddits, MAX_COLLECTION_WORKERS)
+        results = {}
+        failed = {}
+        for subreddit_name, outcome in zip(subreddits, outcomes, strict=True):
+            if isinstance(outcome, Exception):
+                failed[subreddit_name] = str(outcome)
+            else:
+                results[subreddit_name] = outcome
+
+        if not results:
+            return {"success": False, "error": f"Collection failed: {failed}"}
+
+        response = {
+            "success": True,
+            "medication": medication_name,
+            "new_threads": sum(r["new_threads"] for r in results.values()),
+            "subreddits": results,
+        }
+        if failed:
+            response["failed_subreddits"] = failed
+        return response
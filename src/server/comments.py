@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# SPDX-FileCopyrightText: 2025 stharrold
+# SPDX-License-Identifier: Apache-2.0
+
+import threading
+import time
+import weakref
+from collections import deque
+
+import praw
+from praw.const import API_PATH
+from praw.models import MoreComments
+
+from .records import comment_record
+from .utils import map_concurrently
+
+# /api/morechildren accepts at most 100 comment IDs per request
+MORECHILDREN_BATCH = 100
+
+# Threads whose comment trees are expanded concurrently. Their initial listings and
+# "continue this thread" pages load in parallel; morechildren calls are serialized.
+MAX_EXPANSION_WORKERS = 4
+
+# Reddit rejects concurrent /api/morechildren calls from one client, so every tree
+# expansion (and every concurrent tool call) on a client takes its turn on one lock
+_morechildren_locks: "weakref.WeakKeyDictionary[object, threading.Lock]" = (
+    weakref.WeakKeyDictionary()
+)
+_locks_guard = threading.Lock()
+
+
+def morechildren_lock(reddit) -> threading.Lock:
+    """Return the lock serializing /api/morechildren calls of a Reddit client."""
+    with _locks_guard:
+        lock = _morechildren_locks.get(reddit)
+        if lock is None:
+            lock = _morechildren_locks[reddit] = threading.Lock()
+        return lock
+
+
+def fetch_comment_tree(
+    reddit: praw.Reddit,
+    submission,
+    max_comments: int = 50,
+    expand_more: bool = True,
+    time_budget_s: float = 10.0,
+) -> dict:
+    """
+    Load the comment tree of a submission, resolving "load more" stubs in batches.
+
+    The initial listing is walked breadth-first. Child IDs of every MoreComments stub
+    are pooled across the whole thread and resolved 100 at a time via
+    /api/morechildren, then "continue this thread" stubs are followed one request
+    each, until the comment or time budget runs out.
+
+    Args:
+        reddit: PRAW client.
+        submission: PRAW submission, with comment_sort already set.
+        max_comments: Stop expanding once this many comments are loaded.
+        expand_more: Resolve MoreComments stubs (False only reads the initial listing).
+        time_budget_s: Stop expanding after this many seconds.
+
+    Returns:
+        dict: 'comments' records (parents before children, with parent_id and depth),
+        'more_remaining' unresolved comment IDs, 'requests' made and 'complete' flag.
+    """
+    deadline = time.monotonic() + time_budget_s
+    records = []
+    pending = deque()
+    continuations = deque()
+    requests = 0
+
+    def visit(items):
+        for item in items:
+            if isinstance(item, MoreComments):
+                if item.children:
+                    pending.extend(item.children)
+                else:
+                    continuations.append(item)
+            else:
+                records.append(comment_record(item))
+
+    def within_budget():
+        return expand_more and len(records) < max_comments and time.monotonic() < deadline
+
+    visit(submission.comments.list())
+
+    while within_budget() and (pending or continuations):
+        if pending:
+            batch = [pending.popleft() for _ in range(min(MORECHILDREN_BATCH, len(pending)))]
+            with morechildren_lock(reddit):
+                items = reddit.post(
+                    API_PATH["morechildren"],
+                    data={
+                        "children": ",".join(batch),
+                        "link_id": submission.fullname,
+                        "sort": submission.comment_sort,
+                    },
+                )
+            visit(items or [])
+        else:
+            more = continuations.popleft()
+            more.submission = submission
+            visit(more.comments(update=False).list())
+        requests += 1
+
+    # Depth follows from parent links; parents always precede their children
+    depths = {}
+    for record in records:
+        parent = record["parent_id"] or ""
+        depth = depths[parent] + 1 if parent in depths else 0
+        depths[f"t1_{record['comment_id']}"] = depth
+        record["depth"] = depth
+
+    return {
+        "comments": records[:max_comments],
+        "loaded": len(records),
+        "more_remaining": len(pending) + len(continuations),
+        "requests": requests,
+        "complete": not pending and not continuations and len(records) <= max_comments,
+    }
+
+
+def fetch_comment_trees(
+    reddit: praw.Reddit,
+    submissions: list,
+    max_comments: int = 50,
+    expand_more: bool = True,
+    time_budget_s: float = 10.0,
+) -> list:
+    """
+    Expand the comment trees of several submissions concurrently.
+
+    Returns:
+        A list aligned with submissions of fetch_comment_tree() results, or the
+        exception raised for that submission.
+    """
+    return map_concurrently(
+        lambda submission: fetch_comment_tree(
+            reddit, submission, max_comments, expand_more, time_budget_s
+        ),
+        submissions,
+        MAX_EXPANSION_WORKERS,
+    )
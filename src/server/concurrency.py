@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# SPDX-FileCopyrightText: 2025 stharrold
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Async execution of the blocking PRAW tools.
+
+FastMCP awaits async tools on its event loop but calls plain functions directly, so a
+synchronous tool that waits on Reddit (a search, a replace_more walk) stalls every
+other request the server is handling. ThreadedFastMCP registers each synchronous tool
+as an ``async def`` handler that runs the original function on a bounded worker
+pool, so concurrent tool calls overlap their network waits while the tool bodies,
+the shared PRAW client and the rate limiter stay as they are.
+"""
+
+import asyncio
+import contextvars
+import functools
+import inspect
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from mcp.server.fastmcp import FastMCP
+
+# Blocking tool calls run at once; PRAW calls are mostly network waits
+DEFAULT_TOOL_WORKERS = 16
+
+
+def to_async(fn, executor: ThreadPoolExecutor):
+    """
+    Wrap a blocking function in an async def that runs it on an executor.
+
+    The call runs in a copy of the caller's context (like map_concurrently), and the
+    wrapper keeps the function's signature, so FastMCP still derives the tool schema
+    and Context injection from it.
+    """
+
+    @functools.wraps(fn)
+    async def handler(*args, **kwargs):
+        call = functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(executor, call)
+
+    return handler
+
+
+class ThreadedFastMCP(FastMCP):
+    """
+    FastMCP server that runs synchronous tools on a worker thread pool.
+
+    Tools already written as ``async def`` are registered unchanged. With
+    tool_workers=0 synchronous tools run on the event loop as in plain FastMCP.
+
+    Args:
+        tool_workers: Maximum number of blocking tool calls running at once.
+    """
+
+    def __init__(self, *args, tool_workers: int = DEFAULT_TOOL_WORKERS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.tool_workers = tool_workers
+        self._executor = (
+            ThreadPoolExecutor(max_workers=tool_workers, thread_name_prefix="tool")
+            if tool_workers > 0
+            else None
+        )
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def add_tool(self, fn, *args, **kwargs) -> None:
+        if self._executor is not None and not inspect.iscoroutinefunction(fn):
+            fn = to_async(self._counted(fn), self._executor)
+        super().add_tool(fn, *args, **kwargs)
+
+    def _counted(self, fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with self._lock:
+                self.calls += 1
+                self.in_flight += 1
+                self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self.in_flight -= 1
+
+        return wrapper
+
+    def stats(self) -> dict:
+        return {
+            "tool_workers": self.tool_workers,
+            "calls": self.calls,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+        }
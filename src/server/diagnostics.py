@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# SPDX-FileCopyrightText: 2025 stharrold
+# SPDX-License-Identifier: Apache-2.0
+
+from .cache import ResponseCache
+from .ratelimit import RateLimiter
+from .scrub import scrubber
+from .transport import HttpxSession
+from .utils import pseudonym_cache_stats
+
+
+def register_diagnostic_tools(
+    mcp,
+    cache: ResponseCache | None = None,
+    limiter: RateLimiter | None = None,
+    transport: HttpxSession | None = None,
+):
+    """Register server health and performance tools with the MCP server."""
+
+    @mcp.tool()
+    def get_cache_stats() -> dict:
+        """
+        Report hit, miss and eviction counters of the response cache, and how many
+        calls were 'collapsed' into an identical call already in flight.
+
+        Returns:
+            dict: Overall and per-tool cache statistics, the author 'pseudonyms'
+            cache, or 'error'.
+        """
+        if cache is None:
+            return {"success": False, "error": "Response caching is disabled."}
+        return {"success": True, **cache.stats(), "pseudonyms": pseudonym_cache_stats()}
+
+    @mcp.tool()
+    def get_rate_limit_stats() -> dict:
+        """
+        Report the shared Reddit rate limiter state and queue wait times per lane.
+
+        Returns:
+            dict: Token bucket, server quota and per-lane wait statistics or 'error'.
+        """
+        if limiter is None:
+            return {"success": False, "error": "Client-side rate limiting is disabled."}
+        return {"success": True, **limiter.stats()}
+
+    @mcp.tool()
+    def get_transport_stats() -> dict:
+        """
+        Report how many Reddit requests reused a pooled connection instead of opening
+        a new one (and paying for a TLS handshake).
+
+        Returns:
+            dict: Request, connection and handshake counts, HTTP versions and gzip
+            responses, or 'error'.
+        """
+        if transport is None:
+            return {"success": False, "error": "Connection pooling is disabled."}
+        return {"success": True, **transport.stats()}
+
+    @mcp.tool()
+    def get_tool_stats() -> dict:
+        """
+        Report how many tool calls ran on the server's worker threads and how many
+        ran at once, to show whether concurrent calls overlap.
+
+        Returns:
+            dict: Worker count, call count and current and peak calls in flight, or
+            'error'.
+        """
+        if not hasattr(mcp, "stats"):
+            return {"success": False, "error": "Tools run on the event loop."}
+        return {"success": True, **mcp.stats()}
+
+    @mcp.tool()
+    def get_scrub_stats() -> dict:
+        """
+        Report how many documents were scrubbed of personal information and how long
+        scrubbing took per document in this server process.
+
+        Returns:
+            dict: Document counts and total, mean and maximum scrubbing time.
+        """
+        return {"success": True, **scrubber.stats()}
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# SPDX-FileCopyrightText: 2025 stharrold
+# SPDX-License-Identifier: Apache-2.0
+
+import os
+import re
+from datetime import datetime
+
+from .store import DEFAULT_ROW_GROUP_SIZE, EXPORT_FORMATS, CorpusStore
+
+# Default directory export files are written to
+DEFAULT_EXPORT_DIR = os.path.join("data", "exports")
+
+EXPORT_DATASETS = ("threads", "comments")
+
+# Export names become file names, so keep them to a safe character set
+_EXPORT_NAME = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+
+def register_export_tools(mcp, store: CorpusStore | None = None):
+    """Register research data export tools with the MCP server."""
+
+    export_dir = os.environ.get("EXPORT_DIR") or DEFAULT_EXPORT_DIR
+
+    @mcp.tool()
+    def export_research_data(
+        name: str,
+        fmt: str = "jsonl",
+        datasets: list[str] | None = None,
+        medication_name: str | None = None,
+        subreddits: list[str] | None = None,
+        start_date: str | None = None,
+        end_date: str | None = None,
+        row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+    ) -> dict:
+        """
+        Export collected threads and comments from the local corpus to files.
+
+        Rows are streamed straight from the corpus to disk, so exports of any size run
+        in constant memory. Authors are the anonymized hashes stored in the corpus.
+
+        Args:
+            name: Base file name; files are written as <name>_<dataset>.<fmt>.
+            fmt: Output format ('jsonl', 'csv' or 'parquet').
+            datasets: Which of 'threads' and 'comments' to export (default both).
+            medication_name: Only threads whose title or text mention this medication
+                (matched on word boundaries, as by search_reddit_threads).
+            subreddits: Only threads from these subreddits.
+            start_date: Only threads created on or after this date (YYYY-MM-DD).
+            end_date: Only threads created on or before this date (YYYY-MM-DD).
+            row_group_size: Rows per Parquet row group.
+
+        Returns:
+            dict: Path and row count of each exported file, or 'error'.
+        """
+        if store is None:
+            return {"success": False, "error": "Exports require the local corpus."}
+        if not _EXPORT_NAME.match(name):
+            return {
+                "success": False,
+                "error": "name may only contain letters, digits, '.', '_' and '-'",
+            }
+        if fmt not in EXPORT_FORMATS:
+            return {
+                "success": False,
+                "error": f"fmt must be one of: {', '.join(EXPORT_FORMATS)}",
+            }
+        datasets = datasets or list(EXPORT_DATASETS)
+        unknown = [d for d in datasets if d not in EXPORT_DATASETS]
+        if unknown:
+            return {"success": False, "error": f"Unknown datasets: {unknown}"}
+
+        try:
+            start_ts = datetime.strptime(start_date, "%Y-%m-%d").timestamp() if start_date else None
+            end_ts = datetime.strptime(end_date, "%Y-%m-%d").timestamp() if end_date else None
+        except ValueError as exc:
+            return {
+                "success": False,
+                "error": f"Invalid date format: {exc}. Expected YYYY-MM-DD.",
+            }
+
+        try:
+            os.makedirs(export_dir, exist_ok=True)
+            files = {}
+            for dataset in datasets:
+                path = os.path.join(export_dir, f"{name}_{dataset}.{fmt}")
+                rows = store.export(
+                    dataset,
+                    path,
+                    fmt,
+                    subreddits=subreddits,
+                    start_ts=start_ts,
+                    end_ts=end_ts,
+                    medication=medication_name,
+                    row_group_size=row_group_size,
+                )
+                files[dataset] = {"path": os.path.abspath(path), "rows": rows}
+            return {"success": True, "format": fmt, "files": files}
+        except Exception as e:
+            return {"success": False, "error": f"Export failed: {e}"}
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+# SPDX-FileCopyrightText: 2025 stharrold
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Offline ingest of Reddit NDJSON dumps into the local research corpus.
+
+Monthly submission (RS_*) and comment (RC_*) dumps are zstd-compressed NDJSON
+files of tens of gigabytes each. They are decompressed as a stream in the main
+process and split into batches of lines; worker processes parse and filter the
+batches on every CPU core, anonymizing authors and scrubbing personal information
+from the text before records leave the worker.
+Only a bounded number of batches is in flight at any time, so memory use does
+not depend on the size of the input.
+
+Usage:
+    python -m src.server.ingest RS_2021-01.zst RC_2021-01.zst \\
+        -s pregnant -s babybumps -t zofran -t ondansetron
+"""
+
+import io
+import json
+import os
+import re
+import time
+from collections import deque
+from multiprocessing import get_context
+
+import click
+
+from .medications import MedicationMatcher, class_medications
+from .records import dump_comment_record, dump_submission_record
+from .scrub import scrubber
+from .store import CorpusStore
+from .utils import anonymize_usernames
+
+# Pushshift-style dumps use windows of up to 2 GiB, above zstandard's default limit
+MAX_WINDOW_SIZE = 2**31
+
+DEFAULT_BATCH_LINES = 10_000
+
+# Batches queued per worker process; bounds memory regardless of input size
+IN_FLIGHT_PER_WORKER = 2
+
+DUMP_KINDS = ("submissions", "comments")
+
+# Set in each worker process by _init_worker()
+_filters: dict = {}
+
+
+def open_dump(path: str) -> io.TextIOBase:
+    """Open an NDJSON dump as a text stream, decompressing .zst files on the fly."""
+    if not path.endswith(".zst"):
+        return open(path, encoding="utf-8", errors="replace")
+
+    try:
+        import zstandard
+    except ImportError as exc:
+        raise RuntimeError(
+            "Reading .zst dumps requires the 'zstandard' package (pip install zstandard)."
+        ) from exc
+
+    raw = open(path, "rb")
+    reader = zstandard.ZstdDecompressor(max_window_size=MAX_WINDOW_SIZE).stream_reader(
+        raw, closefd=True
+    )
+    return io.TextIOWrapper(reader, encoding="utf-8", errors="replace")
+
+
+def dump_kind(path: str) -> str | None:
+    """Infer the dump kind from Pushshift file names (RS_* submissions, RC_* comments)."""
+    name = os.path.basename(path)
+    if name.startswith("RS_"):
+        return "submissions"
+    if name.startswith("RC_"):
+        return "comments"
+    return None
+
+
+def iter_batches(lines, size: int = DEFAULT_BATCH_LINES):
+    """Group an iterable of lines into lists of at most size lines."""
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _init_worker(subreddits: list[str], terms: list[str], thread_ids: frozenset):
+    escaped = [re.escape(t) for t in terms]
+    _filters.update(
+        subreddits={s.lower() for s in subreddits},
+        # Raw lines still hold JSON escapes, so the pre-check can't use word boundaries
+        prefilter=re.compile("|".join(escaped), re.IGNORECASE) if terms else None,
+        terms=MedicationMatcher(terms) if terms else None,
+        thread_ids=thread_ids,
+    )
+
+
+def _filter_batch(kind: str, lines: list[str]) -> tuple[list[dict], int, dict]:
+    """
+    Parse, filter and scrub a batch of dump lines.
+
+    Returns:
+        tuple: (records, malformed line count, scrubber statistics of the batch).
+    """
+    subreddits = _filters["subreddits"]
+    prefilter = _filters["prefilter"]
+    terms = _filters["terms"]
+    thread_ids = _filters["thread_ids"]
+    kept = []
+    malformed = 0
+
+    for line in lines:
+        # Comments of threads already in the corpus are kept whatever their text
+        if prefilter is not None and not thread_ids and not prefilter.search(line):
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError:
+            malformed += 1
+            continue
+        if subreddits and (data.get("subreddit") or "").lower() not in subreddits:
+            continue
+
+        if kind == "submissions":
+            text = f"{data.get('title') or ''} {data.get('selftext') or ''}"
+            if terms is None or terms.search(text):
+                kept.append(data)
+        else:
+            in_corpus = (data.get("link_id") or "").removeprefix("t3_") in thread_ids
+            if in_corpus or terms is None or terms.search(data.get("body") or ""):
+                kept.append(data)
+
+    # Hash the author column once per distinct author
+    authors = anonymize_usernames(data.get("author") for data in kept)
+    make_record = dump_submission_record if kind == "submissions" else dump_comment_record
+    before = scrubber.stats()
+    records = [make_record(data, author) for data, author in zip(kept, authors, strict=True)]
+    after = scrubber.stats()
+    scrubbed = {
+        "documents": after["documents"] - before["documents"],
+        "total_ms": after["total_ms"] - before["total_ms"],
+        "max_ms": after["max_ms"],
+    }
+    return records, malformed, scrubbed
+
+
+def ingest_dump(
+    path: str,
+    store: CorpusStore,
+    kind: str | None = None,
+    subreddits: list[str] | None = None,
+    terms: list[str] | None = None,
+    processes: int | None = None,
+    batch_lines: int = DEFAULT_BATCH_LINES,
+) -> dict:
+    """
+    Load the matching records of one dump file into the corpus.
+
+    Submissions are kept when they belong to one of the subreddits and mention one of
+    the terms. Comments are kept when they belong to one of the subreddits and either
+    mention a term or reply to a thread already in the corpus, so ingesting RS_ files
+    before RC_ files collects the discussion of every matching thread.
+
+    Args:
+        path: Dump file (.zst or plain NDJSON).
+        store: Corpus to load into; records already stored are not overwritten.
+        kind: 'submissions' or 'comments' (inferred from RS_/RC_ file names).
+        subreddits: Subreddits to keep (all if empty).
+        terms: Medication terms to match, case-insensitively on word boundaries.
+        processes: Worker processes (defaults to the CPU count).
+        batch_lines: Lines per batch sent to a worker.
+
+    Returns:
+        dict: Line, match and timing counters ('write_seconds' is the time spent
+        writing to the corpus).
+    """
+    kind = kind or dump_kind(path)
+    if kind not in DUMP_KINDS:
+        raise ValueError(f"Cannot tell whether {path} holds submissions or comments")
+
+    processes = processes or os.cpu_count() or 1
+    thread_ids = frozenset(store.get_thread_ids()) if kind == "comments" else frozenset()
+    write = store.upsert_threads if kind == "submissions" else store.upsert_comments
+    stats = {"file": path, "kind": kind, "lines": 0, "malformed": 0, "loaded": 0}
+    write_seconds = 0.0
+    scrub = {"documents": 0, "total_ms": 0.0, "max_ms": 0.0}
+    started = time.monotonic()
+
+    def collect(result):
+        nonlocal write_seconds
+        records, malformed, scrubbed = result.get()
+        scrub["documents"] += scrubbed["documents"]
+        scrub["total_ms"] += scrubbed["total_ms"]
+        scrub["max_ms"] = max(scrub["max_ms"], scrubbed["max_ms"])
+        stats["malformed"] += malformed
+        stats["loaded"] += len(records)
+        # Each worker batch is bulk-loaded in one statement, so the single writer
+        # keeps up with every core filtering
+        write_started = time.monotonic()
+        write(records, replace=False)
+        write_seconds += time.monotonic() - write_started
+
+    # Workers never touch DuckDB; spawn keeps them clear of the parent's threads
+    context = get_context("spawn")
+    initargs = (list(subreddits or []), list(terms or []), thread_ids)
+    with open_dump(path) as lines, context.Pool(processes, _init_worker, initargs) as pool:
+        pending = deque()
+        for batch in iter_batches(lines, batch_lines):
+            stats["lines"] += len(batch)
+            pending.append(pool.apply_async(_filter_batch, (kind, batch)))
+            if len(pending) >= processes * IN_FLIGHT_PER_WORKER:
+                collect(pending.popleft())
+        while pending:
+            collect(pending.popleft())
+
+    stats["seconds"] = round(time.monotonic() - started, 2)
+    stats["write_seconds"] = round(write_seconds, 3)
+    stats["scrub"] = {
+        "documents": scrub["documents"],
+        "total_ms": round(scrub["total_ms"], 3),
+        "max_ms": round(scrub["max_ms"], 3),
+    }
+    return stats
+
+
+@click.command()
+@click.argument("paths", nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+@click.option("-s", "--subreddit", "subreddits", multiple=True, help="Subreddit to keep.")
+@click.option("-t", "--term", "terms", multiple=True, help="Medication term to match.")
+@click.option(
+    "-c",
+    "--medication-class",
+    "classes",
+    multiple=True,
+    help="Match every medication of a template class (e.g. antinausea).",
+)
+@click.option(
+    "--kind", type=click.Choice(DUMP_KINDS), help="Dump kind (default: from RS_/RC_ names)."
+)
+@click.option("--db", "db_path", help="Corpus database (default: CORPUS_DB_PATH).")
+@click.option("-j", "--processes", type=int, help="Worker processes (default: CPU count).")
+@click.option("--batch-lines", default=DEFAULT_BATCH_LINES, show_default=True)
+def main(paths, subreddits, terms, classes, kind, db_path, processes, batch_lines):
+    """Load Reddit NDJSON dumps (optionally .zst) into the local research corpus."""
+    try:
+        terms = [*terms, *(m for c in classes for m in class_medications(c))]
+    except ValueError as exc:
+        raise click.BadParameter(str(exc), param_hint="--medication-class") from exc
+    store = CorpusStore(db_path) if db_path else CorpusStore.from_env()
+    # Submissions first, so comment filtering can see every matching thread
+    ordered = sorted(paths, key=lambda p: (kind or dump_kind(p)) != "submissions")
+    try:
+        for path in ordered:
+            stats = ingest_dump(path, store, kind, subreddits, terms, processes, batch_lines)
+            click.echo(
+                f"{stats['file']}: {stats['loaded']} {stats['kind']} loaded from "
+                f"{stats['lines']} lines ({stats['malformed']} malformed) "
+                f"in {stats['seconds']}s, {stats['scrub']['total_ms'] / 1000:.2f}s of it "
+                "scrubbing",
+                err=True,
+            )
+    except (RuntimeError, ValueError) as exc:
+        raise click.ClickException(str(exc)) from exc
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,19 +3,48 @@
 # SPDX-License-Identifier: Apache-2.0
 
 import os
+import sys
 
+import duckdb
 import praw
 from mcp.server.fastmcp import FastMCP
 
+from src.server.accounts import AccountClients
 from src.server.actions import register_action_tools
+from src.server.cache import ResponseCache
+from src.server.collection import register_collection_tools
+from src.server.concurrency import DEFAULT_TOOL_WORKERS, ThreadedFastMCP
+from src.server.diagnostics import register_diagnostic_tools
+from src.server.export import register_export_tools
+from src.server.ratelimit import RateLimitedRequestor, RateLimiter
 
 # Import modular tools
 from src.server.research import register_research_tools
+from src.server.store import CorpusStore
+from src.server.transport import HttpxSession
 from src.server.wiki import register_wiki_tools
 
+TRANSPORTS = ("stdio", "streamable-http", "sse")
 
-def create_server() -> FastMCP:
-    """Initialize and configure the FastMCP server."""
+
+def server_transport() -> str:
+    """Return the transport chosen by MCP_TRANSPORT (stdio unless set)."""
+    transport = os.environ.get("MCP_TRANSPORT", "stdio").lower()
+    if transport not in TRANSPORTS:
+        raise RuntimeError(f"MCP_TRANSPORT must be one of {', '.join(TRANSPORTS)}.")
+    return transport
+
+
+def create_server(transport: str = "stdio") -> FastMCP:
+    """
+    Initialize and configure the FastMCP server.
+
+    Over stdio the server serves the one user whose credentials are in the environment.
+    Over HTTP ('streamable-http' or 'sse') one process serves many client sessions:
+    they share the read-only Reddit client, rate limiter, cache and corpus, and the
+    account tools act as the account each session sends in X-Reddit-* headers.
+    """
+    shared = transport != "stdio"
 
     # 1. Environment Validation
     client_id = os.environ.get("REDDIT_CLIENT_ID")
@@ -28,15 +57,33 @@ def create_server() -> FastMCP:
     # 2. Optional Account Credentials (for moderation/posting)
     username = os.environ.get("REDDIT_USERNAME")
     password = os.environ.get("REDDIT_PASSWORD")
-
-    # 3. Initialize PRAW
-    reddit = praw.Reddit(
-        client_id=client_id,
-        client_secret=client_secret,
-        user_agent=user_agent,
-        username=username,
-        password=password,
-    )
+    if shared and username:
+        # A shared server must not let every session act as one account
+        print(
+            "Warning: REDDIT_USERNAME/REDDIT_PASSWORD are ignored over HTTP; "
+            "sessions send their own account credentials.",
+            file=sys.stderr,
+        )
+        username = password = None
+
+    # 3. Initialize PRAW (every request is paced by one shared token bucket and sent
+    # through one pool of keep-alive connections)
+    limiter = RateLimiter.from_env()
+    http_session = HttpxSession.from_env()
+
+    def make_client(credentials: dict) -> praw.Reddit:
+        return praw.Reddit(
+            client_id=credentials.get("client_id") or client_id,
+            client_secret=credentials.get("client_secret") or client_secret,
+            user_agent=user_agent,
+            username=credentials.get("username"),
+            password=credentials.get("password"),
+            requestor_class=RateLimitedRequestor,
+            requestor_kwargs={"limiter": limiter, "session": http_session},
+        )
+
+    reddit = make_client({"username": username, "password": password})
+    accounts = AccountClients(reddit, make_client if shared else None)
 
     # Verify authentication
     try:
@@ -50,19 +97,44 @@ def create_server() -> FastMCP:
     except Exception as e:
         print(f"Warning: Could not verify Reddit authentication: {e}")
 
-    # 4. Initialize MCP Server
-    mcp = FastMCP("erkinney-reddit-app")
+    # 4. Open the local research corpus (threads/comments already fetched)
+    try:
+        store = CorpusStore.from_env()
+    except duckdb.Error as e:
+        print(f"Warning: Local corpus unavailable, using Reddit API only: {e}", file=sys.stderr)
+        store = None
+    if store is not None and store.corpus_salt_fingerprint() != store.salt_fingerprint:
+        print(
+            "Warning: The local corpus holds authors pseudonymized with a different "
+            "STUDY_SALT; new records will not link to them.",
+            file=sys.stderr,
+        )
+
+    # 5. In-process response cache shared by the read tools
+    cache = ResponseCache.from_env()
+
+    # 6. Initialize MCP Server (blocking tools run on a worker pool, not the event loop)
+    mcp = ThreadedFastMCP(
+        "erkinney-reddit-app",
+        host=os.environ.get("MCP_HOST", "127.0.0.1"),
+        port=int(os.environ.get("MCP_PORT", 8000)),
+        tool_workers=int(os.environ.get("MCP_TOOL_WORKERS", DEFAULT_TOOL_WORKERS)),
+    )
 
-    # 5. Register Tools
-    register_research_tools(mcp, reddit)
-    register_action_tools(mcp, reddit)
-    register_wiki_tools(mcp, reddit)
+    # 7. Register Tools
+    register_research_tools(mcp, reddit, store=store, cache=cache)
+    register_action_tools(mcp, accounts)
+    register_wiki_tools(mcp, reddit, cache=cache, accounts=accounts)
+    register_collection_tools(mcp, reddit, store=store)
+    register_export_tools(mcp, store=store)
+    register_diagnostic_tools(mcp, cache=cache, limiter=limiter, transport=http_session)
 
     return mcp
 
 
 # Create the server instance
-mcp = create_server()
+transport = server_transport()
+mcp = create_server(transport)
 
 if __name__ == "__main__":
-    mcp.run()
+    mcp.run(transport=transport)
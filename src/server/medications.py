@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# SPDX-FileCopyrightText: 2025 stharrold
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Medication templates and multi-pattern matching of medication names in text.
+
+The templates (ported from the archived Node implementation) list the generic and
+brand names of common medication classes. A class is matched with one Aho-Corasick
+automaton over all of its names, so scanning a post costs one pass over its text
+no matter how many synonyms are searched for.
+"""
+
+import json
+import os
+import re
+from collections import Counter, deque
+from collections.abc import Iterable, Iterator
+from functools import lru_cache
+
+TEMPLATES_PATH = os.path.join(os.path.dirname(__file__), "medication_templates.json")
+
+# "zofran OR ondansetron" style queries, as sent to Reddit search
+OR_SPLIT = re.compile(r"\s+OR\s+")
+OR_JOIN = " OR "
+
+# Longest query string Reddit search accepts
+MAX_QUERY_LENGTH = 512
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+class MedicationMatcher:
+    """
+    Aho-Corasick automaton over a set of medication names.
+
+    Matching is case-insensitive and on word boundaries; a trailing plural "s" is
+    accepted ("prenatal vitamins" matches "prenatal vitamin"). Each name maps to a
+    label, so synonyms can be reported under one canonical medication.
+    """
+
+    def __init__(self, patterns: dict[str, str] | Iterable[str]):
+        if not isinstance(patterns, dict):
+            patterns = {p: p for p in patterns}
+        self.labels = {}
+        for pattern, label in patterns.items():
+            key = " ".join(pattern.lower().split())
+            if key:
+                self.labels[key] = label
+
+        # Trie: goto[state] maps a character to the next state
+        self._goto: list[dict[str, int]] = [{}]
+        self._output: list[list[str]] = [[]]
+        for pattern in self.labels:
+            state = 0
+            for char in pattern:
+                nxt = self._goto[state].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][char] = nxt
+                    self._goto.append({})
+                    self._output.append([])
+                state = nxt
+            self._output[state].append(pattern)
+
+        # Failure links in breadth-first order; each state also reports the names
+        # ending at its failure state, so a scan never has to walk the chain
+        fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                fail[nxt] = target if target != nxt else 0
+                self._output[nxt] = self._output[nxt] + self._output[fail[nxt]]
+        self._fail = fail
+
+    def __bool__(self) -> bool:
+        return bool(self.labels)
+
+    def _step(self, state: int, char: str) -> int:
+        goto = self._goto
+        while True:
+            nxt = goto[state].get(char)
+            if nxt is not None:
+                return nxt
+            if state == 0:
+                return 0
+            state = self._fail[state]
+
+    def finditer(self, text: str | None) -> Iterator[tuple[int, int, str]]:
+        """
+        Yield (start, end, label) for every whole-word occurrence of a name.
+
+        Offsets refer to text.lower(), which only differs in length from text for
+        a handful of non-ASCII characters.
+        """
+        if not text or not self.labels:
+            return
+        text = text.lower()
+        size = len(text)
+        state = 0
+        for end, char in enumerate(text, 1):
+            state = self._step(state, char)
+            for pattern in self._output[state]:
+                start = end - len(pattern)
+                if start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                # Skip a plural "s" before checking the word boundary after the name
+                after = end + 1 if end < size and text[end] == "s" else end
+                if after < size and _is_word_char(text[after]):
+                    continue
+                yield start, end, self.labels[pattern]
+
+    def search(self, text: str | None) -> bool:
+        """Whether any name occurs in text (stops at the first match)."""
+        return next(self.finditer(text), None) is not None
+
+    def find_labels(self, text: str | None) -> set[str]:
+        """Return the labels of every name occurring in text."""
+        return {label for _, _, label in self.finditer(text)}
+
+    def count(self, text: str | None) -> Counter:
+        """Count occurrences per label in text."""
+        return Counter(label for _, _, label in self.finditer(text))
+
+
+@lru_cache(maxsize=1)
+def load_templates(path: str = TEMPLATES_PATH) -> dict[str, dict]:
+    """Load the medication class templates, keyed by class name."""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["templates"]
+
+
+def class_medications(class_name: str) -> list[str]:
+    """Return the medication names of a template class (ValueError if unknown)."""
+    templates = load_templates()
+    key = class_name.strip().lower()
+    if key not in templates:
+        raise ValueError(
+            f"Unknown medication class: {class_name}. Available: {', '.join(templates)}"
+        )
+    return list(templates[key]["medications"])
+
+
+def class_search_terms(class_name: str, include_search_terms: bool = False) -> list[str]:
+    """Return the medications (and optionally the search terms) of a template class."""
+    terms = class_medications(class_name)
+    if include_search_terms:
+        terms += load_templates()[class_name.strip().lower()]["search_terms"]
+    # Compare case-insensitively: "thyroid" is both a medication and a search term
+    unique = {}
+    for term in terms:
+        unique.setdefault(term.lower(), term)
+    return list(unique.values())
+
+
+def plan_queries(
+    terms: list[str], max_length: int = MAX_QUERY_LENGTH, max_terms: int | None = None
+) -> list[str]:
+    """
+    Pack terms into as few OR-combined queries as fit within max_length.
+
+    max_terms optionally caps the terms per query, so that frequent names can't
+    crowd rare ones out of a query's result listing.
+
+    Terms are placed longest first into the first query with room left
+    (first-fit decreasing), which stays within one query of the optimum for
+    the handful of names in a class. Multi-word terms are quoted as phrases.
+
+    Raises:
+        ValueError: If a single term is longer than max_length.
+    """
+    quoted = [f'"{t}"' if " " in t else t for t in dict.fromkeys(t.strip() for t in terms) if t]
+    queries: list[list[str]] = []
+    lengths: list[int] = []
+    for term in sorted(quoted, key=len, reverse=True):
+        if len(term) > max_length:
+            raise ValueError(f"Search term longer than {max_length} characters: {term[:40]}...")
+        for i, length in enumerate(lengths):
+            full = max_terms is not None and len(queries[i]) >= max_terms
+            if not full and length + len(OR_JOIN) + len(term) <= max_length:
+                queries[i].append(term)
+                lengths[i] += len(OR_JOIN) + len(term)
+                break
+        else:
+            queries.append([term])
+            lengths.append(len(term))
+    return [OR_JOIN.join(q) for q in queries]
+
+
+def query_terms(query: str) -> list[str]:
+    """Split an OR-combined search query into its (unquoted) terms."""
+    terms = (t.strip().strip('"').strip() for t in OR_SPLIT.split(query.strip()))
+    return list(dict.fromkeys(t for t in terms if t))
+
+
+@lru_cache(maxsize=256)
+def compile_matcher(terms: tuple[str, ...]) -> MedicationMatcher:
+    """Build (or reuse) the matcher for a tuple of medication names."""
+    return MedicationMatcher(terms)
+
+
+def query_matcher(query: str) -> MedicationMatcher:
+    """Return the matcher for every term of an OR-combined search query."""
+    return compile_matcher(tuple(query_terms(query)))
+
+
+def class_matcher(class_name: str) -> MedicationMatcher:
+    """Return the matcher for every medication of a template class."""
+    return compile_matcher(tuple(class_medications(class_name)))
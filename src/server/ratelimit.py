@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# SPDX-FileCopyrightText: 2025 stharrold
+# SPDX-License-Identifier: Apache-2.0
+
+import contextlib
+import functools
+import heapq
+import itertools
+import os
+import threading
+import time
+from contextvars import ContextVar
+
+import prawcore
+
+# Priority lanes: lower value is served first when requests are queued
+LANES = {"interactive": 0, "bulk": 1}
+DEFAULT_LANE = "interactive"
+
+_current_lane: ContextVar[str] = ContextVar("rate_limit_lane", default=DEFAULT_LANE)
+_call_wait: ContextVar[list | None] = ContextVar("rate_limit_call_wait", default=None)
+
+
+@contextlib.contextmanager
+def lane(name: str):
+    """Run the enclosed Reddit requests in the given priority lane."""
+    if name not in LANES:
+        raise ValueError(f"Unknown rate limit lane: {name}")
+    token = _current_lane.set(name)
+    try:
+        yield
+    finally:
+        _current_lane.reset(token)
+
+
+class RateLimiter:
+    """
+    Token bucket shared by every Reddit request the server makes.
+
+    Requests wait for a token in priority order (interactive before bulk), and the
+    bucket is clamped to Reddit's X-Ratelimit-Remaining/Reset headers so the client
+    never runs ahead of the server-side quota.
+    """
+
+    def __init__(self, max_requests: int = 60, time_window: float = 60.0):
+        self.max_tokens = float(max_requests)
+        self.refill_rate = max_requests / time_window  # tokens per second
+        self.tokens = self.max_tokens
+        self._last_refill = time.monotonic()
+        self._blocked_until = 0.0
+        self._cond = threading.Condition()
+        self._waiters: list = []
+        self._sequence = itertools.count()
+
+        self.request_count = 0
+        self.rate_limit_hits = 0
+        self.server_throttles = 0
+        self.server_remaining: float | None = None
+        self.server_reset: float | None = None
+        self._lane_stats = {
+            name: {"requests": 0, "waited": 0, "total_wait_s": 0.0, "max_wait_s": 0.0}
+            for name in LANES
+        }
+
+    @classmethod
+    def from_env(cls) -> "RateLimiter":
+        """Build a limiter allowing REDDIT_REQUESTS_PER_MINUTE (default 60)."""
+        return cls(int(os.environ.get("REDDIT_REQUESTS_PER_MINUTE", 60)), 60.0)
+
+    def _refill(self, now: float):
+        elapsed = now - self._last_refill
+        self.tokens = min(self.max_tokens, self.tokens + elapsed * self.refill_rate)
+        self._last_refill = now
+
+    def acquire(self, lane_name: str | None = None) -> float:
+        """
+        Block until a request may be sent.
+
+        Args:
+            lane_name: Priority lane; defaults to the lane of the current context.
+
+        Returns:
+            float: Seconds spent waiting in the queue.
+        """
+        lane_name = lane_name or _current_lane.get()
+        started = time.monotonic()
+        ticket = (LANES[lane_name], next(self._sequence))
+
+        with self._cond:
+            heapq.heappush(self._waiters, ticket)
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if self._waiters[0] == ticket:
+                    if now < self._blocked_until:
+                        timeout = self._blocked_until - now
+                    elif self.tokens >= 1:
+                        break
+                    else:
+                        timeout = (1 - self.tokens) / self.refill_rate
+                else:
+                    # Wait for the requests ahead of us to be served
+                    timeout = None
+                self._cond.wait(timeout)
+
+            heapq.heappop(self._waiters)
+            self.tokens -= 1
+            self._cond.notify_all()
+
+            waited = time.monotonic() - started
+            self.request_count += 1
+            stats = self._lane_stats[lane_name]
+            stats["requests"] += 1
+            stats["total_wait_s"] += waited
+            stats["max_wait_s"] = max(stats["max_wait_s"], waited)
+            if waited > 0.001:
+                stats["waited"] += 1
+                self.rate_limit_hits += 1
+
+            call_wait = _call_wait.get()
+            if call_wait is not None:
+                call_wait[0] += waited
+        return waited
+
+    def update_from_headers(self, headers, status_code: int | None = None):
+        """Clamp the bucket to the quota reported by Reddit's rate limit headers."""
+        try:
+            remaining = float(headers["x-ratelimit-remaining"])
+            reset = float(headers["x-ratelimit-reset"])
+        except (KeyError, TypeError, ValueError):
+            remaining = reset = None
+
+        with self._cond:
+            now = time.monotonic()
+            if remaining is not None:
+                self.server_remaining = remaining
+                self.server_reset = reset
+                self._refill(now)
+                self.tokens = min(self.tokens, remaining)
+                if remaining < 1:
+                    self._blocked_until = max(self._blocked_until, now + reset)
+            if status_code == 429:
+                self.server_throttles += 1
+                self.tokens = 0.0
+                self._blocked_until = max(self._blocked_until, now + (reset or 60.0))
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        with self._cond:
+            self._refill(time.monotonic())
+            lanes = {}
+            for name, stats in self._lane_stats.items():
+                requests = stats["requests"]
+                lanes[name] = {
+                    "requests": requests,
+                    "waited": stats["waited"],
+                    "avg_wait_s": round(stats["total_wait_s"] / requests, 3) if requests else 0.0,
+                    "max_wait_s": round(stats["max_wait_s"], 3),
+                }
+            return {
+                "tokens_available": int(self.tokens),
+                "max_tokens": int(self.max_tokens),
+                "queued": len(self._waiters),
+                "request_count": self.request_count,
+                "rate_limit_hits": self.rate_limit_hits,
+                "server_throttles": self.server_throttles,
+                "server_remaining": self.server_remaining,
+                "server_reset_s": self.server_reset,
+                "lanes": lanes,
+            }
+
+
+class RateLimitedRequestor(prawcore.Requestor):
+    """PRAW requestor that paces every HTTP request through a shared RateLimiter."""
+
+    def __init__(self, *args, limiter: RateLimiter, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.limiter = limiter
+
+    def request(self, *args, **kwargs):
+        self.limiter.acquire()
+        response = super().request(*args, **kwargs)
+        self.limiter.update_from_headers(response.headers, response.status_code)
+        return response
+
+
+def report_queue_wait(fn):
+    """Decorate a tool so its response includes the time spent queued for Reddit."""
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        token = _call_wait.set([0.0])
+        try:
+            result = fn(*args, **kwargs)
+            waited = _call_wait.get()[0]
+        finally:
+            _call_wait.reset(token)
+        if isinstance(result, dict):
+            result = {**result, "queue_wait_s": round(waited, 3)}
+        return result
+
+    return wrapper
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# SPDX-FileCopyrightText: 2025 stharrold
+# SPDX-License-Identifier: Apache-2.0
+
+from .scrub import scrub_text
+from .utils import anonymize_username, count_words
+
+
+def submission_record(submission) -> dict:
+    """Flatten a PRAW submission into an anonymized, PII-scrubbed corpus record."""
+    author_name = submission.author.name if submission.author else "[deleted]"
+    post_text = submission.selftext or submission.title
+    return {
+        "thread_id": submission.id,
+        "subreddit_id": submission.subreddit_id,
+        "subreddit": submission.subreddit.display_name,
+        "title": scrub_text(submission.title),
+        "selftext": scrub_text(submission.selftext),
+        "author": anonymize_username(author_name),
+        "score": submission.score,
+        "num_comments": submission.num_comments,
+        "created_utc": submission.created_utc,
+        "permalink": submission.permalink,
+        "word_count": count_words(post_text),
+    }
+
+
+def comment_record(comment) -> dict:
+    """Flatten a PRAW comment into an anonymized, PII-scrubbed corpus record."""
+    author_name = comment.author.name if comment.author else "[deleted]"
+    return {
+        "comment_id": comment.id,
+        "parent_id": comment.parent_id,
+        "author": anonymize_username(author_name),
+        "body": scrub_text(comment.body),
+        "score": comment.score,
+        "created_utc": comment.created_utc,
+    }
+
+
+def dump_submission_record(data: dict, author: str | None = None) -> dict:
+    """
+    Flatten a submission object from a Reddit NDJSON dump into a corpus record.
+
+    author may pass the author's pseudonym when it was already computed in bulk.
+    """
+    subreddit = data.get("subreddit") or ""
+    selftext = data.get("selftext") or ""
+    title = data.get("title") or ""
+    return {
+        "thread_id": data["id"],
+        "subreddit_id": data.get("subreddit_id"),
+        "subreddit": subreddit,
+        "title": scrub_text(title),
+        "selftext": scrub_text(selftext),
+        "author": author or anonymize_username(data.get("author") or "[deleted]"),
+        "score": data.get("score"),
+        "num_comments": data.get("num_comments"),
+        "created_utc": float(data["created_utc"]),
+        "permalink": data.get("permalink") or f"/r/{subreddit}/comments/{data['id']}/",
+        "word_count": count_words(selftext or title),
+    }
+
+
+def dump_comment_record(data: dict, author: str | None = None) -> dict:
+    """Flatten a comment object from a Reddit NDJSON dump into a corpus record."""
+    return {
+        "comment_id": data["id"],
+        "thread_id": (data.get("link_id") or "").removeprefix("t3_"),
+        "subreddit": data.get("subreddit"),
+        "parent_id": data.get("parent_id"),
+        "author": author or anonymize_username(data.get("author") or "[deleted]"),
+        "body": scrub_text(data.get("body")),
+        "score": data.get("score"),
+        "created_utc": float(data["created_utc"]),
+    }
@@ -2,17 +2,245 @@
 # SPDX-FileCopyrightText: 2025 stharrold
 # SPDX-License-Identifier: Apache-2.0
 
+import asyncio
 from datetime import datetime
+from itertools import zip_longest
 
 import praw
+from mcp.server.fastmcp import Context
 
-from .utils import anonymize_username, count_words
+from .cache import ResponseCache, cached
+from .comments import fetch_comment_tree, fetch_comment_trees
+from .medications import (
+    MAX_QUERY_LENGTH,
+    MedicationMatcher,
+    class_matcher,
+    class_search_terms,
+    load_templates,
+    plan_queries,
+    query_matcher,
+)
+from .ratelimit import lane, report_queue_wait
+from .records import submission_record
+from .scrub import scrub_text
+from .store import CorpusStore, search_key
+from .timeslice import beyond_relative_filters, crawl_window, plan_windows
+from .utils import map_concurrently
 
+# Concurrent per-subreddit searches in fan-out mode (requests still share the rate limiter)
+MAX_FANOUT_WORKERS = 4
+MERGE_ORDERS = ("relevance", "date")
 
-def register_research_tools(mcp, reddit: praw.Reddit):
-    """Register research-focused tools with the MCP server."""
+# Medications searched concurrently by batch_search_medications
+MAX_BATCH_WORKERS = 4
+
+# Planned class queries searched concurrently by search_medication_class
+MAX_CLASS_QUERY_WORKERS = 4
+
+# Threads accepted per get_threads_bulk call (/api/info serves 100 per request)
+MAX_BULK_THREADS = 500
+
+
+def _matches_search(
+    record: dict,
+    matcher: MedicationMatcher,
+    start_ts: float,
+    end_ts: float,
+    min_comments: int,
+    min_words: int,
+) -> bool:
+    """Apply the search_reddit_threads filters to a thread record."""
+    if record["created_utc"] < start_ts or record["created_utc"] > end_ts:
+        return False
+
+    if record["num_comments"] < min_comments:
+        return False
+
+    if record["word_count"] < min_words:
+        return False
+
+    # Additional check: one of the medication names should be in the text
+    return matcher.search(record["title"] + " " + (record["selftext"] or ""))
+
+
+def _merge_listings(listings: list[list[dict]], merge_by: str = "relevance") -> list[dict]:
+    """Merge ranked per-subreddit listings into one, deduplicating by thread ID."""
+    if merge_by == "date":
+        ordered = sorted(
+            (r for listing in listings for r in listing),
+            key=lambda r: r["created_utc"],
+            reverse=True,
+        )
+    else:
+        # Interleave by rank so every subreddit contributes its best matches first
+        ordered = [r for rank in zip_longest(*listings) for r in rank if r is not None]
+
+    seen = set()
+    merged = []
+    for record in ordered:
+        if record["thread_id"] not in seen:
+            seen.add(record["thread_id"])
+            merged.append(record)
+    return merged
+
+
+def _thread_summary(record: dict) -> dict:
+    """Format a thread record as a search result."""
+    return {
+        "thread_id": record["thread_id"],
+        "title": scrub_text(record["title"]),
+        "subreddit": record["subreddit"],
+        "author": record["author"],
+        "created_utc": record["created_utc"],
+        "created_date": datetime.fromtimestamp(record["created_utc"]).isoformat(),
+        "score": record["score"],
+        "num_comments": record["num_comments"],
+        "url": f"https://reddit.com{record['permalink']}",
+        "word_count": record["word_count"],
+    }
+
+
+def _comments_stored(stored: dict | None, sort_by: str, max_comments: int) -> bool:
+    """Whether a stored thread already holds enough comments in the requested order."""
+    return (
+        stored is not None
+        and stored["comment_sort"] == sort_by
+        and (stored["comments_complete"] or stored["comments_fetched"] >= max_comments)
+    )
+
+
+def _thread_details(record: dict, comments: list[dict]) -> dict:
+    """Format a thread record and its comment records as thread details."""
+    return {
+        "thread_id": record["thread_id"],
+        "title": scrub_text(record["title"]),
+        "subreddit": record["subreddit"],
+        "author": record["author"],
+        "selftext": scrub_text(record["selftext"]),
+        "score": record["score"],
+        "created_utc": record["created_utc"],
+        "url": f"https://reddit.com{record['permalink']}",
+        "comments": [
+            {
+                "comment_id": c["comment_id"],
+                "parent_id": c["parent_id"],
+                "depth": c["depth"],
+                "author": c["author"],
+                "body": scrub_text(c["body"]),
+                "score": c["score"],
+                "created_utc": c["created_utc"],
+                "created_date": datetime.fromtimestamp(c["created_utc"]).isoformat(),
+            }
+            for c in comments
+        ],
+    }
+
+
+def register_research_tools(
+    mcp,
+    reddit: praw.Reddit,
+    store: CorpusStore | None = None,
+    cache: ResponseCache | None = None,
+):
+    """
+    Register research-focused tools with the MCP server.
+
+    When a corpus store is given, fetched threads and comments are written through
+    to it and repeated requests are answered from it before calling Reddit. When a
+    response cache is given, identical calls within the tool's TTL skip both.
+    """
+
+    def fetch_listing(query: str, subs: list[str], limit: int, refresh: bool = False):
+        """
+        Fetch a complete ranked search listing, replaying it from the corpus if recorded.
+
+        Returns:
+            tuple: (thread records in rank order, 'corpus' or 'reddit').
+        """
+        key = search_key(query, subs)
+        if store is not None and not refresh:
+            recorded = store.get_search(key)
+            if recorded is not None and (recorded["exhausted"] or recorded["scanned"] >= limit):
+                return store.get_search_threads(key, limit), "corpus"
+
+        search_results = reddit.subreddit("+".join(subs)).search(
+            query, sort="relevance", time_filter="all", limit=limit
+        )
+        records = [submission_record(submission) for submission in search_results]
+        if store is not None:
+            store.record_search(key, query, subs, records, exhausted=len(records) < limit)
+        return records, "reddit"
+
+    def time_sliced_search(query, subreddits, start_ts, end_ts, matches, max_results) -> dict:
+        """Search each subreddit window by window (see timeslice) and merge by date."""
+
+        def crawl(sub):
+            subreddit = reddit.subreddit(sub)
+
+            def search(sort, time_filter, limit):
+                return subreddit.search(query, sort=sort, time_filter=time_filter, limit=limit)
+
+            windows = plan_windows(start_ts, end_ts)
+            records = []
+            for window in windows:
+                records.extend(submission_record(s) for s in crawl_window(search, window))
+            return records, windows
+
+        outcomes = map_concurrently(crawl, subreddits, MAX_FANOUT_WORKERS)
+        records = []
+        coverage = []
+        failed = {}
+        for sub, outcome in zip(subreddits, outcomes, strict=True):
+            if isinstance(outcome, Exception):
+                failed[sub] = str(outcome)
+                continue
+            records.extend(outcome[0])
+            coverage.extend(
+                {
+                    "subreddit": sub,
+                    "start_date": datetime.fromtimestamp(w.start).isoformat(),
+                    "end_date": datetime.fromtimestamp(w.end).isoformat(),
+                    "time_filter": w.time_filter,
+                    "scanned": w.scanned,
+                    "fetched": w.fetched,
+                    "saturated": w.saturated,
+                }
+                for w in outcome[1]
+            )
+
+        if failed and not records and len(failed) == len(subreddits):
+            return {"success": False, "error": f"Search failed: {failed}"}
+
+        if store is not None:
+            store.upsert_threads(records)
+
+        merged = _merge_listings([records], merge_by="date")
+        threads = [_thread_summary(r) for r in merged if matches(r)][:max_results]
+        result = {
+            "success": True,
+            "count": len(threads),
+            "threads": threads,
+            "source": "reddit",
+            "windows": coverage,
+        }
+        if any(beyond_relative_filters(w) for w in plan_windows(start_ts, end_ts)):
+            result["warning"] = (
+                "Reddit listings stop at 1000 items and only reach back a year by date, so "
+                "threads older than a year are a sample of what Reddit holds. For complete "
+                "historical data, ingest Reddit dumps (src.server.ingest) and search with "
+                "local=true."
+            )
+        if failed:
+            result["failed_subreddits"] = failed
+        return result
+
+    def local_search(local=False, **_):
+        # Corpus reads are cheap and must see threads ingested since the last call
+        return local
 
     @mcp.tool()
+    @report_queue_wait
+    @cached(cache, bypass_if=local_search)
     def search_reddit_threads(
         medication_name: str,
         subreddits: list[str],
@@ -21,6 +249,12 @@ def register_research_tools(mcp, reddit: praw.Reddit):
         min_comments: int = 5,
         min_words: int = 50,
         max_results: int = 100,
+        refresh: bool = False,
+        fan_out: bool = False,
+        merge_by: str = "relevance",
+        time_sliced: bool = False,
+        local: bool = False,
+        search_comments: bool = False,
     ) -> dict:
         """
         Search for medication-related threads in pregnancy subreddits.
@@ -33,6 +267,22 @@ def register_research_tools(mcp, reddit: praw.Reddit):
             min_comments: Minimum number of comments required.
             min_words: Minimum word count in the post.
             max_results: Maximum number of threads to return.
+            refresh: Re-run the search on Reddit even if it is in the local corpus.
+            fan_out: Search each subreddit separately and concurrently instead of one
+                combined query, so large subreddits don't crowd out small ones.
+            merge_by: How fan-out results are merged ('relevance' or 'date').
+            time_sliced: Crawl the date range slice by slice per subreddit (newest
+                first) to retrieve as complete a result set as Reddit's 1000-item
+                listings allow; 'windows' reports any slice that hit that cap.
+                Ranges older than a year cannot get past the cap: only a sample of
+                their threads is reachable (a 'warning' says so), so use local=true
+                over threads ingested from Reddit dumps (src.server.ingest) for
+                complete historical data.
+            local: Search only the local corpus (including threads loaded from Reddit
+                dumps with src.server.ingest) through its full-text index, ranked by
+                BM25 'relevance', without calling Reddit or the response cache.
+            search_comments: With local, also match threads whose comments mention
+                the medication (Reddit's own search only covers posts).
 
         Returns:
             dict: 'threads' list of thread dictionaries or 'error'.
@@ -53,59 +303,134 @@ def register_research_tools(mcp, reddit: praw.Reddit):
                 "error": f"Invalid date format: {exc}. Expected YYYY-MM-DD.",
             }
 
+        if merge_by not in MERGE_ORDERS:
+            return {"success": False, "error": f"merge_by must be one of {MERGE_ORDERS}"}
+
         query = f"{medication_name}"
         combined_subreddit_query = "+".join(subreddits)
+        key = search_key(query, subreddits)
+
+        matcher = query_matcher(medication_name)
+
+        def matches(record):
+            return _matches_search(record, matcher, start_ts, end_ts, min_comments, min_words)
+
+        if local:
+            if store is None:
+                return {"success": False, "error": "The local corpus is unavailable."}
+            records = store.search_threads(
+                medication_name,
+                subreddits,
+                start_ts,
+                end_ts,
+                min_comments,
+                min_words,
+                max_results,
+                include_comments=search_comments,
+            )
+            threads = [
+                {**_thread_summary(r), "relevance": round(r["relevance"], 3)} for r in records
+            ]
+            return {"success": True, "count": len(threads), "threads": threads, "source": "corpus"}
+
+        if time_sliced:
+            return time_sliced_search(query, subreddits, start_ts, end_ts, matches, max_results)
+
+        if fan_out and len(subreddits) > 1:
+            # One full listing per subreddit, fetched concurrently
+            outcomes = map_concurrently(
+                lambda sub: fetch_listing(query, [sub], effective_limit, refresh),
+                subreddits,
+                MAX_FANOUT_WORKERS,
+            )
+            listings = []
+            sources = set()
+            failed = {}
+            for sub, outcome in zip(subreddits, outcomes, strict=True):
+                if isinstance(outcome, Exception):
+                    failed[sub] = str(outcome)
+                    continue
+                listings.append(outcome[0])
+                sources.add(outcome[1])
+
+            if not listings:
+                return {"success": False, "error": f"Search failed: {failed}"}
+
+            merged = _merge_listings(listings, merge_by)
+            threads = [_thread_summary(r) for r in merged if matches(r)][:max_results]
+            result = {
+                "success": True,
+                "count": len(threads),
+                "threads": threads,
+                "source": "reddit" if "reddit" in sources else "corpus",
+                "subreddits_searched": len(listings),
+            }
+            if failed:
+                result["failed_subreddits"] = failed
+            return result
 
-        threads = []
         try:
+            # Replay a recorded listing when it covers this request
+            recorded = store.get_search(key) if store is not None and not refresh else None
+            if recorded is not None:
+                records = store.get_search_threads(key, effective_limit)
+                threads = [_thread_summary(r) for r in records if matches(r)][:max_results]
+                if (
+                    len(threads) >= max_results
+                    or recorded["exhausted"]
+                    or recorded["scanned"] >= effective_limit
+                ):
+                    return {
+                        "success": True,
+                        "count": len(threads),
+                        "threads": threads,
+                        "source": "corpus",
+                    }
+
             # Search across specified subreddits
             # Fetch more than max_results to allow for filtering
             search_results = reddit.subreddit(combined_subreddit_query).search(
                 query, sort="relevance", time_filter="all", limit=effective_limit
             )
+            scanned = []
+            threads = []
+            exhausted = True
             for submission in search_results:
-                # Filtering
-                if submission.created_utc < start_ts or submission.created_utc > end_ts:
-                    continue
-
-                if submission.num_comments < min_comments:
-                    continue
+                record = submission_record(submission)
+                scanned.append(record)
 
-                post_text = submission.selftext or submission.title
-                if count_words(post_text) < min_words:
-                    continue
-
-                # Additional check: medication name should be in text
-                full_text = (submission.title + " " + submission.selftext).lower()
-                if medication_name.lower() not in full_text:
+                # Filtering
+                if not matches(record):
                     continue
 
-                author_name = submission.author.name if submission.author else "[deleted]"
-
-                threads.append(
-                    {
-                        "thread_id": submission.id,
-                        "title": submission.title,
-                        "subreddit": submission.subreddit.display_name,
-                        "author": anonymize_username(author_name),
-                        "created_utc": submission.created_utc,
-                        "created_date": datetime.fromtimestamp(submission.created_utc).isoformat(),
-                        "score": submission.score,
-                        "num_comments": submission.num_comments,
-                        "url": f"https://reddit.com{submission.permalink}",
-                        "word_count": count_words(post_text),
-                    }
-                )
+                threads.append(_thread_summary(record))
 
                 if len(threads) >= max_results:
+                    exhausted = False
                     break
 
-            return {"success": True, "count": len(threads), "threads": threads}
+            if exhausted and len(scanned) >= effective_limit:
+                exhausted = False
+
+            if store is not None:
+                store.record_search(key, query, subreddits, scanned, exhausted)
+
+            return {"success": True, "count": len(threads), "threads": threads, "source": "reddit"}
         except Exception as e:
             return {"success": False, "error": f"Search failed: {e}"}
 
     @mcp.tool()
-    def get_thread_details(thread_id: str, max_comments: int = 50, sort_by: str = "top") -> dict:
+    @report_queue_wait
+    @cached(cache, bypass_if=local_search)
+    def get_thread_details(
+        thread_id: str,
+        max_comments: int = 50,
+        sort_by: str = "top",
+        refresh: bool = False,
+        expand_more: bool = False,
+        time_budget_s: float = 10.0,
+        local: bool = False,
+    ) -> dict:
         """
         Retrieve full details of a Reddit thread including comments.
 
@@ -113,53 +438,240 @@ def register_research_tools(mcp, reddit: praw.Reddit):
             thread_id: The ID of the thread (e.g., 'abc123').
             max_comments: Maximum number of comments to retrieve.
             sort_by: Comment sort order ('top', 'new', 'controversial').
+            refresh: Re-fetch the thread from Reddit even if it is in the local corpus.
+            expand_more: Resolve "load more comments" stubs (in batches of 100) until
+                max_comments or time_budget_s is reached, instead of dropping them.
+            time_budget_s: Maximum seconds spent expanding the comment tree.
+            local: Read the thread and every stored comment (including comments
+                loaded from Reddit dumps) from the local corpus without calling Reddit
+                or the response cache.
 
         Returns:
-            dict: 'thread' details with 'comments' list, or 'error'.
+            dict: 'thread' details with 'comments' list (each with parent_id and
+            depth), or 'error'.
         """
+        if local:
+            stored = store.get_thread(thread_id) if store is not None else None
+            if stored is None:
+                return {"success": False, "error": f"Thread {thread_id} is not in the corpus."}
+            comments = store.get_all_comments(thread_id, max_comments)
+            return {
+                "success": True,
+                "thread": _thread_details(stored, comments),
+                "source": "corpus",
+            }
+
         try:
+            stored = store.get_thread(thread_id) if store is not None and not refresh else None
+            if _comments_stored(stored, sort_by, max_comments):
+                comments = store.get_comments(thread_id, max_comments)
+                return {
+                    "success": True,
+                    "thread": _thread_details(stored, comments),
+                    "source": "corpus",
+                }
+
             submission = reddit.submission(id=thread_id)
 
             # Set comment sort
             submission.comment_sort = sort_by
 
-            # Load comments
-            submission.comments.replace_more(limit=0)  # Only top-level or easy to reach comments
+            # Load comments (only the initial listing unless expand_more is set)
+            tree = fetch_comment_tree(reddit, submission, max_comments, expand_more, time_budget_s)
+            comments = tree["comments"]
+            record = submission_record(submission)
 
-            comments = []
-            for comment in submission.comments.list()[:max_comments]:
-                author_name = comment.author.name if comment.author else "[deleted]"
-                comments.append(
-                    {
-                        "comment_id": comment.id,
-                        "author": anonymize_username(author_name),
-                        "body": comment.body,
-                        "score": comment.score,
-                        "created_utc": comment.created_utc,
-                        "created_date": datetime.fromtimestamp(comment.created_utc).isoformat(),
-                    }
+            if store is not None:
+                store.upsert_threads([record])
+                store.save_comments(
+                    record["thread_id"], comments, sort=sort_by, complete=tree["complete"]
                 )
 
-            author_name = submission.author.name if submission.author else "[deleted]"
+            return {
+                "success": True,
+                "thread": _thread_details(record, comments),
+                "source": "reddit",
+                "more_remaining": tree["more_remaining"],
+            }
+        except Exception as e:
+            return {"success": False, "error": f"Failed to retrieve thread: {e}"}
+
+    @mcp.tool()
+    @report_queue_wait
+    @cached(cache)
+    def get_threads_bulk(
+        thread_ids: list[str],
+        include_comments: bool = False,
+        max_comments: int = 20,
+        sort_by: str = "top",
+        expand_more: bool = False,
+        refresh: bool = False,
+    ) -> dict:
+        """
+        Retrieve several Reddit threads in one call.
 
+        Thread metadata is fetched 100 threads per request, so metadata-only lookups
+        cost a fraction of repeated get_thread_details calls. Comments, if requested,
+        are then fetched for several threads concurrently.
+
+        Args:
+            thread_ids: IDs of the threads (e.g., ['abc123', 'def456']).
+            include_comments: Also retrieve each thread's comments.
+            max_comments: Maximum number of comments per thread.
+            sort_by: Comment sort order ('top', 'new', 'controversial').
+            expand_more: Resolve "load more comments" stubs (see get_thread_details).
+            refresh: Re-fetch threads from Reddit even if they are in the local corpus.
+
+        Returns:
+            dict: 'threads' in the order requested, IDs 'missing' on Reddit, or 'error'.
+        """
+        thread_ids = list(dict.fromkeys(t.strip().removeprefix("t3_") for t in thread_ids if t))
+        if not thread_ids:
+            return {"success": False, "error": "thread_ids must be a non-empty list"}
+        if len(thread_ids) > MAX_BULK_THREADS:
             return {
+                "success": False,
+                "error": f"At most {MAX_BULK_THREADS} thread IDs per call",
+            }
+
+        try:
+            stored = store.get_threads(thread_ids) if store is not None and not refresh else {}
+            records = {}
+            comments = {}
+            sources = {}
+            for thread_id, record in stored.items():
+                if not include_comments:
+                    records[thread_id] = record
+                elif _comments_stored(record, sort_by, max_comments):
+                    records[thread_id] = record
+                    comments[thread_id] = store.get_comments(thread_id, max_comments)
+                else:
+                    continue
+                sources[thread_id] = "corpus"
+
+            # PRAW requests /api/info 100 fullnames at a time
+            to_fetch = [t for t in thread_ids if t not in records]
+            submissions = list(reddit.info(fullnames=[f"t3_{t}" for t in to_fetch]))
+            fetched = [submission_record(s) for s in submissions]
+            for record in fetched:
+                records[record["thread_id"]] = record
+                sources[record["thread_id"]] = "reddit"
+            if store is not None:
+                store.upsert_threads(fetched)
+
+            failed = {}
+            if include_comments and submissions:
+                for submission in submissions:
+                    submission.comment_sort = sort_by
+                with lane("bulk"):
+                    trees = fetch_comment_trees(reddit, submissions, max_comments, expand_more)
+                for submission, tree in zip(submissions, trees, strict=True):
+                    if isinstance(tree, Exception):
+                        failed[submission.id] = str(tree)
+                        continue
+                    comments[submission.id] = tree["comments"]
+                    if store is not None:
+                        store.save_comments(
+                            submission.id, tree["comments"], sort=sort_by, complete=tree["complete"]
+                        )
+
+            threads = []
+            for thread_id in thread_ids:
+                if thread_id not in records:
+                    continue
+                record = records[thread_id]
+                if include_comments:
+                    thread = _thread_details(record, comments.get(thread_id, []))
+                else:
+                    thread = {**_thread_summary(record), "selftext": scrub_text(record["selftext"])}
+                threads.append({**thread, "source": sources[thread_id]})
+
+            response = {
                 "success": True,
+                "count": len(threads),
+                "threads": threads,
+                "missing": [t for t in thread_ids if t not in records],
+            }
+            if failed:
+                response["failed_comments"] = failed
+            return response
+        except Exception as e:
+            return {"success": False, "error": f"Failed to retrieve threads: {e}"}
+
+    @mcp.tool()
+    def search_comment_mentions(
+        medication_name: str,
+        subreddits: list[str] | None = None,
+        start_date: str = "2019-01-01",
+        end_date: str = "2023-12-31",
+        max_results: int = 50,
+    ) -> dict:
+        """
+        Find comments mentioning a medication in the local corpus.
+
+        Reddit search only matches posts, so threads where a medication comes up only
+        in the discussion are missed. This searches the full-text index of every
+        comment fetched by get_thread_details/get_threads_bulk or loaded from dumps.
+
+        Args:
+            medication_name: Name of medication to search for.
+            subreddits: Only comments in these subreddits (default: all).
+            start_date: Start date in YYYY-MM-DD format (of the comment).
+            end_date: End date in YYYY-MM-DD format (of the comment).
+            max_results: Maximum number of comments to return.
+
+        Returns:
+            dict: 'comments' ranked by relevance, each with its thread and the parent
+            comment it replies to, or 'error'.
+        """
+        if store is None:
+            return {"success": False, "error": "Comment search requires the local corpus."}
+        try:
+            start_ts = datetime.strptime(start_date, "%Y-%m-%d").timestamp()
+            end_ts = datetime.strptime(end_date, "%Y-%m-%d").timestamp()
+        except ValueError as exc:
+            return {
+                "success": False,
+                "error": f"Invalid date format: {exc}. Expected YYYY-MM-DD.",
+            }
+
+        try:
+            hits = store.search_comments(
+                medication_name, subreddits, start_ts, end_ts, max(1, max_results)
+            )
+        except Exception as e:
+            return {"success": False, "error": f"Comment search failed: {e}"}
+
+        comments = [
+            {
+                "comment_id": h["comment_id"],
+                "author": h["author"],
+                "body": scrub_text(h["body"]),
+                "score": h["score"],
+                "depth": h["depth"],
+                "created_date": datetime.fromtimestamp(h["created_utc"]).isoformat(),
+                "relevance": round(h["relevance"], 3),
+                "parent_body": scrub_text(h["parent_body"]),
                 "thread": {
-                    "thread_id": submission.id,
-                    "title": submission.title,
-                    "subreddit": submission.subreddit.display_name,
-                    "author": anonymize_username(author_name),
-                    "selftext": submission.selftext,
-                    "score": submission.score,
-                    "created_utc": submission.created_utc,
-                    "url": f"https://reddit.com{submission.permalink}",
-                    "comments": comments,
+                    "thread_id": h["thread_id"],
+                    "title": scrub_text(h["thread_title"]),
+                    "subreddit": h["subreddit"],
+                    "url": f"https://reddit.com{h['permalink']}",
                 },
             }
-        except Exception as e:
-            return {"success": False, "error": f"Failed to retrieve thread: {e}"}
+            for h in hits
+        ]
+        return {
+            "success": True,
+            "count": len(comments),
+            "threads": len({h["thread_id"] for h in hits}),
+            "comments": comments,
+            "source": "corpus",
+        }
 
     @mcp.tool()
+    @report_queue_wait
+    @cached(cache)
     def get_subreddit_info(subreddit_name: str) -> dict:
         """
         Get metadata about a subreddit.
@@ -172,7 +684,7 @@ def register_research_tools(mcp, reddit: praw.Reddit):
         """
         try:
             subreddit = reddit.subreddit(subreddit_name)
-            return {
+            info = {
                 "name": subreddit.display_name,
                 "title": subreddit.title,
                 "description": subreddit.public_description,
@@ -180,5 +692,213 @@ def register_research_tools(mcp, reddit: praw.Reddit):
                 "created_utc": subreddit.created_utc,
                 "rules": [rule.short_name for rule in subreddit.rules],
             }
+            if store is not None:
+                store.upsert_subreddit(
+                    {
+                        "subreddit_id": subreddit.fullname,
+                        "display_name": info["name"],
+                        "title": info["title"],
+                        "description": info["description"],
+                        "subscribers": info["subscribers"],
+                        "created_utc": info["created_utc"],
+                        "rules": info["rules"],
+                    }
+                )
+            return info
         except Exception as e:
             return {"success": False, "error": f"Failed to get subreddit info: {e}"}
+
+    @mcp.tool()
+    async def batch_search_medications(
+        medications: list[str],
+        subreddits: list[str],
+        ctx: Context,
+        start_date: str = "2019-01-01",
+        end_date: str = "2023-12-31",
+        min_comments: int = 5,
+        min_words: int = 50,
+        threads_per_medication: int = 20,
+        fan_out: bool = False,
+    ) -> dict:
+        """
+        Search for several medications across subreddits in one operation.
+
+        Medications are searched concurrently in the bulk rate limit lane, and a
+        progress notification is sent as each medication completes.
+
+        Args:
+            medications: List of medication names to search for.
+            subreddits: List of subreddits to search.
+            start_date: Start date in YYYY-MM-DD format.
+            end_date: End date in YYYY-MM-DD format.
+            min_comments: Minimum number of comments required.
+            min_words: Minimum word count in the post.
+            threads_per_medication: Maximum number of threads per medication.
+            fan_out: Search each subreddit separately (see search_reddit_threads).
+
+        Returns:
+            dict: Per-medication results and a summary, or 'error'.
+        """
+        medications = list(dict.fromkeys(m.strip() for m in medications if m and m.strip()))
+        if not medications:
+            return {"success": False, "error": "medications must be a non-empty list"}
+        if not subreddits:
+            return {"success": False, "error": "subreddits must be a non-empty list"}
+
+        def search_one(medication):
+            with lane("bulk"):
+                return search_reddit_threads(
+                    medication_name=medication,
+                    subreddits=subreddits,
+                    start_date=start_date,
+                    end_date=end_date,
+                    min_comments=min_comments,
+                    min_words=min_words,
+                    max_results=threads_per_medication,
+                    fan_out=fan_out,
+                )
+
+        semaphore = asyncio.Semaphore(MAX_BATCH_WORKERS)
+
+        async def run(medication):
+            async with semaphore:
+                try:
+                    return medication, await asyncio.to_thread(search_one, medication)
+                except Exception as e:
+                    return medication, {"success": False, "error": f"Search failed: {e}"}
+
+        results = {}
+        total = len(medications)
+        for completed, task in enumerate(asyncio.as_completed([run(m) for m in medications]), 1):
+            medication, result = await task
+            results[medication] = result
+            if result.get("success"):
+                message = f"{medication}: {result['count']} threads"
+            else:
+                message = f"{medication}: {result.get('error')}"
+            await ctx.report_progress(completed, total, message=message)
+
+        # Report medications in the order they were requested
+        results = {m: results[m] for m in medications}
+        errors = [
+            {"medication": m, "error": r.get("error")}
+            for m, r in results.items()
+            if not r.get("success")
+        ]
+        unique_threads = {
+            t["thread_id"] for r in results.values() if r.get("success") for t in r["threads"]
+        }
+        summary = {
+            m: {"count": r["count"], "source": r.get("source")} if r.get("success") else None
+            for m, r in results.items()
+        }
+        total_threads = sum(r["count"] for r in results.values() if r.get("success"))
+
+        return {
+            "success": len(errors) < total,
+            "total_medications": total,
+            "completed": total - len(errors),
+            "failed": len(errors),
+            "total_threads": total_threads,
+            "unique_threads": len(unique_threads),
+            "summary": summary,
+            "medications": results,
+            "errors": errors,
+        }
+
+    @mcp.tool()
+    def search_medication_class(
+        medication_class: str,
+        subreddits: list[str] | None = None,
+        start_date: str = "2019-01-01",
+        end_date: str = "2023-12-31",
+        min_comments: int = 5,
+        min_words: int = 50,
+        max_results: int = 100,
+        include_search_terms: bool = False,
+        max_terms_per_query: int | None = None,
+        fan_out: bool = False,
+    ) -> dict:
+        """
+        Search for every medication of a class (e.g. 'antinausea') in one call.
+
+        The class template's generic and brand names are packed into as few
+        'a OR b OR ...' Reddit queries as the query length limit allows, the queries
+        run concurrently, and threads are merged by ID and tagged with the
+        medications they mention.
+
+        Args:
+            medication_class: Template name (antibiotics, antinausea, thyroid,
+                antidepressants_ssri, pain_relief, allergy, diabetes, heartburn,
+                vitamins, asthma).
+            subreddits: Subreddits to search (default: the template's subreddits).
+            start_date: Start date in YYYY-MM-DD format.
+            end_date: End date in YYYY-MM-DD format.
+            min_comments: Minimum number of comments required.
+            min_words: Minimum word count in the post.
+            max_results: Maximum number of threads per planned query.
+            include_search_terms: Also search the template's condition terms
+                (e.g. 'morning sickness'), not only medication names.
+            max_terms_per_query: Cap on names per query, so common names don't
+                crowd rare ones out of a listing (default: as many as fit).
+            fan_out: Search each subreddit separately (see search_reddit_threads).
+
+        Returns:
+            dict: Merged 'threads' with the 'medications' each mentions, the planned
+            'queries' with their counts, or 'error'.
+        """
+        try:
+            terms = class_search_terms(medication_class, include_search_terms)
+            queries = plan_queries(terms, MAX_QUERY_LENGTH, max_terms_per_query or None)
+        except ValueError as e:
+            return {"success": False, "error": str(e)}
+        template = load_templates()[medication_class.strip().lower()]
+        subreddits = subreddits or template["subreddits"]
+        matcher = class_matcher(medication_class)
+
+        def search_one(query):
+            return search_reddit_threads(
+                medication_name=query,
+                subreddits=subreddits,
+                start_date=start_date,
+                end_date=end_date,
+                min_comments=min_comments,
+                min_words=min_words,
+                max_results=max_results,
+                fan_out=fan_out,
+            )
+
+        outcomes = map_concurrently(search_one, queries, MAX_CLASS_QUERY_WORKERS)
+        threads = {}
+        planned = []
+        for query, outcome in zip(queries, outcomes, strict=True):
+            if isinstance(outcome, Exception):
+                outcome = {"success": False, "error": f"Search failed: {outcome}"}
+            if not outcome.get("success"):
+                planned.append({"query": query, "error": outcome.get("error")})
+                continue
+            planned.append(
+                {"query": query, "count": outcome["count"], "source": outcome.get("source")}
+            )
+            for thread in outcome["threads"]:
+                # Copy, as the listing may be shared with the response cache
+                threads.setdefault(thread["thread_id"], dict(thread))
+
+        if not threads and all("error" in q for q in planned):
+            return {"success": False, "error": "All class searches failed", "queries": planned}
+
+        # Search results carry no selftext, so tag from the stored thread when available
+        stored = store.get_threads(list(threads)) if store is not None else {}
+        for thread_id, thread in threads.items():
+            record = stored.get(thread_id)
+            text = thread["title"] + " " + ((record or {}).get("selftext") or "")
+            thread["medications"] = sorted(matcher.find_labels(text))
+
+        return {
+            "success": True,
+            "medication_class": template["category"],
+            "medications": class_search_terms(medication_class),
+            "count": len(threads),
+            "threads": list(threads.values()),
+            "queries": planned,
+        }
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# SPDX-FileCopyrightText: 2025 stharrold
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Single-pass scrubbing of personal information from post and comment text.
+
+Username mentions, email addresses and phone numbers are matched by one combined
+regular expression, so each document is scanned once whatever the number of
+patterns. Mentioned names are replaced by their pseudonym in brackets
+(``u/[1a2b..]``) so they still link to the corpus author column; the bracketed form
+no longer matches, which makes scrubbing idempotent.
+"""
+
+import re
+import threading
+import time
+
+from .utils import anonymize_username
+
+PII_PATTERN = re.compile(
+    r"(?P<user>(?:(?<![\w/])/?u|(?<![\w/])/user|reddit\.com/(?:u|user))"
+    r"/(?P<name>[A-Za-z0-9_-]{3,20})(?![\w-]))"
+    r"|(?P<email>\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b)"
+    r"|(?P<phone>(?<![\w+])(?:\+?1[\s.-]?)?(?:\(\d{3}\)|\d{3})[\s.-]?\d{3}[\s.-]?\d{4}(?!\d))"
+)
+
+PLACEHOLDERS = {"email": "[email]", "phone": "[phone]"}
+
+
+def _replace(match: re.Match) -> str:
+    if match.lastgroup == "user":
+        # Keep the "u/", "/user/" or reddit.com prefix, replace only the name
+        prefix = match.group("user")[: match.start("name") - match.start("user")]
+        return f"{prefix}[{anonymize_username(match.group('name'))}]"
+    return PLACEHOLDERS[match.lastgroup]
+
+
+class Scrubber:
+    """Apply PII_PATTERN to documents, keeping per-document timing statistics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.documents = 0
+        self.scrubbed = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+
+    def scrub(self, text: str | None) -> str | None:
+        """Return text with usernames, emails and phone numbers replaced."""
+        if not text:
+            return text
+        started = time.perf_counter()
+        result = PII_PATTERN.sub(_replace, text)
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.documents += 1
+            self.scrubbed += result != text
+            self.seconds += elapsed
+            self.max_seconds = max(self.max_seconds, elapsed)
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "documents": self.documents,
+            "scrubbed": self.scrubbed,
+            "total_ms": round(self.seconds * 1000, 3),
+            "mean_us": round(self.seconds * 1e6 / self.documents, 3) if self.documents else 0.0,
+            "max_ms": round(self.max_seconds * 1000, 3),
+        }
+
+
+# Process-wide scrubber used by the record builders and tools
+scrubber = Scrubber()
+
+
+def scrub_text(text: str | None) -> str | None:
+    """Scrub one document with the process-wide scrubber."""
+    return scrubber.scrub(text)
@@ -0,0 +1,934 @@
+#!/usr/bin/env python3
+# SPDX-FileCopyrightText: 2025 stharrold
+# SPDX-License-Identifier: Apache-2.0
+
+import os
+import threading
+import time
+
+import duckdb
+
+from .medications import query_matcher, query_terms
+from .scrub import scrub_text
+from .utils import salt_fingerprint
+
+# Default on-disk location of the local research corpus
+DEFAULT_CORPUS_PATH = os.path.join("data", "corpus.duckdb")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS subreddits (
+    subreddit_id VARCHAR PRIMARY KEY,
+    display_name VARCHAR,
+    title VARCHAR,
+    description VARCHAR,
+    subscribers BIGINT,
+    created_utc DOUBLE,
+    rules VARCHAR[],
+    fetched_at DOUBLE
+);
+
+CREATE TABLE IF NOT EXISTS threads (
+    thread_id VARCHAR PRIMARY KEY,
+    subreddit_id VARCHAR,
+    subreddit VARCHAR,
+    title VARCHAR,
+    selftext VARCHAR,
+    author VARCHAR,
+    score INTEGER,
+    num_comments INTEGER,
+    created_utc DOUBLE,
+    permalink VARCHAR,
+    word_count INTEGER,
+    fetched_at DOUBLE,
+    comment_sort VARCHAR,
+    comments_fetched INTEGER,
+    comments_complete BOOLEAN
+);
+
+CREATE TABLE IF NOT EXISTS comments (
+    comment_id VARCHAR PRIMARY KEY,
+    thread_id VARCHAR,
+    parent_id VARCHAR,
+    author VARCHAR,
+    body VARCHAR,
+    score INTEGER,
+    created_utc DOUBLE,
+    position INTEGER,
+    fetched_at DOUBLE
+);
+
+ALTER TABLE comments ADD COLUMN IF NOT EXISTS depth INTEGER;
+
+-- Subreddit of comments loaded from dumps, whose thread may not be in the corpus
+ALTER TABLE comments ADD COLUMN IF NOT EXISTS subreddit VARCHAR;
+
+CREATE TABLE IF NOT EXISTS searches (
+    search_key VARCHAR PRIMARY KEY,
+    query VARCHAR,
+    subreddits VARCHAR,
+    scanned INTEGER,
+    exhausted BOOLEAN,
+    fetched_at DOUBLE
+);
+
+CREATE TABLE IF NOT EXISTS search_results (
+    search_key VARCHAR,
+    rank INTEGER,
+    thread_id VARCHAR,
+    PRIMARY KEY (search_key, rank)
+);
+
+CREATE TABLE IF NOT EXISTS text_docs (
+    kind VARCHAR,
+    doc_id VARCHAR,
+    length INTEGER,
+    PRIMARY KEY (kind, doc_id)
+);
+
+CREATE TABLE IF NOT EXISTS text_postings (
+    kind VARCHAR,
+    doc_id VARCHAR,
+    term VARCHAR,
+    tf INTEGER,
+    length INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS text_index_state (
+    kind VARCHAR PRIMARY KEY,
+    indexed_through DOUBLE,
+    appended BIGINT
+);
+
+CREATE OR REPLACE MACRO text_tokens(s) AS list_filter(
+    string_split_regex(lower(coalesce(s, '')), '[^\\p{L}\\p{N}]+'), t -> length(t) > 1
+);
+
+CREATE TABLE IF NOT EXISTS corpus_meta (
+    key VARCHAR PRIMARY KEY,
+    value VARCHAR
+);
+
+CREATE TABLE IF NOT EXISTS crawl_state (
+    subreddit VARCHAR,
+    query VARCHAR,
+    newest_created_utc DOUBLE,
+    newest_id VARCHAR,
+    collected BIGINT,
+    runs INTEGER,
+    last_run_at DOUBLE,
+    PRIMARY KEY (subreddit, query)
+);
+
+-- Range a crawl could not reach below the listing cap, collected on later runs
+ALTER TABLE crawl_state ADD COLUMN IF NOT EXISTS gap_start DOUBLE;
+ALTER TABLE crawl_state ADD COLUMN IF NOT EXISTS gap_end DOUBLE;
+"""
+
+THREAD_COLUMNS = [
+    "thread_id",
+    "subreddit_id",
+    "subreddit",
+    "title",
+    "selftext",
+    "author",
+    "score",
+    "num_comments",
+    "created_utc",
+    "permalink",
+    "word_count",
+]
+
+COMMENT_COLUMNS = [
+    "comment_id",
+    "thread_id",
+    "parent_id",
+    "depth",
+    "author",
+    "body",
+    "score",
+    "created_utc",
+]
+
+# DuckDB COPY options per export format. Parquet is written in row groups so readers
+# can scan multi-million-comment exports without loading a whole file.
+EXPORT_FORMATS = {
+    "jsonl": "FORMAT JSON",
+    "csv": "FORMAT CSV, HEADER",
+    "parquet": "FORMAT PARQUET, COMPRESSION ZSTD, ROW_GROUP_SIZE {row_group_size}",
+}
+DEFAULT_ROW_GROUP_SIZE = 100_000
+
+# Free-text columns passed through scrub_text (registered on the connection) on export,
+# so rows stored before scrubbing was added leave the corpus scrubbed too
+SCRUBBED_COLUMNS = ("title", "selftext", "body")
+
+
+def _export_columns(alias: str, columns: list[str]) -> str:
+    return ", ".join(
+        f"scrub_text({alias}.{c}) AS {c}" if c in SCRUBBED_COLUMNS else f"{alias}.{c}"
+        for c in columns
+    )
+
+
+EXPORT_QUERIES = {
+    "threads": (
+        f"SELECT {_export_columns('t', THREAD_COLUMNS)}, "
+        "to_timestamp(t.created_utc) AS created_at FROM threads t"
+    ),
+    "comments": (
+        f"SELECT {_export_columns('c', COMMENT_COLUMNS)}, "
+        "coalesce(t.subreddit, c.subreddit) AS subreddit, "
+        "to_timestamp(c.created_utc) AS created_at "
+        "FROM comments c LEFT JOIN threads t USING (thread_id)"
+    ),
+}
+
+
+# Documents of the full-text index: (table, ID column, indexed text) per kind
+TEXT_SOURCES = {
+    "threads": ("threads", "thread_id", "title || ' ' || coalesce(selftext, '')"),
+    "comments": ("comments", "comment_id", "body"),
+}
+
+# Okapi BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Re-sort the postings by term once this fraction of documents was appended unsorted
+COMPACT_FRACTION = 0.1
+
+# Per-document BM25 scores of the documents of one kind containing every query term.
+# Postings are kept sorted by term, so the term filter skips all other row groups.
+BM25_SQL = f"""
+SELECT p.doc_id, sum(
+    ln((s.n - f.df + 0.5) / (f.df + 0.5) + 1) * p.tf * ({BM25_K1} + 1)
+    / (p.tf + {BM25_K1} * (1 - {BM25_B} + {BM25_B} * p.length / s.avgdl))
+) AS score
+FROM text_postings p
+JOIN (
+    SELECT term, count(*) AS df FROM text_postings
+    WHERE kind = $kind AND term = ANY($terms) GROUP BY term
+) f USING (term)
+CROSS JOIN (SELECT count(*) AS n, avg(length) AS avgdl FROM text_docs WHERE kind = $kind) s
+WHERE p.kind = $kind AND p.term = ANY($terms)
+GROUP BY p.doc_id
+HAVING count(*) = len($terms)
+"""
+
+
+def _mentions_medication(text: str | None, query: str) -> bool:
+    """Match text like the search tools do (word boundaries, OR-combined names)."""
+    return query_matcher(query).search(text)
+
+
+def _bm25_scores(kind: str, term_groups: list[list[str]], params: dict) -> str:
+    """
+    Build the scores of documents matching any group of terms (all terms of a group).
+
+    Documents matching several groups (the alternatives of an OR query) keep their
+    best score. The term lists are added to params.
+    """
+    alternatives = []
+    for i, terms in enumerate(term_groups):
+        params[f"terms{i}"] = terms
+        alternatives.append(BM25_SQL.replace("$kind", f"'{kind}'").replace("$terms", f"$terms{i}"))
+    return (
+        "SELECT doc_id, max(score) AS score FROM ("
+        + " UNION ALL ".join(alternatives)
+        + ") GROUP BY doc_id"
+    )
+
+
+def _comment_only_thread(thread_id: str, subreddit: str | None, created_utc: float | None):
+    """Stand in for the row of a thread whose comments were loaded without it."""
+    return {
+        "thread_id": thread_id,
+        "subreddit_id": None,
+        "subreddit": subreddit,
+        "title": None,
+        "selftext": None,
+        "author": None,
+        "score": None,
+        "num_comments": None,
+        "created_utc": created_utc,
+        "permalink": f"/r/{subreddit}/comments/{thread_id}/",
+        "word_count": None,
+    }
+
+
+def search_key(query: str, subreddits: list[str], sort: str = "relevance") -> str:
+    """Build the normalized key under which a search listing is recorded."""
+    subs = ",".join(sorted({s.lower() for s in subreddits}))
+    return f"{query.strip().lower()}|{subs}|{sort}"
+
+
+class CorpusStore:
+    """
+    Local DuckDB corpus of threads, comments and subreddits keyed by Reddit ID.
+
+    The research tools write every fetched record through this store and consult it
+    before going to the Reddit API. Only anonymized author hashes are ever stored.
+    """
+
+    def __init__(self, path: str = DEFAULT_CORPUS_PATH):
+        if path != ":memory:":
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.salt_fingerprint = salt_fingerprint()
+        self._conn = duckdb.connect(path)
+        self._lock = threading.RLock()
+        self._types: dict[str, dict[str, str]] = {}
+        with self._lock:
+            # DuckDB's progress bar writes to stdout, which carries the MCP stdio protocol
+            self._conn.execute("SET enable_progress_bar = false")
+            self._conn.execute(SCHEMA)
+            (self._last_write,) = self._conn.execute(
+                "SELECT coalesce(max(indexed_through), 0) FROM text_index_state"
+            ).fetchone()
+            self._record_salt_fingerprint()
+            # Exports read committed data on a connection of their own, without the lock
+            self._exports = self._conn.cursor()
+            self._export_lock = threading.Lock()
+            self._conn.create_function("scrub_text", scrub_text, ["VARCHAR"], "VARCHAR")
+            self._conn.create_function(
+                "mentions_medication", _mentions_medication, ["VARCHAR", "VARCHAR"], "BOOLEAN"
+            )
+
+    @classmethod
+    def from_env(cls) -> "CorpusStore":
+        """Open the store at CORPUS_DB_PATH (or the default location)."""
+        return cls(os.environ.get("CORPUS_DB_PATH") or DEFAULT_CORPUS_PATH)
+
+    def close(self):
+        with self._export_lock, self._lock:
+            self._exports.close()
+            self._conn.close()
+
+    def _write_stamp(self) -> float:
+        """
+        Return the fetched_at of a thread or comment write; call with the lock held.
+
+        The full-text index picks up rows stamped after its last refresh, so stamps
+        are taken under the lock and never go backwards, even if the clock does: a
+        write can't be stamped below a refresh that already went through.
+        """
+        self._last_write = max(time.time(), self._last_write + 1e-6)
+        return self._last_write
+
+    def _column_types(self, table: str) -> dict[str, str]:
+        if table not in self._types:
+            rows = self._conn.execute(f"DESCRIBE {table}").fetchall()
+            self._types[table] = {row[0]: row[1] for row in rows}
+        return self._types[table]
+
+    def _insert_rows(self, table: str, names: list[str], rows: list[list], conflict: str = ""):
+        """
+        Insert rows in one statement, passing each column as a typed list parameter.
+
+        executemany runs one statement per row (a few hundred rows/s); unnesting
+        column lists loads a whole batch at once. Rows with the same key (the first
+        column) are collapsed first, the last one winning, as an ON CONFLICT clause
+        may not touch a row twice in one statement.
+        """
+        rows = list({row[0]: row for row in rows}.values())
+        if not rows:
+            return
+        types = self._column_types(table)
+        select = ", ".join(f"unnest(?::{types[n]}[]) AS {n}" for n in names)
+        columns = [list(column) for column in zip(*rows, strict=True)]
+        self._conn.execute(
+            f"INSERT INTO {table} ({', '.join(names)}) SELECT {select} {conflict}", columns
+        )
+
+    def _fetch_dicts(self, sql: str, params: list | None = None) -> list[dict]:
+        with self._lock:
+            cursor = self._conn.execute(sql, params or [])
+            columns = [d[0] for d in cursor.description]
+            return [dict(zip(columns, row, strict=True)) for row in cursor.fetchall()]
+
+    # --- SUBREDDITS ---
+
+    def upsert_subreddit(self, record: dict):
+        """Insert or update a subreddit row (only the provided columns are updated)."""
+        columns = [c for c in record if c != "subreddit_id"]
+        updates = ", ".join(f"{c} = excluded.{c}" for c in [*columns, "fetched_at"])
+        names = ["subreddit_id", *columns, "fetched_at"]
+        placeholders = ", ".join("?" for _ in names)
+        sql = (
+            f"INSERT INTO subreddits ({', '.join(names)}) VALUES ({placeholders}) "
+            f"ON CONFLICT (subreddit_id) DO UPDATE SET {updates}"
+        )
+        params = [record["subreddit_id"], *(record[c] for c in columns), time.time()]
+        with self._lock:
+            self._conn.execute(sql, params)
+
+    # --- THREADS ---
+
+    def upsert_threads(self, records: list[dict], replace: bool = True):
+        """
+        Insert or refresh thread metadata, preserving any comment bookkeeping.
+
+        With replace=False, threads already stored are left untouched (used when
+        loading older dump snapshots next to records fetched live).
+        """
+        if not records:
+            return
+        names = [*THREAD_COLUMNS, "fetched_at"]
+        updates = ", ".join(f"{c} = excluded.{c}" for c in names[1:])
+        conflict = f"DO UPDATE SET {updates}" if replace else "DO NOTHING"
+        rows = [[r.get(c) for c in THREAD_COLUMNS] for r in records]
+        if not replace:
+            # Keep the first of duplicate records, as row-by-row DO NOTHING inserts did
+            rows.reverse()
+        subreddit_rows = {
+            r["subreddit_id"]: r["subreddit"] for r in records if r.get("subreddit_id")
+        }
+        with self._lock:
+            now = self._write_stamp()
+            rows = [[*row, now] for row in rows]
+            self._insert_rows("threads", names, rows, f"ON CONFLICT (thread_id) {conflict}")
+            self._insert_rows(
+                "subreddits",
+                ["subreddit_id", "display_name"],
+                [[sid, name] for sid, name in subreddit_rows.items()],
+                "ON CONFLICT (subreddit_id) DO NOTHING",
+            )
+
+    def get_thread(self, thread_id: str) -> dict | None:
+        rows = self._fetch_dicts("SELECT * FROM threads WHERE thread_id = ?", [thread_id])
+        return rows[0] if rows else None
+
+    def get_thread_ids(self) -> set[str]:
+        """Return the IDs of every stored thread."""
+        with self._lock:
+            return {
+                row[0] for row in self._conn.execute("SELECT thread_id FROM threads").fetchall()
+            }
+
+    def search_threads(
+        self,
+        text: str,
+        subreddits: list[str] | None = None,
+        start_ts: float | None = None,
+        end_ts: float | None = None,
+        min_comments: int = 0,
+        min_words: int = 0,
+        limit: int = 100,
+        include_comments: bool = False,
+    ) -> list[dict]:
+        """
+        Rank stored threads against text with BM25 over the local full-text index.
+
+        Every query term must occur in the thread (or, with include_comments, in one
+        of its comments; the thread then ranks by its best-scoring document); an OR
+        query matches threads containing every term of any of its parts. The
+        search filters are applied in the same query. Threads whose comments were
+        loaded from dumps without the submission are returned as rows holding only
+        their ID, subreddit, permalink and the time of the earliest matching comment.
+
+        Returns:
+            Thread rows with a 'relevance' (BM25) column, best match first.
+        """
+        term_groups = self.query_term_groups(text)
+        if not term_groups:
+            return []
+        self.refresh_text_index()
+
+        params = {
+            "limit": limit,
+            "min_comments": min_comments,
+            "min_words": min_words,
+        }
+        thread_scores = _bm25_scores("threads", term_groups, params)
+        scored = (
+            "SELECT doc_id AS thread_id, score, NULL::VARCHAR AS subreddit, "
+            f"NULL::DOUBLE AS created_utc FROM ({thread_scores})"
+        )
+        if include_comments:
+            comment_scores = _bm25_scores("comments", term_groups, params)
+            scored += (
+                " UNION ALL SELECT c.thread_id, b.score, c.subreddit, c.created_utc "
+                f"FROM ({comment_scores}) b JOIN comments c ON c.comment_id = b.doc_id"
+            )
+
+        # Threads known only from dump comments have no post to filter on, and take
+        # their subreddit and date from the earliest matching comment
+        conditions = [
+            "(t.thread_id IS NULL OR t.num_comments >= $min_comments)",
+            "(t.thread_id IS NULL OR t.word_count >= $min_words)",
+        ]
+        if subreddits:
+            conditions.append(
+                "list_contains($subreddits, lower(coalesce(t.subreddit, m.subreddit)))"
+            )
+            params["subreddits"] = [s.lower() for s in subreddits]
+        if start_ts is not None:
+            conditions.append("coalesce(t.created_utc, m.created_utc) >= $start_ts")
+            params["start_ts"] = start_ts
+        if end_ts is not None:
+            conditions.append("coalesce(t.created_utc, m.created_utc) <= $end_ts")
+            params["end_ts"] = end_ts
+
+        # Rank on the filter columns only, then load the full rows of the top threads
+        with self._lock:
+            ranked = self._conn.execute(
+                "SELECT m.thread_id, m.score, m.subreddit, m.created_utc FROM ("
+                "SELECT thread_id, max(score) AS score, any_value(subreddit) AS subreddit, "
+                f"min(created_utc) AS created_utc FROM ({scored}) GROUP BY thread_id"
+                f") m LEFT JOIN threads t USING (thread_id) WHERE {' AND '.join(conditions)} "
+                "ORDER BY m.score DESC, coalesce(t.created_utc, m.created_utc) DESC "
+                "LIMIT $limit",
+                params,
+            ).fetchall()
+        rows = self.get_threads([row[0] for row in ranked])
+        return [
+            {
+                **(rows.get(thread_id) or _comment_only_thread(thread_id, subreddit, created)),
+                "relevance": score,
+            }
+            for thread_id, score, subreddit, created in ranked
+        ]
+
+    def search_comments(
+        self,
+        text: str,
+        subreddits: list[str] | None = None,
+        start_ts: float | None = None,
+        end_ts: float | None = None,
+        limit: int = 100,
+    ) -> list[dict]:
+        """
+        Rank stored comments against text with BM25 over the local full-text index.
+
+        Returns:
+            Comment rows with 'relevance', the thread's 'thread_title', 'subreddit',
+            'permalink' and, for replies, the 'parent_body' of the parent comment.
+        """
+        term_groups = self.query_term_groups(text)
+        if not term_groups:
+            return []
+        self.refresh_text_index()
+
+        conditions = ["true"]
+        params: dict = {"limit": limit}
+        if subreddits:
+            conditions.append(
+                "list_contains($subreddits, lower(coalesce(t.subreddit, c.subreddit)))"
+            )
+            params["subreddits"] = [s.lower() for s in subreddits]
+        if start_ts is not None:
+            conditions.append("c.created_utc >= $start_ts")
+            params["start_ts"] = start_ts
+        if end_ts is not None:
+            conditions.append("c.created_utc <= $end_ts")
+            params["end_ts"] = end_ts
+
+        # Rank on the filter columns only, then load the full rows of the top comments
+        comment_scores = _bm25_scores("comments", term_groups, params)
+        with self._lock:
+            ranked = self._conn.execute(
+                f"SELECT b.doc_id, b.score FROM ({comment_scores}) b "
+                "JOIN comments c ON c.comment_id = b.doc_id LEFT JOIN threads t USING (thread_id) "
+                f"WHERE {' AND '.join(conditions)} ORDER BY b.score DESC LIMIT $limit",
+                params,
+            ).fetchall()
+        if not ranked:
+            return []
+
+        comments = {
+            row["comment_id"]: row
+            for row in self._fetch_dicts(
+                "SELECT * FROM comments WHERE comment_id = ANY(?)", [[c for c, _ in ranked]]
+            )
+        }
+        threads = self.get_threads(list({c["thread_id"] for c in comments.values()}))
+        parent_ids = [
+            c["parent_id"][3:]
+            for c in comments.values()
+            if (c["parent_id"] or "").startswith("t1_")
+        ]
+        with self._lock:
+            parents = dict(
+                self._conn.execute(
+                    "SELECT comment_id, body FROM comments WHERE comment_id = ANY(?)", [parent_ids]
+                ).fetchall()
+            )
+
+        results = []
+        for comment_id, score in ranked:
+            comment = comments[comment_id]
+            thread = threads.get(comment["thread_id"]) or _comment_only_thread(
+                comment["thread_id"], comment["subreddit"], None
+            )
+            parent_id = comment["parent_id"] or ""
+            results.append(
+                {
+                    **comment,
+                    "relevance": score,
+                    "thread_title": thread["title"],
+                    "subreddit": thread["subreddit"],
+                    "permalink": thread["permalink"],
+                    "parent_body": parents.get(parent_id[3:])
+                    if parent_id.startswith("t1_")
+                    else None,
+                }
+            )
+        return results
+
+    def get_threads(self, thread_ids: list[str]) -> dict[str, dict]:
+        """Return stored threads for the given IDs, keyed by thread ID."""
+        if not thread_ids:
+            return {}
+        rows = self._fetch_dicts(
+            "SELECT * FROM threads WHERE thread_id = ANY(?)", [list(thread_ids)]
+        )
+        return {row["thread_id"]: row for row in rows}
+
+    # --- COMMENTS ---
+
+    def save_comments(self, thread_id: str, comments: list[dict], sort: str, complete: bool):
+        """Record the comment listing of a thread in the order it was retrieved."""
+        names = [*COMMENT_COLUMNS, "position", "fetched_at"]
+        updates = ", ".join(f"{c} = excluded.{c}" for c in names[1:])
+        rows = [
+            [thread_id if col == "thread_id" else c.get(col) for col in COMMENT_COLUMNS]
+            + [position]
+            for position, c in enumerate(comments)
+        ]
+        with self._lock:
+            now = self._write_stamp()
+            rows = [[*row, now] for row in rows]
+            # Positions belong to a single sort order, so drop the previous ordering
+            self._conn.execute(
+                "UPDATE comments SET position = NULL WHERE thread_id = ?", [thread_id]
+            )
+            if rows:
+                self._insert_rows(
+                    "comments", names, rows, f"ON CONFLICT (comment_id) DO UPDATE SET {updates}"
+                )
+            self._conn.execute(
+                "UPDATE threads SET comment_sort = ?, comments_fetched = ?, "
+                "comments_complete = ? WHERE thread_id = ?",
+                [sort, len(comments), complete, thread_id],
+            )
+
+    def upsert_comments(self, records: list[dict], replace: bool = True):
+        """
+        Insert comments outside of any retrieved listing (e.g. loaded from dumps).
+
+        Listing positions of comments already stored are kept, and with
+        replace=False stored comments are left untouched entirely.
+        """
+        if not records:
+            return
+        names = [*COMMENT_COLUMNS, "subreddit", "fetched_at"]
+        updates = ", ".join(f"{c} = excluded.{c}" for c in names[1:])
+        conflict = f"DO UPDATE SET {updates}" if replace else "DO NOTHING"
+        rows = [[r.get(c) for c in names[:-1]] for r in records]
+        if not replace:
+            rows.reverse()
+        with self._lock:
+            now = self._write_stamp()
+            rows = [[*row, now] for row in rows]
+            self._insert_rows("comments", names, rows, f"ON CONFLICT (comment_id) {conflict}")
+
+    def get_all_comments(self, thread_id: str, limit: int) -> list[dict]:
+        """Return every stored comment of a thread, listing order first, then by score."""
+        return self._fetch_dicts(
+            "SELECT * FROM comments WHERE thread_id = ? "
+            "ORDER BY position NULLS LAST, score DESC LIMIT ?",
+            [thread_id, limit],
+        )
+
+    def get_comments(self, thread_id: str, limit: int) -> list[dict]:
+        """Return the stored comments of a thread in retrieval order."""
+        return self._fetch_dicts(
+            "SELECT * FROM comments WHERE thread_id = ? AND position IS NOT NULL "
+            "ORDER BY position LIMIT ?",
+            [thread_id, limit],
+        )
+
+    # --- SEARCHES ---
+
+    def get_search(self, key: str) -> dict | None:
+        rows = self._fetch_dicts("SELECT * FROM searches WHERE search_key = ?", [key])
+        return rows[0] if rows else None
+
+    def get_search_threads(self, key: str, limit: int) -> list[dict]:
+        """Return the threads of a recorded search listing in rank order."""
+        return self._fetch_dicts(
+            "SELECT t.* FROM search_results r JOIN threads t USING (thread_id) "
+            "WHERE r.search_key = ? AND r.rank < ? ORDER BY r.rank",
+            [key, limit],
+        )
+
+    def record_search(
+        self, key: str, query: str, subreddits: list[str], records: list[dict], exhausted: bool
+    ):
+        """
+        Record the ranked listing returned by a Reddit search.
+
+        Args:
+            key: Normalized search key (see search_key()).
+            query: The query string sent to Reddit.
+            subreddits: Subreddits covered by the search.
+            records: Thread records in the order Reddit returned them.
+            exhausted: True if Reddit ran out of results before the requested limit.
+        """
+        self.upsert_threads(records)
+        with self._lock:
+            self._conn.execute("DELETE FROM search_results WHERE search_key = ?", [key])
+            self._insert_rows(
+                "search_results",
+                ["rank", "search_key", "thread_id"],
+                [[rank, key, r["thread_id"]] for rank, r in enumerate(records)],
+            )
+            self._conn.execute(
+                "INSERT INTO searches VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (search_key) DO UPDATE SET query = excluded.query, "
+                "subreddits = excluded.subreddits, scanned = excluded.scanned, "
+                "exhausted = excluded.exhausted, fetched_at = excluded.fetched_at",
+                [key, query, ",".join(subreddits), len(records), exhausted, time.time()],
+            )
+
+    # --- PSEUDONYMS ---
+
+    def _record_salt_fingerprint(self):
+        """Record the fingerprint of the salt the corpus authors are pseudonymized with."""
+        if self._conn.execute(
+            "SELECT 1 FROM corpus_meta WHERE key = 'salt_fingerprint'"
+        ).fetchone():
+            return
+        fingerprint = self.salt_fingerprint
+        # Corpora written before corpus_meta listed every pseudonym with its salt
+        legacy = self._conn.execute(
+            "SELECT 1 FROM information_schema.tables WHERE table_name = 'pseudonyms'"
+        ).fetchone()
+        if legacy:
+            row = self._conn.execute(
+                "SELECT salt_fingerprint FROM pseudonyms "
+                "GROUP BY salt_fingerprint ORDER BY count(*) DESC LIMIT 1"
+            ).fetchone()
+            fingerprint = row[0] if row else fingerprint
+            self._conn.execute("DROP TABLE pseudonyms")
+        self._conn.execute("INSERT INTO corpus_meta VALUES ('salt_fingerprint', ?)", [fingerprint])
+
+    def corpus_salt_fingerprint(self) -> str:
+        """Return the fingerprint of the salt the stored authors were pseudonymized with."""
+        with self._lock:
+            (fingerprint,) = self._conn.execute(
+                "SELECT value FROM corpus_meta WHERE key = 'salt_fingerprint'"
+            ).fetchone()
+        return fingerprint
+
+    # --- INCREMENTAL CRAWLS ---
+
+    def get_crawl_state(self, subreddit: str, query: str) -> dict | None:
+        """Return the high-water mark of a (subreddit, query) crawl, if any."""
+        rows = self._fetch_dicts(
+            "SELECT * FROM crawl_state WHERE subreddit = ? AND query = ?",
+            [subreddit.lower(), query.strip().lower()],
+        )
+        return rows[0] if rows else None
+
+    def update_crawl_state(
+        self,
+        subreddit: str,
+        query: str,
+        newest_created_utc: float | None,
+        newest_id: str | None,
+        collected: int,
+        gap: tuple[float, float] | None = None,
+    ):
+        """
+        Advance the high-water mark of a crawl and count the items it collected.
+
+        Args:
+            gap: (start, end) timestamps of the range still to be collected below the
+                mark, replacing any previous gap; None records that there is none.
+        """
+        gap_start, gap_end = gap or (None, None)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO crawl_state (subreddit, query, newest_created_utc, newest_id, "
+                "collected, runs, last_run_at, gap_start, gap_end) "
+                "VALUES (?, ?, ?, ?, ?, 1, ?, ?, ?) "
+                "ON CONFLICT (subreddit, query) DO UPDATE SET "
+                "newest_created_utc = coalesce("
+                "greatest(excluded.newest_created_utc, crawl_state.newest_created_utc), "
+                "crawl_state.newest_created_utc), "
+                "newest_id = CASE WHEN excluded.newest_created_utc "
+                "> coalesce(crawl_state.newest_created_utc, 0) "
+                "THEN excluded.newest_id ELSE crawl_state.newest_id END, "
+                "collected = crawl_state.collected + excluded.collected, "
+                "runs = crawl_state.runs + 1, last_run_at = excluded.last_run_at, "
+                "gap_start = excluded.gap_start, gap_end = excluded.gap_end",
+                [
+                    subreddit.lower(),
+                    query.strip().lower(),
+                    newest_created_utc,
+                    newest_id,
+                    collected,
+                    time.time(),
+                    gap_start,
+                    gap_end,
+                ],
+            )
+
+    # --- FULL-TEXT INDEX ---
+
+    def text_terms(self, text: str) -> list[str]:
+        """Split text into index terms with the tokenizer used to build the index."""
+        with self._lock:
+            row = self._conn.execute("SELECT list_distinct(text_tokens(?))", [text]).fetchone()
+        return sorted(row[0])
+
+    def query_term_groups(self, query: str) -> list[list[str]]:
+        """Split an OR-combined query (see query_terms) into the index terms of each part."""
+        groups = (self.text_terms(part) for part in query_terms(query))
+        return [terms for terms in groups if terms]
+
+    def refresh_text_index(self):
+        """
+        Bring the full-text index up to date with stored threads and comments.
+
+        Every write stamps fetched_at, so only documents written since the last
+        refresh are (re)tokenized; an unchanged corpus costs a single lookup.
+        """
+        with self._lock:
+            for kind, (table, id_column, text) in TEXT_SOURCES.items():
+                newest, indexed_through, appended = self._conn.execute(
+                    f"SELECT max(fetched_at), any_value(s.indexed_through), any_value(s.appended) "
+                    f"FROM {table} LEFT JOIN text_index_state s ON s.kind = ?",
+                    [kind],
+                ).fetchone()
+                if newest is None or (indexed_through is not None and newest <= indexed_through):
+                    continue
+
+                params = {
+                    "kind": kind,
+                    "since": -1.0 if indexed_through is None else indexed_through,
+                }
+                tokens = (
+                    f"SELECT {id_column} AS doc_id, text_tokens({text}) AS tokens "
+                    f"FROM {table} WHERE fetched_at > $since"
+                )
+                self._conn.execute("BEGIN TRANSACTION")
+                try:
+                    for index_table in ("text_docs", "text_postings"):
+                        self._conn.execute(
+                            f"DELETE FROM {index_table} WHERE kind = $kind AND doc_id IN "
+                            f"(SELECT {id_column} FROM {table} WHERE fetched_at > $since)",
+                            params,
+                        )
+                    (changed,) = self._conn.execute(
+                        f"INSERT INTO text_docs SELECT $kind, doc_id, len(tokens) FROM ({tokens})",
+                        params,
+                    ).fetchone()
+                    self._conn.execute(
+                        "INSERT INTO text_postings "
+                        "SELECT $kind, doc_id, term, count(*), any_value(length) FROM "
+                        f"(SELECT doc_id, unnest(tokens) AS term, len(tokens) AS length "
+                        f"FROM ({tokens})) GROUP BY doc_id, term",
+                        params,
+                    )
+
+                    appended = (appended or 0) + changed
+                    (total,) = self._conn.execute(
+                        "SELECT count(*) FROM text_docs WHERE kind = ?", [kind]
+                    ).fetchone()
+                    if appended > COMPACT_FRACTION * total:
+                        self._conn.execute(
+                            "CREATE OR REPLACE TABLE text_postings AS "
+                            "SELECT * FROM text_postings ORDER BY kind, term"
+                        )
+                        appended = 0
+
+                    self._conn.execute(
+                        "INSERT INTO text_index_state VALUES (?, ?, ?) ON CONFLICT (kind) "
+                        "DO UPDATE SET indexed_through = excluded.indexed_through, "
+                        "appended = excluded.appended",
+                        [kind, newest, appended],
+                    )
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+
+    # --- EXPORTS ---
+
+    def export(
+        self,
+        dataset: str,
+        path: str,
+        fmt: str = "jsonl",
+        subreddits: list[str] | None = None,
+        start_ts: float | None = None,
+        end_ts: float | None = None,
+        medication: str | None = None,
+        row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+    ) -> int:
+        """
+        Write stored threads or comments to a file with DuckDB's COPY.
+
+        Rows stream from the database to the file, so memory use does not grow with
+        the size of the corpus, and are read on a connection of their own, so other
+        tools keep using the store while a large export runs. Filters apply to the
+        thread (comments are exported for the matching threads).
+
+        Args:
+            dataset: 'threads' or 'comments'.
+            path: Output file path.
+            fmt: 'jsonl', 'csv' or 'parquet'.
+            subreddits: Only threads from these subreddits.
+            start_ts: Only threads created at or after this Unix timestamp.
+            end_ts: Only threads created at or before this Unix timestamp.
+            medication: Only threads whose title or selftext mention this medication
+                (or any name of an OR query), matched as by the search tools.
+            row_group_size: Rows per Parquet row group.
+
+        Returns:
+            int: Number of rows written.
+        """
+        if dataset not in EXPORT_QUERIES:
+            raise ValueError(f"Unknown dataset: {dataset}")
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {fmt}")
+
+        # Comments loaded from dumps without their thread fall back to their own columns
+        thread_text = "t.title || ' ' || coalesce(t.selftext, '')"
+        subreddit, created, text = (
+            ("t.subreddit", "t.created_utc", thread_text)
+            if dataset == "threads"
+            else (
+                "coalesce(t.subreddit, c.subreddit)",
+                "coalesce(t.created_utc, c.created_utc)",
+                f"coalesce({thread_text}, c.body)",
+            )
+        )
+        conditions, params = [], []
+        if subreddits:
+            conditions.append(f"list_contains(?, lower({subreddit}))")
+            params.append([s.lower() for s in subreddits])
+        if start_ts is not None:
+            conditions.append(f"{created} >= ?")
+            params.append(start_ts)
+        if end_ts is not None:
+            conditions.append(f"{created} <= ?")
+            params.append(end_ts)
+        if medication:
+            conditions.append(f"mentions_medication({text}, ?)")
+            params.append(medication)
+
+        query = EXPORT_QUERIES[dataset]
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        options = EXPORT_FORMATS[fmt].format(row_group_size=int(row_group_size))
+        target = path.replace("'", "''")
+        with self._export_lock:
+            written = self._exports.execute(
+                f"COPY ({query}) TO '{target}' ({options})", params
+            ).fetchone()
+        return written[0] if written else 0
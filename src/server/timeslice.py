@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# SPDX-FileCopyrightText: 2025 stharrold
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Time-sliced crawling of Reddit search listings.
+
+Reddit listings stop at 1000 items and its search no longer accepts timestamp
+ranges; the only server-side time bound is the relative ``time_filter``
+(day/week/month/year/all, each ending now). A date range is therefore split at
+those boundaries so each slice is queried with the narrowest filter covering it,
+crawled newest-first with ``sort="new"`` and stopped as soon as the listing passes
+the start of the slice. Slices that still hit the listing cap are re-queried with
+other sort orders to recover items ``sort="new"`` could not reach, and are flagged
+as saturated so callers know the result may be incomplete.
+
+Slices older than a year only have the ``all`` filter, whose ``sort="new"`` listing
+starts today and rarely gets back that far, so they skip it and take only what the
+other sort orders return (at least as much as a plain relevance search). Those
+slices are always flagged as saturated.
+"""
+
+import time
+from dataclasses import dataclass
+
+SEARCH_LISTING_CAP = 1000
+
+DAY = 24 * 60 * 60
+
+# Relative time filters from narrowest to widest, with the span each one covers
+TIME_FILTER_SPANS = (
+    ("day", DAY),
+    ("week", 7 * DAY),
+    ("month", 30 * DAY),
+    ("year", 365 * DAY),
+)
+
+# Keep slices clear of the exact filter edges, whose alignment Reddit doesn't document
+EDGE_MARGIN = 60 * 60
+
+# Orderings used to reach further into a slice that saturates the listing cap
+FALLBACK_SORTS = ("top", "comments", "relevance")
+
+# Items read from each fallback ordering; they return the whole filter span in no
+# date order, so deeper pages mostly repeat what falls outside the slice
+FALLBACK_LIMIT = 250
+
+# Read to the listing cap all the same, so a sliced crawl always covers at least what
+# a plain search of the range (sort="relevance") returns
+FULL_FALLBACK_SORTS = ("relevance",)
+
+
+@dataclass
+class Window:
+    """A date slice queried with a single Reddit time filter."""
+
+    start: float
+    end: float
+    time_filter: str
+    scanned: int = 0
+    fetched: int = 0
+    saturated: bool = False
+
+
+def narrowest_time_filter(since_ts: float, now: float | None = None) -> str:
+    """Return the narrowest Reddit time filter whose span reaches back to since_ts."""
+    now = time.time() if now is None else now
+    for time_filter, span in TIME_FILTER_SPANS:
+        if now - span + EDGE_MARGIN <= since_ts:
+            return time_filter
+    return "all"
+
+
+def plan_windows(start_ts: float, end_ts: float, now: float | None = None) -> list[Window]:
+    """
+    Split a date range at the boundaries of Reddit's relative time filters.
+
+    Args:
+        start_ts: Start of the range (Unix timestamp).
+        end_ts: End of the range (Unix timestamp).
+        now: Current time (defaults to time.time()).
+
+    Returns:
+        Windows covering the range, newest first.
+    """
+    now = time.time() if now is None else now
+    upper = min(end_ts, now)
+    windows = []
+
+    for time_filter, span in TIME_FILTER_SPANS:
+        bucket_start = now - span + EDGE_MARGIN
+        if upper <= bucket_start:
+            continue
+        window_start = max(start_ts, bucket_start)
+        if window_start < upper:
+            windows.append(Window(window_start, upper, time_filter))
+            upper = window_start
+        if upper <= start_ts:
+            return windows
+
+    if upper > start_ts:
+        windows.append(Window(start_ts, upper, "all"))
+    return windows
+
+
+def beyond_relative_filters(window: Window, now: float | None = None) -> bool:
+    """Return whether a window ends before the widest relative time filter begins."""
+    now = time.time() if now is None else now
+    return window.end <= now - TIME_FILTER_SPANS[-1][1] + EDGE_MARGIN
+
+
+def crawl_window(
+    search,
+    window: Window,
+    cap: int = SEARCH_LISTING_CAP,
+    fallback_limit: int = FALLBACK_LIMIT,
+    now: float | None = None,
+) -> list:
+    """
+    Collect every submission of a window that the listing cap allows.
+
+    Args:
+        search: Callable (sort, time_filter, limit) returning an iterable of submissions.
+        window: The window to crawl; its counters are updated in place.
+        cap: Maximum number of items Reddit serves per listing.
+        fallback_limit: Items read from each fallback sort of a saturated window
+            (except FULL_FALLBACK_SORTS, read to the cap).
+        now: Current time (defaults to time.time()).
+
+    Returns:
+        Submissions created within the window, deduplicated by ID.
+    """
+    found = {}
+    reached_start = False
+
+    if beyond_relative_filters(window, now):
+        # sort="new" would spend the whole listing on newer posts before reaching it
+        window.saturated = True
+    else:
+        for submission in search("new", window.time_filter, cap):
+            window.scanned += 1
+            if submission.created_utc > window.end:
+                continue
+            if submission.created_utc < window.start:
+                reached_start = True
+                break
+            found[submission.id] = submission
+        window.saturated = not reached_start and window.scanned >= cap
+
+    if window.saturated:
+        for sort in FALLBACK_SORTS:
+            limit = cap if sort in FULL_FALLBACK_SORTS else min(fallback_limit, cap)
+            for submission in search(sort, window.time_filter, limit):
+                window.scanned += 1
+                if window.start <= submission.created_utc <= window.end:
+                    found.setdefault(submission.id, submission)
+
+    window.fetched = len(found)
+    return list(found.values())
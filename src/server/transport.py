@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# SPDX-FileCopyrightText: 2025 stharrold
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Pooled httpx transport for all Reddit traffic.
+
+prawcore issues requests through a ``requests.Session``-compatible object. HttpxSession
+is one backed by a single tuned httpx client, shared by the server's read client and
+every per-session account client: connections are kept alive and reused across tools
+and users (multiplexed over HTTP/2 when the ``h2`` package is installed), responses
+are gzip-compressed, and connection setup is counted so reuse can be checked.
+"""
+
+import http.cookiejar
+import os
+import sys
+import threading
+
+import httpx
+import requests
+
+# Concurrent connections and idle keep-alive connections kept per pool
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_MAX_KEEPALIVE = 10
+
+# Seconds an idle connection is kept open for reuse
+KEEPALIVE_EXPIRY_S = 60.0
+
+# Seconds to establish a connection; the read timeout comes from prawcore
+CONNECT_TIMEOUT_S = 5.0
+
+# Hop-by-hop headers the pool manages itself (and HTTP/2 forbids)
+HOP_BY_HOP_HEADERS = ("connection", "keep-alive")
+
+
+def http2_available() -> bool:
+    """Return whether the optional h2 package needed for HTTP/2 is installed."""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _form(data):
+    # requests takes form data as a list of pairs; httpx wants a mapping of lists
+    if isinstance(data, list | tuple):
+        form = {}
+        for key, value in data:
+            if value is not None:
+                form.setdefault(key, []).append(value)
+        return form
+    if isinstance(data, dict):
+        return {key: value for key, value in data.items() if value is not None}
+    return data
+
+
+class HttpxSession:
+    """
+    A ``requests.Session`` stand-in for prawcore backed by a pooled httpx client.
+
+    Cookies are never stored, so one pool can carry requests for every account.
+    Transport errors are re-raised as the requests exceptions prawcore retries on.
+
+    Args:
+        http2: Negotiate HTTP/2 (default: when h2 is installed). Without h2, a
+            request for HTTP/2 falls back to HTTP/1.1 with a warning.
+        max_connections: Maximum concurrent connections.
+        max_keepalive: Maximum idle connections kept for reuse.
+    """
+
+    def __init__(
+        self,
+        http2: bool | None = None,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        max_keepalive: int = DEFAULT_MAX_KEEPALIVE,
+    ):
+        if http2 and not http2_available():
+            print(
+                "Warning: HTTP/2 was requested (REDDIT_HTTP2) but the h2 package is not "
+                "installed; using HTTP/1.1. Install it with pip install '.[http2]' "
+                "(or httpx[http2]).",
+                file=sys.stderr,
+            )
+            http2 = False
+        self.http2 = http2_available() if http2 is None else http2
+        self.client = httpx.Client(
+            http2=self.http2,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive,
+                keepalive_expiry=KEEPALIVE_EXPIRY_S,
+            ),
+            headers={"Accept-Encoding": "gzip"},
+            cookies=http.cookiejar.CookieJar(
+                http.cookiejar.DefaultCookiePolicy(allowed_domains=())
+            ),
+        )
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections_opened = 0
+        self.tls_handshakes = 0
+        self.gzip_responses = 0
+        self.http_versions: dict[str, int] = {}
+
+    @classmethod
+    def from_env(cls) -> "HttpxSession":
+        http2 = os.environ.get("REDDIT_HTTP2")
+        return cls(
+            http2=None if http2 is None else http2.lower() not in ("0", "false", "no"),
+            max_connections=int(os.environ.get("REDDIT_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS)),
+        )
+
+    @property
+    def headers(self) -> httpx.Headers:
+        return self.client.headers
+
+    def _trace(self, event: str, info: dict):
+        if event == "connection.connect_tcp.complete":
+            with self._lock:
+                self.connections_opened += 1
+        elif event == "connection.start_tls.complete":
+            with self._lock:
+                self.tls_handshakes += 1
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        params=None,
+        data=None,
+        files=None,
+        json=None,
+        headers=None,
+        auth=None,
+        timeout: float | None = None,
+        allow_redirects: bool = True,
+    ) -> httpx.Response:
+        """Send a request with the keyword arguments of ``requests.Session.request``."""
+        if params:
+            params = {key: value for key, value in params.items() if value is not None}
+        if headers:
+            headers = {k: v for k, v in headers.items() if k.lower() not in HOP_BY_HOP_HEADERS}
+        content = data if isinstance(data, bytes | str) or hasattr(data, "read") else None
+        try:
+            response = self.client.request(
+                method.upper(),
+                url,
+                params=params or None,
+                data=None if content is not None else _form(data),
+                content=content,
+                files=files,
+                json=json,
+                headers=headers,
+                auth=auth,
+                timeout=httpx.Timeout(timeout, connect=CONNECT_TIMEOUT_S),
+                follow_redirects=allow_redirects,
+                extensions={"trace": self._trace},
+            )
+        except httpx.ConnectTimeout as exc:
+            raise requests.exceptions.ConnectTimeout(str(exc)) from exc
+        except httpx.TimeoutException as exc:
+            raise requests.exceptions.ReadTimeout(str(exc)) from exc
+        except httpx.DecodingError as exc:
+            raise requests.exceptions.ChunkedEncodingError(str(exc)) from exc
+        except httpx.TransportError as exc:
+            raise requests.exceptions.ConnectionError(str(exc)) from exc
+
+        with self._lock:
+            self.requests += 1
+            self.gzip_responses += response.headers.get("content-encoding") == "gzip"
+            version = response.http_version
+            self.http_versions[version] = self.http_versions.get(version, 0) + 1
+        return response
+
+    def close(self):
+        # Account clients are closed independently; the shared pool outlives them
+        pass
+
+    def shutdown(self):
+        """Close every pooled connection."""
+        self.client.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            reused = max(self.requests - self.connections_opened, 0)
+            return {
+                "http2": self.http2,
+                "requests": self.requests,
+                "connections_opened": self.connections_opened,
+                "connections_reused": reused,
+                "reuse_rate": round(reused / self.requests, 3) if self.requests else 0.0,
+                "tls_handshakes": self.tls_handshakes,
+                "gzip_responses": self.gzip_responses,
+                "http_versions": dict(self.http_versions),
+            }
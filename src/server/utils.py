@@ -2,8 +2,11 @@
 # SPDX-FileCopyrightText: 2025 stharrold
 # SPDX-License-Identifier: Apache-2.0
 
+import contextvars
 import hashlib
 import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
 # Unique salt for this study to prevent cross-platform correlation
 # In production, this should be set via environment variable
@@ -15,10 +18,38 @@ if not STUDY_SALT:
     STUDY_SALT = "erkinney-mcp-2025-default-salt"
 
 
+# Distinct authors whose pseudonyms are kept in memory; authors recur across a corpus
+PSEUDONYM_CACHE_SIZE = 65536
+
+
+def salt_fingerprint(salt: str | None = None) -> str:
+    """
+    Identify a study salt without revealing it.
+
+    The fingerprint is stored once in the corpus so a corpus built with one salt is
+    never silently mixed with pseudonyms made from another.
+    """
+    salt = STUDY_SALT if salt is None else salt
+    return hashlib.sha256(f"salt-fingerprint:{salt}".encode()).hexdigest()[:16]
+
+
+@lru_cache(maxsize=PSEUDONYM_CACHE_SIZE)
+def _pseudonym(username: str) -> str:
+    # Combine username with salt and hash
+    salted_username = f"{username}:{STUDY_SALT}"
+    hash_object = hashlib.sha256(salted_username.encode("utf-8"))
+
+    # Return first 12 characters for readability while maintaining collision resistance
+    return hash_object.hexdigest()[:12]
+
+
 def anonymize_username(username: str) -> str:
     """
     Anonymize a Reddit username using SHA-256 hashing with a study-specific salt.
 
+    Pseudonyms of recently seen authors are memoized, so repeat authors are hashed
+    once per process.
+
     Args:
         username: The original Reddit username.
 
@@ -31,12 +62,35 @@ def anonymize_username(username: str) -> str:
     if username in ["[deleted]", "[removed]"]:
         return username
 
-    # Combine username with salt and hash
-    salted_username = f"{username}:{STUDY_SALT}"
-    hash_object = hashlib.sha256(salted_username.encode("utf-8"))
+    return _pseudonym(username)
 
-    # Return first 12 characters for readability while maintaining collision resistance
-    return hash_object.hexdigest()[:12]
+
+def anonymize_usernames(usernames) -> list[str]:
+    """
+    Anonymize a column of usernames, hashing each distinct name once.
+
+    Args:
+        usernames: Iterable of Reddit usernames (None for deleted authors).
+
+    Returns:
+        Pseudonyms in the order of the input.
+    """
+    usernames = list(usernames)
+    pseudonyms = {name: anonymize_username(name) for name in dict.fromkeys(usernames)}
+    return [pseudonyms[name] for name in usernames]
+
+
+def pseudonym_cache_stats() -> dict:
+    """Report hit and miss counters of the in-memory pseudonym cache."""
+    info = _pseudonym.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        "size": info.currsize,
+        "max_size": info.maxsize,
+        "hits": info.hits,
+        "misses": info.misses,
+        "hit_rate": round(info.hits / lookups, 4) if lookups else 0.0,
+    }
 
 
 def count_words(text: str) -> int:
@@ -44,3 +98,33 @@ def count_words(text: str) -> int:
     if not text:
         return 0
     return len(text.split())
+
+
+def map_concurrently(fn, items, max_workers: int = 4) -> list:
+    """
+    Apply a function to every item on a thread pool, preserving input order.
+
+    Each call runs in a copy of the caller's context, so the rate limit lane and
+    queue wait accounting of the calling tool carry over to the workers.
+
+    Args:
+        fn: Function of one argument.
+        items: Items to process.
+        max_workers: Maximum number of concurrent calls.
+
+    Returns:
+        A list of results, with the raised exception in place of any failed call.
+    """
+    items = list(items)
+    if not items:
+        return []
+
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items)))) as pool:
+        futures = [pool.submit(contextvars.copy_context().run, fn, item) for item in items]
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as exc:
+                results.append(exc)
+    return results
@@ -4,13 +4,37 @@
 
 
 import praw
+from mcp.server.fastmcp import Context
 from praw.exceptions import PRAWException
 
+from .accounts import AccountClients
+from .cache import ResponseCache, cached
+from .ratelimit import report_queue_wait
 
-def register_wiki_tools(mcp, reddit: praw.Reddit):
-    """Register wiki-related tools with the MCP server."""
+
+def register_wiki_tools(
+    mcp,
+    reddit: praw.Reddit,
+    cache: ResponseCache | None = None,
+    accounts: AccountClients | None = None,
+):
+    """
+    Register wiki-related tools with the MCP server.
+
+    Reads use the shared client; edits act as the session's account when accounts
+    is given.
+    """
+    accounts = accounts or AccountClients(reddit)
+
+    def wiki_unchanged(result: dict, subreddit_name: str, page_name: str = "index") -> bool:
+        # One-entry revision listing instead of downloading the page again
+        page = reddit.subreddit(subreddit_name).wiki[page_name]
+        latest = next(iter(page.revisions(limit=1)), None)
+        return latest is not None and latest["id"] == result.get("revision_id")
 
     @mcp.tool()
+    @report_queue_wait
+    @cached(cache, revalidate=wiki_unchanged)
     def read_wiki_page(subreddit_name: str, page_name: str = "index") -> dict:
         """
         Read a wiki page from a subreddit.
@@ -30,6 +54,7 @@ def register_wiki_tools(mcp, reddit: praw.Reddit):
                 "subreddit": subreddit_name,
                 "page": page_name,
                 "content_md": page.content_md,
+                "revision_id": page.revision_id,
                 "revision_by": page.revision_by.name if page.revision_by else None,
                 "revision_date": page.revision_date,
             }
@@ -39,8 +64,13 @@ def register_wiki_tools(mcp, reddit: praw.Reddit):
             return {"success": False, "error": f"Failed to read wiki page: {e}"}
 
     @mcp.tool()
+    @report_queue_wait
     def edit_wiki_page(
-        subreddit_name: str, page_name: str, content: str, reason: str | None = None
+        subreddit_name: str,
+        page_name: str,
+        content: str,
+        reason: str | None = None,
+        ctx: Context | None = None,
     ) -> dict:
         """
         Edit a wiki page on a subreddit.
@@ -55,13 +85,20 @@ def register_wiki_tools(mcp, reddit: praw.Reddit):
             dict: Success status or error.
         """
         try:
-            subreddit = reddit.subreddit(subreddit_name)
+            subreddit = accounts.client(ctx).subreddit(subreddit_name)
             subreddit.wiki[page_name].edit(content=content, reason=reason)
+            if cache is not None:
+                cache.invalidate(
+                    "read_wiki_page", subreddit_name=subreddit_name, page_name=page_name
+                )
+                cache.invalidate("list_wiki_pages", subreddit_name=subreddit_name)
             return {"success": True, "subreddit": subreddit_name, "page": page_name}
         except PRAWException as e:
             return {"success": False, "error": str(e), "error_type": e.__class__.__name__}
 
     @mcp.tool()
+    @report_queue_wait
+    @cached(cache)
     def list_wiki_pages(subreddit_name: str) -> dict:
         """
         List all wiki pages in a subreddit.
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# SPDX-FileCopyrightText: 2025 stharrold
+# SPDX-License-Identifier: Apache-2.0
+
+from types import SimpleNamespace
+
+from src.server.accounts import AccountClients, request_credentials
+
+
+def _ctx(headers=None):
+    request = SimpleNamespace(headers=headers) if headers is not None else None
+    return SimpleNamespace(request_context=SimpleNamespace(request=request))
+
+
+def _session(session_id, username, password="pw"):
+    return _ctx(
+        {"mcp-session-id": session_id, "x-reddit-username": username, "x-reddit-password": password}
+    )
+
+
+def test_request_credentials():
+    assert request_credentials(None) is None
+    assert request_credentials(_ctx()) is None
+    assert request_credentials(_ctx({"x-reddit-password": "pw"})) is None
+    assert request_credentials(_session("s1", "alice")) == {"username": "alice", "password": "pw"}
+
+
+def test_stdio_and_anonymous_sessions_use_shared_client():
+    shared = object()
+    accounts = AccountClients(shared, make_client=lambda creds: creds)
+    assert accounts.client(None) is shared
+    assert accounts.client(_ctx()) is shared
+    assert accounts.client(_ctx({"mcp-session-id": "s1"})) is shared
+
+    # Without a factory (stdio server) credential headers are ignored
+    assert AccountClients(shared).client(_session("s1", "alice")) is shared
+
+
+def test_sessions_get_their_own_client():
+    built = []
+    accounts = AccountClients(object(), make_client=lambda creds: built.append(creds) or creds)
+
+    alice = accounts.client(_session("s1", "alice"))
+    assert accounts.client(_session("s1", "alice")) is alice
+    assert accounts.client(_session("s2", "bob"))["username"] == "bob"
+    assert len(built) == 2
+
+    # New credentials on a session replace its client
+    assert accounts.client(_session("s1", "alice", "new"))["password"] == "new"
+    assert len(built) == 3
+
+
+def test_session_clients_are_bounded():
+    accounts = AccountClients(object(), make_client=dict, max_sessions=2)
+    for i in range(5):
+        accounts.client(_session(f"s{i}", "alice"))
+    assert len(accounts) == 2
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+# SPDX-FileCopyrightText: 2025 stharrold
+# SPDX-License-Identifier: Apache-2.0
+
+import threading
+import time
+
+import pytest
+
+from src.server import cache as cache_module
+from src.server.cache import ResponseCache, SingleFlight, TTLCache, cached
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(max_size=2)
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=60)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.set("c", 3, ttl=60)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_cache_expires_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache = TTLCache()
+    cache.set("a", 1, ttl=10)
+    assert cache.get("a") == 1
+
+    now[0] += 11
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert stats["expirations"] == 1
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_response_cache_wraps_tool_calls():
+    calls = []
+    cache = ResponseCache()
+
+    @cache.wrap
+    def get_subreddit_info(subreddit_name: str, refresh: bool = False) -> dict:
+        calls.append(subreddit_name)
+        return {"name": subreddit_name}
+
+    assert get_subreddit_info("pregnant") == {"name": "pregnant"}
+    assert get_subreddit_info(subreddit_name="pregnant") == {"name": "pregnant"}
+    assert calls == ["pregnant"]
+
+    get_subreddit_info("pregnant", refresh=True)
+    assert calls == ["pregnant", "pregnant"]
+    assert cache.stats()["tools"]["get_subreddit_info"]["hits"] == 1
+
+
+def test_response_cache_skips_failures_and_invalidates():
+    calls = []
+    cache = ResponseCache()
+
+    @cache.wrap
+    def read_wiki_page(subreddit_name: str, page_name: str = "index") -> dict:
+        calls.append(page_name)
+        return {"success": len(calls) > 1}
+
+    read_wiki_page("pregnant")
+    read_wiki_page("pregnant")
+    read_wiki_page("pregnant")
+    assert len(calls) == 2
+
+    cache.invalidate("read_wiki_page", subreddit_name="pregnant", page_name="index")
+    read_wiki_page("pregnant")
+    assert len(calls) == 3
+
+
+def _run_concurrently(fn, count):
+    results = [None] * count
+
+    def run(i):
+        try:
+            results[i] = fn()
+        except Exception as exc:
+            results[i] = exc
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def _release_when_collapsed(flights, count, release):
+    # Let the leader finish once every follower is waiting on it
+    def watch():
+        while flights.collapsed < count:
+            time.sleep(0.001)
+        release.set()
+
+    watcher = threading.Thread(target=watch)
+    watcher.start()
+    return watcher
+
+
+def test_single_flight_collapses_concurrent_calls():
+    flights = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(1)
+        return {"thread_id": "abc"}
+
+    watcher = _release_when_collapsed(flights, 3, release)
+    results = _run_concurrently(lambda: flights.do("abc", fetch), 4)
+    watcher.join()
+
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+    assert flights.stats() == {"calls": 1, "collapsed": 3}
+
+
+def test_single_flight_shares_exceptions_and_forgets_finished_calls():
+    flights = SingleFlight()
+
+    def fail():
+        raise RuntimeError("Reddit is down")
+
+    with pytest.raises(RuntimeError):
+        flights.do("abc", fail)
+    # Finished calls are not reused
+    assert flights.do("abc", lambda: 1) == 1
+    assert flights.stats() == {"calls": 2, "collapsed": 0}
+
+
+def test_response_cache_coalesces_identical_misses():
+    cache = ResponseCache()
+    flights = cache.flights_for("get_thread_details")
+    release = threading.Event()
+    calls = []
+
+    @cache.wrap
+    def get_thread_details(thread_id: str, max_comments: int = 50) -> dict:
+        calls.append(thread_id)
+        release.wait(1)
+        return {"thread_id": thread_id}
+
+    watcher = _release_when_collapsed(flights, 2, release)
+    results = _run_concurrently(lambda: get_thread_details("abc", max_comments=50), 3)
+    watcher.join()
+
+    assert calls == ["abc"]
+    assert results == [{"thread_id": "abc"}] * 3
+    assert cache.stats()["collapsed"] == 2
+    assert cache.stats()["tools"]["get_thread_details"]["collapsed"] == 2
+
+
+class InlineExecutor:
+    """Run background refreshes immediately, so tests can check their effect."""
+
+    def submit(self, fn, *args):
+        fn(*args)
+
+
+def test_stale_responses_are_served_then_refreshed(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache = ResponseCache(ttls={"get_subreddit_info": 10}, executor=InlineExecutor())
+    calls = []
+
+    @cache.wrap
+    def get_subreddit_info(subreddit_name: str) -> dict:
+        calls.append(subreddit_name)
+        return {"subscribers": len(calls)}
+
+    assert get_subreddit_info("pregnant") == {"subscribers": 1}
+    now[0] += 11
+    # The stale copy is returned while the refresh updates the cache
+    assert get_subreddit_info("pregnant") == {"subscribers": 1}
+    assert get_subreddit_info("pregnant") == {"subscribers": 2}
+    assert len(calls) == 2
+
+    # Past the stale window the caller waits for a fresh response
+    now[0] += 11 + cache.stale_ttls["get_subreddit_info"]
+    assert get_subreddit_info("pregnant") == {"subscribers": 3}
+
+    stats = cache.stats()["tools"]["get_subreddit_info"]
+    assert stats["stale_hits"] == 1
+    assert stats["refreshed"] == 1
+
+
+def test_unchanged_revisions_skip_the_refetch(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache = ResponseCache(ttls={"read_wiki_page": 10}, executor=InlineExecutor())
+    revision = ["r1"]
+    fetched = []
+
+    def unchanged(result, subreddit_name, page_name="index"):
+        return result["revision_id"] == revision[0]
+
+    @cached(cache, revalidate=unchanged)
+    def read_wiki_page(subreddit_name: str, page_name: str = "index") -> dict:
+        fetched.append(revision[0])
+        return {"success": True, "revision_id": revision[0]}
+
+    read_wiki_page("pregnant")
+    now[0] += 11
+    assert read_wiki_page("pregnant")["revision_id"] == "r1"
+    assert fetched == ["r1"]
+
+    # The TTL restarted, so the next call is a fresh hit
+    now[0] += 5
+    read_wiki_page("pregnant")
+    assert cache.stats()["tools"]["read_wiki_page"]["stale_hits"] == 1
+
+    revision[0] = "r2"
+    now[0] += 11
+    assert read_wiki_page("pregnant")["revision_id"] == "r1"
+    assert read_wiki_page("pregnant")["revision_id"] == "r2"
+    assert fetched == ["r1", "r2"]
+
+    stats = cache.stats()["tools"]["read_wiki_page"]
+    assert (stats["unchanged"], stats["refreshed"]) == (1, 1)
+
+
+def test_tools_without_stale_ttl_expire_as_before(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache = ResponseCache(ttls={"get_thread_details": 10}, executor=InlineExecutor())
+    calls = []
+
+    @cache.wrap
+    def get_thread_details(thread_id: str) -> dict:
+        calls.append(thread_id)
+        return {"count": len(calls)}
+
+    get_thread_details("abc")
+    now[0] += 11
+    assert get_thread_details("abc") == {"count": 2}
+
+
+def test_bypassed_calls_are_neither_looked_up_nor_stored():
+    cache = ResponseCache()
+    calls = []
+
+    @cached(cache, bypass_if=lambda query, local=False: local)
+    def search_reddit_threads(query: str, local: bool = False) -> dict:
+        calls.append(local)
+        return {"success": True, "count": len(calls)}
+
+    assert search_reddit_threads("zofran")["count"] == 1
+    assert search_reddit_threads("zofran", local=True)["count"] == 2
+    assert search_reddit_threads("zofran", local=True)["count"] == 3
+    assert search_reddit_threads("zofran")["count"] == 1
+    assert cache.stats()["tools"]["search_reddit_threads"]["size"] == 1
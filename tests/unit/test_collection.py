@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# SPDX-FileCopyrightText: 2025 stharrold
+# SPDX-License-Identifier: Apache-2.0
+
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from src.server import collection
+from src.server.collection import register_collection_tools
+from src.server.store import CorpusStore
+
+HOUR = 60 * 60
+
+
+class FakeMCP:
+    def __init__(self):
+        self.tools = {}
+
+    def tool(self):
+        def register(fn):
+            self.tools[fn.__name__] = fn
+            return fn
+
+        return register
+
+
+class FakeSubreddit:
+    def __init__(self, posts):
+        self.posts = posts
+        self.searches = []
+
+    def search(self, query, sort, time_filter, limit):
+        if self.posts is None:
+            raise RuntimeError("403 Forbidden")
+        self.searches.append(sort)
+        # "new" is newest first; the other orders happen to return the oldest first
+        ordered = sorted(self.posts, key=lambda p: p.created_utc, reverse=sort == "new")
+        return iter(ordered[:limit])
+
+
+class FakeReddit:
+    def __init__(self, posts_by_subreddit):
+        self.subreddits = {name: FakeSubreddit(p) for name, p in posts_by_subreddit.items()}
+
+    def subreddit(self, name):
+        return self.subreddits[name]
+
+
+def post(post_id, hours_ago):
+    return SimpleNamespace(
+        id=post_id,
+        author=SimpleNamespace(name="someone"),
+        subreddit_id="t5_abc",
+        subreddit=SimpleNamespace(display_name="pregnant"),
+        title="Zofran question",
+        selftext="zofran helped",
+        score=1,
+        num_comments=0,
+        created_utc=time.time() - hours_ago * HOUR,
+        permalink=f"/r/pregnant/comments/{post_id}/",
+    )
+
+
+@pytest.fixture
+def store():
+    corpus = CorpusStore(":memory:")
+    yield corpus
+    corpus.close()
+
+
+def collect_tool(reddit, store):
+    mcp = FakeMCP()
+    register_collection_tools(mcp, reddit, store=store)
+    return mcp.tools["collect_new_threads"]
+
+
+def test_collect_new_threads_only_fetches_threads_past_the_mark(store):
+    reddit = FakeReddit({"pregnant": [post("p1", 2), post("p2", 3)], "private": None})
+    collect = collect_tool(reddit, store)
+
+    first = collect("zofran", ["pregnant", "private"])
+    assert first["success"]
+    assert first["new_threads"] == 2
+    assert first["subreddits"]["pregnant"]["gap"] is False
+    assert first["subreddits"]["pregnant"]["pending_gap"] is None
+    assert first["failed_subreddits"] == {"private": "403 Forbidden"}
+
+    reddit.subreddits["pregnant"].posts.append(post("p0", 1))
+    rerun = collect("zofran", ["pregnant"])["subreddits"]["pregnant"]
+    assert rerun["thread_ids"] == ["p0"]
+    assert rerun["scanned"] == 2  # stopped at p1, the previous mark
+    assert store.get_crawl_state("pregnant", "zofran")["collected"] == 3
+
+    assert collect("zofran", ["private"])["success"] is False
+
+
+def test_collect_new_threads_records_and_resumes_gaps(store, monkeypatch):
+    monkeypatch.setattr(collection, "SEARCH_LISTING_CAP", 3)
+    posts = [post(f"p{i}", i + 1) for i in range(6)]
+    reddit = FakeReddit({"pregnant": posts})
+    collect = collect_tool(reddit, store)
+
+    first = collect("zofran", ["pregnant"])["subreddits"]["pregnant"]
+    assert first["thread_ids"] == ["p0", "p1", "p2"]
+    assert first["gap"] is True
+    state = store.get_crawl_state("pregnant", "zofran")
+    assert state["newest_id"] == "p0"
+    assert state["gap_start"] == datetime(2019, 1, 1).timestamp()
+    assert state["gap_end"] == posts[2].created_utc
+
+    # The next run finds nothing new and collects the gap through narrower listings
+    monkeypatch.setattr(collection, "SEARCH_LISTING_CAP", 1000)
+    rerun = collect("zofran", ["pregnant"])["subreddits"]["pregnant"]
+    assert rerun["new_threads"] == 0
+    assert {"p3", "p4", "p5"} <= set(rerun["thread_ids"])
+    assert len(store.get_thread_ids()) == 6
+
+    # Only the slice older than a year, which no listing reaches, stays pending
+    pending_end = datetime.fromisoformat(rerun["pending_gap"]["end_date"]).timestamp()
+    assert pending_end < time.time() - 364 * 24 * HOUR
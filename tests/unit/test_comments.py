@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# SPDX-FileCopyrightText: 2025 stharrold
+# SPDX-License-Identifier: Apache-2.0
+
+import threading
+import time
+from types import SimpleNamespace
+
+from praw.models import MoreComments
+
+from src.server.comments import fetch_comment_tree, fetch_comment_trees
+
+
+def make_comment(comment_id, parent_id):
+    return SimpleNamespace(
+        id=comment_id,
+        parent_id=parent_id,
+        author=None,
+        body=f"body {comment_id}",
+        score=1,
+        created_utc=1_600_000_000.0,
+    )
+
+
+class FakeReddit:
+    """Serves /api/morechildren from a dict of comment_id -> parent_id."""
+
+    def __init__(self, hidden):
+        self.hidden = hidden
+        self.posts = []
+
+    def post(self, path, data):
+        children = data["children"].split(",")
+        self.posts.append(children)
+        return [make_comment(c, self.hidden[c]) for c in children]
+
+
+def make_submission(reddit, listing):
+    return SimpleNamespace(
+        fullname="t3_abc",
+        comment_sort="top",
+        comments=SimpleNamespace(list=lambda: listing),
+    )
+
+
+def test_more_stubs_are_pooled_into_batches_of_100():
+    hidden = {f"h{i}": "t1_a" for i in range(150)}
+    reddit = FakeReddit(hidden)
+    stubs = [
+        MoreComments(reddit, {"children": list(hidden)[:90], "count": 90}),
+        MoreComments(reddit, {"children": list(hidden)[90:], "count": 60}),
+    ]
+    listing = [make_comment("a", "t3_abc"), *stubs]
+
+    tree = fetch_comment_tree(reddit, make_submission(reddit, listing), max_comments=500)
+
+    assert [len(batch) for batch in reddit.posts] == [100, 50]
+    assert tree["requests"] == 2
+    assert tree["complete"] is True
+    assert len(tree["comments"]) == 151
+    assert {c["depth"] for c in tree["comments"][1:]} == {1}
+
+
+def test_expansion_stops_at_comment_budget():
+    hidden = {f"h{i}": "t3_abc" for i in range(250)}
+    reddit = FakeReddit(hidden)
+    listing = [MoreComments(reddit, {"children": list(hidden), "count": 250})]
+
+    tree = fetch_comment_tree(reddit, make_submission(reddit, listing), max_comments=80)
+
+    assert len(reddit.posts) == 1
+    assert len(tree["comments"]) == 80
+    assert tree["more_remaining"] == 150
+    assert tree["complete"] is False
+
+
+def test_expand_more_false_reads_initial_listing_only():
+    reddit = FakeReddit({"h1": "t3_abc"})
+    listing = [make_comment("a", "t3_abc"), MoreComments(reddit, {"children": ["h1"]})]
+
+    tree = fetch_comment_tree(reddit, make_submission(reddit, listing), expand_more=False)
+
+    assert reddit.posts == []
+    assert [c["comment_id"] for c in tree["comments"]] == ["a"]
+    assert tree["more_remaining"] == 1
+
+
+class ConcurrencyCheckingReddit(FakeReddit):
+    """Records the most morechildren calls that were ever in flight at once."""
+
+    def __init__(self, hidden):
+        super().__init__(hidden)
+        self.in_flight = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def post(self, path, data):
+        with self.lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        time.sleep(0.01)
+        try:
+            return super().post(path, data)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+def test_morechildren_calls_are_serialized_per_client():
+    hidden = {f"h{i}": "t3_abc" for i in range(400)}
+    reddit = ConcurrencyCheckingReddit(hidden)
+    submissions = [
+        make_submission(
+            reddit,
+            [MoreComments(reddit, {"children": list(hidden)[i * 100 : (i + 1) * 100]})],
+        )
+        for i in range(4)
+    ]
+
+    trees = fetch_comment_trees(reddit, submissions, max_comments=500)
+
+    assert [len(tree["comments"]) for tree in trees] == [100] * 4
+    assert len(reddit.posts) == 4
+    assert reddit.peak == 1
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# SPDX-FileCopyrightText: 2025 stharrold
+# SPDX-License-Identifier: Apache-2.0
+
+import asyncio
+import json
+import time
+
+from mcp.server.fastmcp import Context
+
+from src.server.concurrency import ThreadedFastMCP
+
+
+def _server(tool_workers):
+    mcp = ThreadedFastMCP("test", tool_workers=tool_workers)
+
+    @mcp.tool()
+    def slow_lookup(thread_id: str, ctx: Context | None = None) -> dict:
+        """Stand in for a tool waiting on Reddit."""
+        time.sleep(0.2)
+        return {"success": True, "thread_id": thread_id, "has_context": ctx is not None}
+
+    return mcp, slow_lookup
+
+
+def _call_concurrently(mcp, count):
+    async def run():
+        return await asyncio.gather(
+            *(mcp.call_tool("slow_lookup", {"thread_id": f"t{i}"}) for i in range(count))
+        )
+
+    started = time.perf_counter()
+    results = asyncio.run(run())
+    return results, time.perf_counter() - started
+
+
+def test_sync_tools_overlap_on_worker_threads():
+    mcp, slow_lookup = _server(tool_workers=4)
+    results, elapsed = _call_concurrently(mcp, 4)
+
+    assert elapsed < 0.6
+    assert mcp.stats()["calls"] == 4
+    assert mcp.stats()["peak_in_flight"] == 4
+    assert mcp.stats()["in_flight"] == 0
+    assert all(json.loads(r[0].text)["has_context"] for r in results)
+
+    # The registered name still refers to the blocking function for internal callers
+    assert slow_lookup("t0", None)["thread_id"] == "t0"
+
+
+def test_tool_schema_is_unchanged():
+    mcp, _ = _server(tool_workers=4)
+    (tool,) = asyncio.run(mcp.list_tools())
+    assert list(tool.inputSchema["properties"]) == ["thread_id"]
+
+
+def test_zero_workers_runs_tools_on_the_event_loop():
+    mcp, _ = _server(tool_workers=0)
+    _, elapsed = _call_concurrently(mcp, 3)
+    assert elapsed >= 0.6
+    assert mcp.stats()["calls"] == 0
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# SPDX-FileCopyrightText: 2025 stharrold
+# SPDX-License-Identifier: Apache-2.0
+
+import json
+
+import pytest
+
+from src.server.ingest import ingest_dump
+from src.server.store import CorpusStore
+from src.server.utils import anonymize_username
+
+
+def submission(thread_id, subreddit="pregnant", title="Zofran for nausea?"):
+    return {
+        "id": thread_id,
+        "subreddit": subreddit,
+        "subreddit_id": "t5_abc",
+        "title": title,
+        "selftext": "Is it safe in the first trimester?",
+        "author": "someone",
+        "score": 3,
+        "num_comments": 2,
+        "created_utc": 1600000000,
+    }
+
+
+def comment(comment_id, thread_id, body="Same here"):
+    return {
+        "id": comment_id,
+        "link_id": f"t3_{thread_id}",
+        "parent_id": f"t3_{thread_id}",
+        "subreddit": "pregnant",
+        "author": "someone",
+        "body": body,
+        "score": 1,
+        "created_utc": 1600000100,
+    }
+
+
+def write_dump(path, rows):
+    path.write_text("\n".join(json.dumps(r) for r in rows) + "\n{zofran, truncated\n")
+    return str(path)
+
+
+def test_ingest_filters_and_anonymizes(tmp_path):
+    store = CorpusStore(":memory:")
+    submissions = write_dump(
+        tmp_path / "RS_2021-01",
+        [
+            submission("a"),
+            submission("b", subreddit="other"),
+            submission("c", title="Tylenol question"),
+        ],
+    )
+    comments = write_dump(
+        tmp_path / "RC_2021-01",
+        [comment("c1", "a"), comment("c2", "c"), comment("c3", "c", body="took zofran too")],
+    )
+
+    stats = ingest_dump(submissions, store, terms=["zofran"], subreddits=["pregnant"], processes=1)
+    assert stats["kind"] == "submissions"
+    assert stats["loaded"] == 1
+    assert stats["malformed"] == 1
+    thread = store.get_thread("a")
+    assert thread["author"] == anonymize_username("someone")
+
+    stats = ingest_dump(comments, store, terms=["zofran"], subreddits=["pregnant"], processes=1)
+    # c1 replies to a stored thread, c3 mentions the term, c2 is neither
+    assert stats["loaded"] == 2
+    assert [c["comment_id"] for c in store.get_all_comments("a", 10)] == ["c1"]
+
+
+def test_comments_ingested_without_their_thread_are_searchable(tmp_path):
+    store = CorpusStore(":memory:")
+    # The submission doesn't mention the term, so only its comment is kept
+    ingest_dump(
+        write_dump(tmp_path / "RS_2021-01", [submission("c", title="Tylenol question")]),
+        store,
+        terms=["zofran"],
+        processes=1,
+    )
+    ingest_dump(
+        write_dump(tmp_path / "RC_2021-01", [comment("c3", "c", body="took zofran too")]),
+        store,
+        terms=["zofran"],
+        processes=1,
+    )
+    assert store.get_thread("c") is None
+
+    (hit,) = store.search_comments("zofran", subreddits=["Pregnant"])
+    assert hit["comment_id"] == "c3"
+    assert hit["subreddit"] == "pregnant"
+    assert hit["permalink"] == "/r/pregnant/comments/c/"
+    assert hit["thread_title"] is None
+
+    (thread,) = store.search_threads(
+        "zofran", subreddits=["pregnant"], start_ts=1600000000, include_comments=True
+    )
+    assert thread["thread_id"] == "c"
+    assert thread["created_utc"] == 1600000100
+    assert store.search_threads("zofran") == []
+
+    path = tmp_path / "comments.jsonl"
+    assert store.export("comments", str(path), subreddits=["pregnant"]) == 1
+    assert json.loads(path.read_text())["subreddit"] == "pregnant"
+
+
+@pytest.mark.benchmark
+def test_ingest_writes_batches_in_bulk(tmp_path):
+    store = CorpusStore(str(tmp_path / "corpus.duckdb"))
+    rows = [submission(f"s{i}") for i in range(10_000)]
+    rows += [comment(f"c{i}", f"s{i % 10_000}") for i in range(20_000)]
+    submissions = write_dump(tmp_path / "RS_2021-01", rows[:10_000])
+    comments = write_dump(tmp_path / "RC_2021-01", rows[10_000:])
+
+    for path, expected in ((submissions, 10_000), (comments, 20_000)):
+        stats = ingest_dump(path, store, terms=["zofran"], processes=2, batch_lines=5_000)
+        assert stats["loaded"] == expected
+        # Row-by-row inserts managed a few hundred rows/s; bulk loads run at ~15k rows/s
+        # (the margin covers DuckDB's one-time setup on the first write of a process)
+        assert stats["loaded"] / stats["write_seconds"] > 2_000
+    store.close()
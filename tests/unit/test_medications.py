@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# SPDX-FileCopyrightText: 2025 stharrold
+# SPDX-License-Identifier: Apache-2.0
+
+import pytest
+
+from src.server.medications import (
+    MedicationMatcher,
+    class_matcher,
+    class_medications,
+    class_search_terms,
+    plan_queries,
+    query_matcher,
+    query_terms,
+)
+
+
+def test_matcher_finds_all_names_on_word_boundaries():
+    matcher = MedicationMatcher(
+        {"zofran": "ondansetron", "ondansetron": "ondansetron", "reglan": "reglan"}
+    )
+
+    text = "Zofran didn't help, so my OB switched me to Reglan. Zofranol is not a drug."
+    assert [label for _, _, label in matcher.finditer(text)] == ["ondansetron", "reglan"]
+    assert matcher.count("zofran, ZOFRAN and ondansetron").most_common() == [("ondansetron", 3)]
+    assert not matcher.search("prezofran")
+
+
+def test_matcher_handles_overlapping_and_plural_names():
+    matcher = MedicationMatcher(["folic acid", "acid", "prenatal vitamin"])
+
+    assert matcher.find_labels("Taking folic acid daily") == {"folic acid", "acid"}
+    assert matcher.search("Which prenatal vitamins do you take?")
+    assert not matcher.search("prenatal vitaminx")
+    assert not MedicationMatcher([]).search("anything")
+
+
+def test_class_matcher_uses_templates():
+    assert "ondansetron" in class_medications("Antinausea")
+    assert class_matcher("antinausea").find_labels("diclegis then phenergan") == {
+        "diclegis",
+        "phenergan",
+    }
+    with pytest.raises(ValueError):
+        class_medications("not-a-class")
+
+
+def test_query_matcher_splits_or_queries():
+    assert query_terms('zofran OR "morning sickness" OR zofran') == ["zofran", "morning sickness"]
+    assert query_matcher("zofran OR reglan").search("Reglan worked for me")
+    assert query_matcher("zofran").search("Zofran's side effects")
+
+
+def test_class_search_terms_dedupes_case_insensitively():
+    terms = class_search_terms("thyroid", include_search_terms=True)
+    assert terms[:3] == ["levothyroxine", "synthroid", "thyroid"]
+    assert [t.lower() for t in terms].count("levothyroxine") == 1
+    assert "TSH" in terms
+
+
+def test_plan_queries_packs_terms_within_length_limit():
+    terms = ["ondansetron", "zofran", "morning sickness", "reglan"]
+
+    assert plan_queries(terms) == ['"morning sickness" OR ondansetron OR zofran OR reglan']
+
+    queries = plan_queries(terms, max_length=30)
+    assert all(len(q) <= 30 for q in queries)
+    assert sorted(t for q in queries for t in query_terms(q)) == sorted(terms)
+    assert len(queries) == 2
+
+    assert [len(query_terms(q)) for q in plan_queries(terms, max_terms=3)] == [3, 1]
+    with pytest.raises(ValueError):
+        plan_queries(["x" * 20], max_length=10)
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# SPDX-FileCopyrightText: 2025 stharrold
+# SPDX-License-Identifier: Apache-2.0
+
+import threading
+import time
+
+from src.server.ratelimit import RateLimiter, lane, report_queue_wait
+
+
+def drain(limiter):
+    limiter.tokens = 0.0
+    limiter._last_refill = time.monotonic()
+
+
+def test_acquire_consumes_tokens_without_waiting():
+    limiter = RateLimiter(max_requests=5, time_window=1.0)
+    for _ in range(5):
+        assert limiter.acquire() < 0.05
+    assert limiter.stats()["request_count"] == 5
+
+
+def test_interactive_lane_is_served_before_bulk():
+    limiter = RateLimiter(max_requests=20, time_window=1.0)
+    drain(limiter)
+    order = []
+
+    def worker(name, lane_name):
+        with lane(lane_name):
+            limiter.acquire()
+        order.append(name)
+
+    bulk = [threading.Thread(target=worker, args=(f"bulk{i}", "bulk")) for i in range(3)]
+    for thread in bulk:
+        thread.start()
+    time.sleep(0.01)
+    interactive = threading.Thread(target=worker, args=("interactive", "interactive"))
+    interactive.start()
+    for thread in [*bulk, interactive]:
+        thread.join()
+
+    # The first bulk request may already hold the head of the queue
+    assert "interactive" in order[:2]
+    assert limiter.stats()["lanes"]["bulk"]["requests"] == 3
+
+
+def test_headers_clamp_tokens_and_block_on_exhaustion():
+    limiter = RateLimiter(max_requests=60, time_window=60.0)
+    limiter.update_from_headers({"x-ratelimit-remaining": "3", "x-ratelimit-reset": "30"})
+    assert limiter.stats()["tokens_available"] == 3
+
+    limiter.update_from_headers({"x-ratelimit-remaining": "0", "x-ratelimit-reset": "30"})
+    assert limiter._blocked_until > time.monotonic() + 25
+    assert limiter.stats()["server_remaining"] == 0
+
+
+def test_429_counts_as_server_throttle():
+    limiter = RateLimiter()
+    limiter.update_from_headers({}, status_code=429)
+    stats = limiter.stats()
+    assert stats["server_throttles"] == 1
+    assert stats["tokens_available"] == 0
+
+
+def test_report_queue_wait_adds_wait_without_mutating_result():
+    limiter = RateLimiter(max_requests=100, time_window=1.0)
+    drain(limiter)
+    shared = {"success": True}
+
+    @report_queue_wait
+    def tool():
+        limiter.acquire()
+        return shared
+
+    result = tool()
+    assert result["queue_wait_s"] > 0
+    assert "queue_wait_s" not in shared
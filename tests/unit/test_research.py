@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+# SPDX-FileCopyrightText: 2025 stharrold
+# SPDX-License-Identifier: Apache-2.0
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from src.server import research
+from src.server.cache import ResponseCache
+from src.server.research import _merge_listings, register_research_tools
+from src.server.store import CorpusStore
+
+
+def thread(thread_id, created_utc=0.0):
+    return {"thread_id": thread_id, "created_utc": created_utc}
+
+
+def ids(records):
+    return [r["thread_id"] for r in records]
+
+
+def test_merge_by_relevance_interleaves_listings_by_rank():
+    big = [thread("b1"), thread("b2"), thread("b3"), thread("b4")]
+    small = [thread("s1")]
+    other = [thread("o1"), thread("o2")]
+
+    merged = _merge_listings([big, small, other])
+
+    assert ids(merged) == ["b1", "s1", "o1", "b2", "o2", "b3", "b4"]
+
+
+def test_merge_by_date_orders_newest_first():
+    first = [thread("a", 100.0), thread("b", 300.0)]
+    second = [thread("c", 200.0), thread("d", 400.0)]
+
+    assert ids(_merge_listings([first, second], merge_by="date")) == ["d", "b", "c", "a"]
+
+
+def test_merge_keeps_first_occurrence_of_each_thread():
+    # The same thread can appear in more than one listing
+    first = [thread("a", 100.0), thread("shared", 50.0)]
+    second = [thread("shared", 50.0), thread("b", 10.0)]
+
+    merged = _merge_listings([first, second])
+    assert ids(merged) == ["a", "shared", "b"]
+    assert merged[1] is second[0]  # rank 1 of the second listing comes before rank 2
+
+    by_date = _merge_listings([first, second], merge_by="date")
+    assert ids(by_date) == ["a", "shared", "b"]
+    assert _merge_listings([]) == []
+
+
+class FakeMCP:
+    """Collects the registered tool functions by name."""
+
+    def __init__(self):
+        self.tools = {}
+
+    def tool(self):
+        def register(fn):
+            self.tools[fn.__name__] = fn
+            return fn
+
+        return register
+
+
+class FakeReddit:
+    """Serves /api/info lookups for a fixed set of submissions."""
+
+    def __init__(self, submissions):
+        self.submissions = {s.id: s for s in submissions}
+        self.requested = []
+
+    def info(self, fullnames):
+        self.requested.append(list(fullnames))
+        # Reddit returns whatever order it likes and omits unknown IDs
+        for fullname in reversed(fullnames):
+            submission = self.submissions.get(fullname.removeprefix("t3_"))
+            if submission is not None:
+                yield submission
+
+
+def make_submission(thread_id):
+    return SimpleNamespace(
+        id=thread_id,
+        author=SimpleNamespace(name="someone"),
+        subreddit_id="t5_abc",
+        subreddit=SimpleNamespace(display_name="pregnant"),
+        title=f"Thread {thread_id}",
+        selftext="zofran helped with nausea",
+        score=3,
+        num_comments=2,
+        created_utc=1_600_000_000.0,
+        permalink=f"/r/pregnant/comments/{thread_id}/",
+    )
+
+
+@pytest.fixture
+def store():
+    corpus = CorpusStore(":memory:")
+    yield corpus
+    corpus.close()
+
+
+def bulk_tool(reddit, store):
+    mcp = FakeMCP()
+    register_research_tools(mcp, reddit, store=store)
+    return mcp.tools["get_threads_bulk"]
+
+
+def test_get_threads_bulk_mixes_corpus_and_fetched_threads_in_request_order(store):
+    store.upsert_threads([research.submission_record(make_submission("stored"))])
+    reddit = FakeReddit([make_submission("f1"), make_submission("f2")])
+
+    result = bulk_tool(reddit, store)(["t3_f2", "stored", "gone", " f1", "f2"])
+
+    assert result["success"]
+    assert reddit.requested == [["t3_f2", "t3_gone", "t3_f1"]]
+    assert [t["thread_id"] for t in result["threads"]] == ["f2", "stored", "f1"]
+    assert [t["source"] for t in result["threads"]] == ["reddit", "corpus", "reddit"]
+    assert result["missing"] == ["gone"]
+    assert "failed_comments" not in result
+    # Fetched threads are written through to the corpus
+    assert set(store.get_threads(["f1", "f2"])) == {"f1", "f2"}
+
+
+def test_get_threads_bulk_reports_comment_failures_per_thread(store, monkeypatch):
+    comment = {
+        "comment_id": "c1",
+        "parent_id": "t3_ok",
+        "depth": 0,
+        "author": "a1b2c3d4e5f6",
+        "body": "same here",
+        "score": 1,
+        "created_utc": 1_600_000_100.0,
+    }
+
+    def fake_trees(reddit, submissions, max_comments, expand_more):
+        return [
+            RuntimeError("comments unavailable")
+            if s.id == "bad"
+            else {"comments": [comment], "complete": True}
+            for s in submissions
+        ]
+
+    monkeypatch.setattr(research, "fetch_comment_trees", fake_trees)
+    reddit = FakeReddit([make_submission("ok"), make_submission("bad")])
+
+    result = bulk_tool(reddit, store)(["ok", "bad"], include_comments=True)
+
+    assert result["success"]
+    assert result["failed_comments"] == {"bad": "comments unavailable"}
+    ok, bad = result["threads"]
+    assert [c["comment_id"] for c in ok["comments"]] == ["c1"]
+    assert bad["thread_id"] == "bad" and bad["comments"] == []
+    assert [c["comment_id"] for c in store.get_comments("ok", 10)] == ["c1"]
+    assert store.get_comments("bad", 10) == []
+
+
+def test_local_search_sees_threads_stored_since_the_last_call(store):
+    mcp = FakeMCP()
+    register_research_tools(mcp, FakeReddit([]), store=store, cache=ResponseCache())
+    search = mcp.tools["search_reddit_threads"]
+    args = {"subreddits": ["pregnant"], "min_comments": 0, "min_words": 0, "local": True}
+
+    store.upsert_threads([research.submission_record(make_submission("first"))])
+    assert search("zofran", **args)["count"] == 1
+
+    # e.g. a dump ingest between two identical calls
+    store.upsert_threads([research.submission_record(make_submission("second"))])
+    assert search("zofran", **args)["count"] == 2
+
+
+def test_local_thread_details_see_comments_stored_since_the_last_call(store):
+    mcp = FakeMCP()
+    register_research_tools(mcp, FakeReddit([]), store=store, cache=ResponseCache())
+    details = mcp.tools["get_thread_details"]
+    store.upsert_threads([research.submission_record(make_submission("a"))])
+    comment = {"thread_id": "a", "parent_id": "t3_a", "author": "x", "score": 1}
+
+    store.upsert_comments([{**comment, "comment_id": "c1", "created_utc": 1.0}])
+    assert len(details("a", local=True)["thread"]["comments"]) == 1
+
+    store.upsert_comments([{**comment, "comment_id": "c2", "created_utc": 2.0}])
+    assert len(details("a", local=True)["thread"]["comments"]) == 2
+
+
+class CountingReddit:
+    """Counts the searches and submission lookups that reach Reddit."""
+
+    def __init__(self):
+        self.searches = 0
+        self.lookups = 0
+
+    def subreddit(self, name):
+        def search(query, sort, time_filter, limit):
+            self.searches += 1
+            return [make_submission("s1")]
+
+        return SimpleNamespace(search=search)
+
+    def submission(self, id):
+        self.lookups += 1
+        return make_submission(id)
+
+
+def test_repeated_calls_are_answered_from_the_corpus(store, monkeypatch):
+    comment = {
+        "comment_id": "c1",
+        "parent_id": "t3_s1",
+        "depth": 0,
+        "author": "a1b2c3d4e5f6",
+        "body": "same here",
+        "score": 1,
+        "created_utc": 1_600_000_100.0,
+    }
+    monkeypatch.setattr(
+        research,
+        "fetch_comment_tree",
+        lambda *args: {"comments": [comment], "complete": True, "more_remaining": 0},
+    )
+    reddit = CountingReddit()
+    mcp = FakeMCP()
+    # No response cache, so replays can only come from the corpus
+    register_research_tools(mcp, reddit, store=store)
+    search = mcp.tools["search_reddit_threads"]
+    details = mcp.tools["get_thread_details"]
+    args = {"subreddits": ["pregnant"], "min_comments": 0, "min_words": 0}
+
+    assert search("zofran", **args)["source"] == "reddit"
+    replay = search("zofran", **args)
+    assert replay["source"] == "corpus"
+    assert [t["thread_id"] for t in replay["threads"]] == ["s1"]
+    assert reddit.searches == 1
+    assert search("zofran", refresh=True, **args)["source"] == "reddit"
+    assert reddit.searches == 2
+
+    assert details("s1")["source"] == "reddit"
+    replay = details("s1")
+    assert replay["source"] == "corpus"
+    assert [c["comment_id"] for c in replay["thread"]["comments"]] == ["c1"]
+    assert reddit.lookups == 1
+    assert details("s1", refresh=True)["source"] == "reddit"
+    assert reddit.lookups == 2
+
+
+class SearchReddit:
+    """Answers subreddit searches with one thread per query; some queries are slow or fail."""
+
+    def __init__(self, delays=None, failing=()):
+        self.delays = delays or {}
+        self.failing = set(failing)
+
+    def subreddit(self, name):
+        def search(query, sort, time_filter, limit):
+            time.sleep(self.delays.get(query, 0))
+            if query in self.failing:
+                raise RuntimeError("503 Service Unavailable")
+            submission = make_submission(f"{query}1")
+            submission.title = f"{query} and nausea"
+            return [submission]
+
+        return SimpleNamespace(search=search)
+
+
+class ProgressContext:
+    """Stand in for the FastMCP Context, recording progress notifications."""
+
+    def __init__(self):
+        self.progress = []
+
+    async def report_progress(self, progress, total, message=None):
+        self.progress.append((progress, total, message))
+
+
+def batch_search(reddit, medications):
+    mcp = FakeMCP()
+    register_research_tools(mcp, reddit)
+    ctx = ProgressContext()
+    result = asyncio.run(
+        mcp.tools["batch_search_medications"](
+            medications, ["pregnant"], ctx, min_comments=0, min_words=0, end_date="2021-01-01"
+        )
+    )
+    return result, ctx
+
+
+def test_batch_search_reports_results_in_input_order():
+    # The first medication finishes last
+    reddit = SearchReddit(delays={"zofran": 0.2})
+    result, ctx = batch_search(reddit, ["zofran", "reglan", "unisom"])
+
+    assert result["success"]
+    assert list(result["medications"]) == ["zofran", "reglan", "unisom"]
+    assert list(result["summary"]) == ["zofran", "reglan", "unisom"]
+    assert result["total_threads"] == 3
+    assert [p[:2] for p in ctx.progress] == [(1, 3), (2, 3), (3, 3)]
+    assert ctx.progress[-1][2] == "zofran: 1 threads"
+
+
+def test_batch_search_isolates_failing_medications():
+    reddit = SearchReddit(failing={"reglan"})
+    result, ctx = batch_search(reddit, ["zofran", "reglan"])
+
+    assert result["success"]
+    assert result["completed"] == 1
+    assert result["failed"] == 1
+    assert result["errors"][0]["medication"] == "reglan"
+    assert "503" in result["errors"][0]["error"]
+    assert result["medications"]["reglan"]["success"] is False
+    assert result["summary"]["reglan"] is None
+    assert len(ctx.progress) == 2
+
+
+def test_batch_search_rejects_empty_medication_lists():
+    result, ctx = batch_search(SearchReddit(), [" ", ""])
+    assert result == {"success": False, "error": "medications must be a non-empty list"}
+    assert ctx.progress == []
+
+
+def test_time_sliced_search_warns_about_historical_ranges():
+    mcp = FakeMCP()
+    register_research_tools(mcp, SearchReddit())
+    search = mcp.tools["search_reddit_threads"]
+    args = {"subreddits": ["pregnant"], "min_comments": 0, "min_words": 0, "time_sliced": True}
+
+    historical = search("zofran", start_date="2019-01-01", end_date="2023-12-31", **args)
+    assert historical["count"] == 1
+    assert "local=true" in historical["warning"]
+
+    today = datetime.now()
+    recent = search(
+        "zofran",
+        start_date=(today - timedelta(days=20)).strftime("%Y-%m-%d"),
+        end_date=today.strftime("%Y-%m-%d"),
+        **args,
+    )
+    assert recent["success"]
+    assert "warning" not in recent
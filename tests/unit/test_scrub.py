@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+# SPDX-FileCopyrightText: 2025 stharrold
+# SPDX-License-Identifier: Apache-2.0
+
+from src.server.scrub import Scrubber
+from src.server.utils import anonymize_username
+
+
+def test_scrub_replaces_mentions_emails_and_phones():
+    scrubber = Scrubber()
+    text = (
+        "Ask u/NurseJane or see reddit.com/user/nurse_jane, "
+        "email jane.doe@example.com or call (555) 123-4567."
+    )
+
+    scrubbed = scrubber.scrub(text)
+    assert scrubbed == (
+        f"Ask u/[{anonymize_username('NurseJane')}] or see "
+        f"reddit.com/user/[{anonymize_username('nurse_jane')}], "
+        "email [email] or call [phone]."
+    )
+    # Already scrubbed text is left alone
+    assert scrubber.scrub(scrubbed) == scrubbed
+
+
+def test_scrub_keeps_dosages_dates_and_subreddits():
+    scrubber = Scrubber()
+    text = "Took 4 mg twice on 2021-03-04, see r/pregnant and 1/2 tablet"
+    assert scrubber.scrub(text) == text
+    assert scrubber.scrub(None) is None
+
+
+def test_scrub_stats_track_documents():
+    scrubber = Scrubber()
+    scrubber.scrub("no pii here")
+    scrubber.scrub("mail a@b.org")
+    assert scrubber.scrub("u/someone") == f"u/[{anonymize_username('someone')}]"
+
+    stats = scrubber.stats()
+    assert stats["documents"] == 3
+    assert stats["scrubbed"] == 2
+    assert stats["max_ms"] >= 0
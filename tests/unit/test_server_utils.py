@@ -2,22 +2,77 @@
 # SPDX-FileCopyrightText: 2025 stharrold
 # SPDX-License-Identifier: Apache-2.0
 
-from src.server.utils import anonymize_username, count_words
+import contextvars
+import threading
+import time
+
+from src.server.utils import (
+    anonymize_username,
+    anonymize_usernames,
+    count_words,
+    map_concurrently,
+    salt_fingerprint,
+)
+
 
 def test_anonymize_username():
     username = "testuser"
     anon1 = anonymize_username(username)
     anon2 = anonymize_username(username)
-    
+
     assert anon1 == anon2
     assert len(anon1) == 12
     assert anon1 != username
 
+
 def test_anonymize_deleted():
     assert anonymize_username("[deleted]") == "[deleted]"
     assert anonymize_username(None) == "[deleted]"
 
+
 def test_count_words():
     assert count_words("Hello world") == 2
     assert count_words("") == 0
     assert count_words("  multiple   spaces  ") == 2
+
+
+def test_anonymize_usernames_matches_single_calls():
+    names = ["alice", "bob", "alice", None, "[removed]"]
+    assert anonymize_usernames(names) == [anonymize_username(n) for n in names]
+    assert anonymize_usernames([]) == []
+
+
+def test_salt_fingerprint_hides_salt():
+    assert salt_fingerprint("secret") == salt_fingerprint("secret")
+    assert salt_fingerprint("secret") != salt_fingerprint("other")
+    assert "secret" not in salt_fingerprint("secret")
+
+
+def test_map_concurrently_keeps_input_order_and_failures_in_place():
+    def slow_square(n):
+        # Later items finish first
+        time.sleep(0.01 * (5 - n))
+        if n == 3:
+            raise ValueError("boom")
+        return n * n
+
+    results = map_concurrently(slow_square, range(5), max_workers=5)
+
+    assert results[:3] == [0, 1, 4]
+    assert isinstance(results[3], ValueError)
+    assert results[4] == 16
+    assert map_concurrently(slow_square, []) == []
+
+
+def test_map_concurrently_runs_in_callers_context():
+    lane = contextvars.ContextVar("lane", default="none")
+    lane.set("interactive")
+    threads = set()
+
+    def read_lane(_):
+        threads.add(threading.get_ident())
+        time.sleep(0.01)
+        return lane.get()
+
+    assert map_concurrently(read_lane, range(4), max_workers=4) == ["interactive"] * 4
+    assert threading.get_ident() not in threads
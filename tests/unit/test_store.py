@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+# SPDX-FileCopyrightText: 2025 stharrold
+# SPDX-License-Identifier: Apache-2.0
+
+import json
+import threading
+
+import pytest
+
+from src.server.store import CorpusStore, search_key
+
+
+def make_thread(thread_id, **overrides):
+    record = {
+        "thread_id": thread_id,
+        "subreddit_id": "t5_abc",
+        "subreddit": "pregnant",
+        "title": f"Thread {thread_id}",
+        "selftext": "zofran helped with nausea",
+        "author": "a1b2c3d4e5f6",
+        "score": 10,
+        "num_comments": 7,
+        "created_utc": 1600000000.0,
+        "permalink": f"/r/pregnant/comments/{thread_id}/",
+        "word_count": 4,
+    }
+    record.update(overrides)
+    return record
+
+
+@pytest.fixture
+def store():
+    corpus = CorpusStore(":memory:")
+    yield corpus
+    corpus.close()
+
+
+def test_search_key_is_normalized():
+    assert search_key("Zofran ", ["pregnant", "BabyBumps"]) == search_key(
+        "zofran", ["babybumps", "Pregnant"]
+    )
+
+
+def test_record_search_replays_in_rank_order(store):
+    key = search_key("zofran", ["pregnant"])
+    store.record_search(
+        key, "zofran", ["pregnant"], [make_thread("b"), make_thread("a")], exhausted=True
+    )
+
+    recorded = store.get_search(key)
+    assert recorded["scanned"] == 2
+    assert recorded["exhausted"] is True
+    assert [t["thread_id"] for t in store.get_search_threads(key, 10)] == ["b", "a"]
+    assert [t["thread_id"] for t in store.get_search_threads(key, 1)] == ["b"]
+
+
+def test_upsert_threads_preserves_comment_bookkeeping(store):
+    store.upsert_threads([make_thread("a")])
+    store.save_comments(
+        "a",
+        [
+            {
+                "comment_id": "c1",
+                "parent_id": "t3_a",
+                "author": "x",
+                "body": "hi",
+                "score": 1,
+                "created_utc": 1600000001.0,
+            }
+        ],
+        sort="top",
+        complete=True,
+    )
+    store.upsert_threads([make_thread("a", score=99)])
+
+    thread = store.get_thread("a")
+    assert thread["score"] == 99
+    assert thread["comment_sort"] == "top"
+    assert thread["comments_fetched"] == 1
+    assert thread["comments_complete"] is True
+
+
+def test_batch_writes_collapse_duplicate_keys(store):
+    # One statement per batch: duplicates follow the old row-by-row semantics
+    store.upsert_threads([make_thread("a", score=1), make_thread("a", score=2)])
+    assert store.get_thread("a")["score"] == 2
+
+    store.upsert_threads([make_thread("a", score=3), make_thread("a", score=4)], replace=False)
+    assert store.get_thread("a")["score"] == 2
+
+    store.upsert_comments(
+        [
+            {"comment_id": "c1", "thread_id": "a", "body": "first", "created_utc": 1.0},
+            {"comment_id": "c1", "thread_id": "a", "body": "second", "created_utc": 1.0},
+            {"comment_id": "c2", "thread_id": "a", "body": None, "created_utc": None},
+        ],
+        replace=False,
+    )
+    bodies = {c["comment_id"]: c["body"] for c in store.get_all_comments("a", 10)}
+    assert bodies == {"c1": "first", "c2": None}
+
+
+def test_save_comments_replaces_previous_ordering(store):
+    store.upsert_threads([make_thread("a")])
+    comment = {"parent_id": "t3_a", "author": "x", "body": "b", "score": 1, "created_utc": 1.0}
+    store.save_comments(
+        "a", [{**comment, "comment_id": "c1"}, {**comment, "comment_id": "c2"}], "top", True
+    )
+    store.save_comments("a", [{**comment, "comment_id": "c2"}], "new", False)
+
+    assert [c["comment_id"] for c in store.get_comments("a", 10)] == ["c2"]
+    assert store.get_thread("a")["comment_sort"] == "new"
+
+
+def test_crawl_state_only_moves_forward(store):
+    assert store.get_crawl_state("pregnant", "zofran") is None
+
+    store.update_crawl_state("Pregnant", "Zofran", 200.0, "new", collected=5)
+    store.update_crawl_state("pregnant", "zofran", None, None, collected=0)
+    store.update_crawl_state("pregnant", "zofran", 100.0, "old", collected=1)
+
+    state = store.get_crawl_state("pregnant", "zofran")
+    assert state["newest_created_utc"] == 200.0
+    assert state["newest_id"] == "new"
+    assert state["collected"] == 6
+    assert state["runs"] == 3
+
+
+def test_export_streams_filtered_threads_and_comments(store, tmp_path):
+    store.upsert_threads([make_thread("a", created_utc=100.0), make_thread("b", created_utc=200.0)])
+    comment = {"parent_id": "t3_a", "author": "x", "body": "hi", "score": 1, "created_utc": 1.0}
+    store.save_comments(
+        "a", [{**comment, "comment_id": "c1"}, {**comment, "comment_id": "c2"}], "top", True
+    )
+    store.save_comments("b", [{**comment, "comment_id": "c3"}], "top", True)
+
+    threads_path = tmp_path / "threads.jsonl"
+    assert store.export("threads", str(threads_path), "jsonl", start_ts=150.0) == 1
+    rows = [json.loads(line) for line in threads_path.read_text().splitlines()]
+    assert [r["thread_id"] for r in rows] == ["b"]
+
+    comments_path = tmp_path / "comments.parquet"
+    assert store.export("comments", str(comments_path), "parquet", end_ts=150.0) == 2
+
+
+def test_export_scrubs_rows_stored_unscrubbed(store, tmp_path):
+    # Rows written before scrubbing existed hold raw text
+    store.upsert_threads([make_thread("a", title="ask u/someone", selftext="mail me@example.com")])
+    comment = {"parent_id": "t3_a", "author": "x", "score": 1, "created_utc": 1.0}
+    store.save_comments(
+        "a", [{**comment, "comment_id": "c1", "body": "call 555-123-4567"}], "top", True
+    )
+
+    threads_path = tmp_path / "threads.jsonl"
+    store.export("threads", str(threads_path))
+    (thread,) = [json.loads(line) for line in threads_path.read_text().splitlines()]
+    assert "someone" not in thread["title"]
+    assert thread["selftext"] == "mail [email]"
+
+    comments_path = tmp_path / "comments.csv"
+    store.export("comments", str(comments_path), "csv")
+    assert "[phone]" in comments_path.read_text()
+    assert "555-123-4567" not in comments_path.read_text()
+
+
+def test_export_matches_medications_on_word_boundaries(store, tmp_path):
+    store.upsert_threads(
+        [
+            make_thread("a", title="Zofran?", selftext=""),
+            make_thread("b", title="Question", selftext="prezofran is not a drug"),
+            make_thread("c", title="Reglan", selftext=None),
+        ]
+    )
+
+    path = tmp_path / "threads.jsonl"
+    assert store.export("threads", str(path), medication="zofran") == 1
+    assert store.export("threads", str(path), medication="zofran OR reglan") == 2
+    assert {json.loads(line)["thread_id"] for line in path.read_text().splitlines()} == {"a", "c"}
+
+
+def test_export_does_not_hold_the_store_lock(store, tmp_path):
+    store.upsert_threads([make_thread("a")])
+    locked, release = threading.Event(), threading.Event()
+
+    def hold_lock():
+        with store._lock:
+            locked.set()
+            release.wait(5)
+
+    holder = threading.Thread(target=hold_lock)
+    holder.start()
+    locked.wait(5)
+    try:
+        exporter = threading.Thread(
+            target=store.export, args=("threads", str(tmp_path / "threads.jsonl"))
+        )
+        exporter.start()
+        exporter.join(2)
+        blocked = exporter.is_alive()
+    finally:
+        release.set()
+        holder.join()
+        exporter.join()
+    assert not blocked
+
+
+def test_search_threads_ranks_with_full_text_index(store):
+    store.upsert_threads(
+        [
+            make_thread("a", selftext="zofran zofran helped my nausea", word_count=5),
+            make_thread("b", selftext="took zofran once", word_count=3),
+            make_thread("c", selftext="tylenol only", word_count=2),
+            make_thread("d", subreddit="other", selftext="zofran", word_count=1),
+        ]
+    )
+
+    results = store.search_threads("Zofran", subreddits=["Pregnant"])
+    assert [r["thread_id"] for r in results] == ["a", "b"]
+    assert results[0]["relevance"] > results[1]["relevance"]
+    assert [r["thread_id"] for r in store.search_threads("zofran nausea")] == ["a"]
+    assert store.search_threads("zofran", subreddits=["pregnant"], min_words=4)[0]["score"] == 10
+
+    # Comment bodies are searchable, and later writes are picked up incrementally
+    comment = {"parent_id": "t3_c", "author": "x", "score": 1, "created_utc": 1.0}
+    store.save_comments("c", [{**comment, "comment_id": "c1", "body": "zofran"}], "top", True)
+    assert "c" not in [r["thread_id"] for r in store.search_threads("zofran")]
+    assert "c" in [r["thread_id"] for r in store.search_threads("zofran", include_comments=True)]
+
+
+def test_writes_are_never_stamped_below_the_index_watermark(store, monkeypatch):
+    import src.server.store as store_module
+
+    clock = [1000.0]
+    monkeypatch.setattr(store_module.time, "time", lambda: clock[0])
+    store.upsert_threads([make_thread("a", selftext="zofran")])
+    assert [r["thread_id"] for r in store.search_threads("zofran")] == ["a"]
+
+    # A writer that read the clock before the refresh, or a clock stepped back
+    clock[0] = 900.0
+    store.upsert_threads([make_thread("b", selftext="zofran")])
+    store.upsert_comments([{"comment_id": "c1", "thread_id": "a", "body": "reglan"}])
+    assert {r["thread_id"] for r in store.search_threads("zofran")} == {"a", "b"}
+    assert [r["comment_id"] for r in store.search_comments("reglan")] == ["c1"]
+
+
+def test_write_stamps_stay_above_the_watermark_after_reopening(tmp_path, monkeypatch):
+    import src.server.store as store_module
+
+    clock = [1000.0]
+    monkeypatch.setattr(store_module.time, "time", lambda: clock[0])
+    path = str(tmp_path / "corpus.duckdb")
+    corpus = CorpusStore(path)
+    corpus.upsert_threads([make_thread("a", selftext="zofran")])
+    corpus.search_threads("zofran")
+    corpus.close()
+
+    clock[0] = 900.0
+    corpus = CorpusStore(path)
+    corpus.upsert_threads([make_thread("b", selftext="zofran")])
+    assert {r["thread_id"] for r in corpus.search_threads("zofran")} == {"a", "b"}
+    corpus.close()
+
+
+def test_or_queries_match_any_alternative(store):
+    store.upsert_threads(
+        [
+            make_thread("a", selftext="zofran helped"),
+            make_thread("b", selftext="reglan helped"),
+            make_thread("c", selftext="tylenol or nothing"),
+        ]
+    )
+
+    assert store.query_term_groups('zofran OR "reglan pill"') == [["zofran"], ["pill", "reglan"]]
+    results = store.search_threads("zofran OR reglan")
+    assert {r["thread_id"] for r in results} == {"a", "b"}
+
+    comment = {"parent_id": "t3_c", "author": "x", "score": 1, "created_utc": 1.0}
+    store.save_comments("c", [{**comment, "comment_id": "c1", "body": "reglan"}], "top", True)
+    assert [r["comment_id"] for r in store.search_comments("zofran OR reglan")] == ["c1"]
+
+
+def test_search_comments_returns_thread_and_parent_context(store):
+    store.upsert_threads([make_thread("a"), make_thread("b", subreddit="other")])
+    comment = {"author": "x", "score": 1, "created_utc": 1600000100.0}
+    store.save_comments(
+        "a",
+        [
+            {**comment, "comment_id": "c1", "parent_id": "t3_a", "body": "Did anyone take it?"},
+            {**comment, "comment_id": "c2", "parent_id": "t1_c1", "body": "Zofran saved me"},
+        ],
+        "top",
+        True,
+    )
+    store.save_comments(
+        "b", [{**comment, "comment_id": "c3", "parent_id": "t3_b", "body": "zofran"}], "top", True
+    )
+
+    hits = store.search_comments("zofran", subreddits=["pregnant"])
+    assert [h["comment_id"] for h in hits] == ["c2"]
+    assert hits[0]["parent_body"] == "Did anyone take it?"
+    assert hits[0]["thread_title"] == "Thread a"
+    assert len(store.search_comments("zofran")) == 2
+    assert store.search_comments("zofran", start_ts=1600000200.0) == []
+
+
+def test_corpus_records_the_salt_it_was_created_with(tmp_path, monkeypatch):
+    import src.server.store as store_module
+
+    path = str(tmp_path / "corpus.duckdb")
+    corpus = CorpusStore(path)
+    corpus.upsert_threads([make_thread("a")])
+    assert corpus.corpus_salt_fingerprint() == corpus.salt_fingerprint
+    corpus.close()
+
+    monkeypatch.setattr(store_module, "salt_fingerprint", lambda: "other-salt")
+    corpus = CorpusStore(path)
+    assert corpus.salt_fingerprint == "other-salt"
+    assert corpus.corpus_salt_fingerprint() != corpus.salt_fingerprint
+    corpus.close()
+
+
+def test_salt_fingerprint_is_taken_over_from_pseudonym_lists(tmp_path):
+    import duckdb
+
+    path = str(tmp_path / "corpus.duckdb")
+    with duckdb.connect(path) as conn:
+        conn.execute(
+            "CREATE TABLE pseudonyms (salt_fingerprint VARCHAR, pseudonym VARCHAR, "
+            "first_seen DOUBLE)"
+        )
+        conn.execute("INSERT INTO pseudonyms VALUES ('old', 'a', 0), ('old', 'b', 0)")
+
+    corpus = CorpusStore(path)
+    assert corpus.corpus_salt_fingerprint() == "old"
+    assert (
+        corpus._fetch_dicts(
+            "SELECT * FROM information_schema.tables WHERE table_name = 'pseudonyms'"
+        )
+        == []
+    )
+    corpus.close()
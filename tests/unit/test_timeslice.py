@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# SPDX-FileCopyrightText: 2025 stharrold
+# SPDX-License-Identifier: Apache-2.0
+
+from types import SimpleNamespace
+
+from src.server.timeslice import (
+    DAY,
+    FALLBACK_LIMIT,
+    FALLBACK_SORTS,
+    Window,
+    crawl_window,
+    plan_windows,
+)
+
+NOW = 1_700_000_000.0
+
+
+def test_plan_windows_uses_narrowest_filter_per_slice():
+    windows = plan_windows(NOW - 400 * DAY, NOW, now=NOW)
+
+    assert [w.time_filter for w in windows] == ["day", "week", "month", "year", "all"]
+    assert windows[0].end == NOW
+    assert windows[-1].start == NOW - 400 * DAY
+    # Slices are contiguous, newest first
+    for newer, older in zip(windows, windows[1:], strict=False):
+        assert newer.start == older.end
+
+
+def test_plan_windows_for_old_range_is_single_all_window():
+    windows = plan_windows(NOW - 1000 * DAY, NOW - 800 * DAY, now=NOW)
+    assert len(windows) == 1
+    assert windows[0].time_filter == "all"
+
+
+def test_plan_windows_for_recent_range_avoids_all():
+    windows = plan_windows(NOW - 20 * DAY, NOW - 2 * DAY, now=NOW)
+    assert [w.time_filter for w in windows] == ["week", "month"]
+
+
+def post(post_id, created):
+    return SimpleNamespace(id=post_id, created_utc=created)
+
+
+def test_crawl_window_stops_once_past_window_start():
+    listing = [post(f"p{i}", 100 - i) for i in range(100)]
+    requested = []
+
+    def search(sort, time_filter, limit):
+        requested.append(sort)
+        return iter(listing)
+
+    window = Window(start=80, end=95, time_filter="all")
+    found = crawl_window(search, window, now=100)
+
+    assert sorted(p.created_utc for p in found) == list(range(80, 96))
+    assert window.scanned == 22  # stopped at the first post older than the window
+    assert not window.saturated
+    assert requested == ["new"]
+
+
+def test_crawl_window_falls_back_to_other_sorts_when_saturated():
+    newest = [post(f"n{i}", 100 - i * 0.001) for i in range(10)]
+    older = [post("old", 60)]
+
+    def search(sort, time_filter, limit):
+        return iter(newest[:limit] if sort == "new" else older)
+
+    window = Window(start=50, end=100, time_filter="year")
+    found = crawl_window(search, window, cap=10, now=100)
+
+    assert window.saturated
+    assert "old" in {p.id for p in found}
+    assert window.fetched == 11
+
+
+def test_crawl_window_skips_new_for_windows_older_than_a_year():
+    requested = []
+
+    def search(sort, time_filter, limit):
+        requested.append((sort, limit))
+        return iter([post(sort, NOW - 850 * DAY), post("recent", NOW - DAY)])
+
+    (window,) = plan_windows(NOW - 1000 * DAY, NOW - 800 * DAY, now=NOW)
+    found = crawl_window(search, window, now=NOW)
+
+    assert requested == [("top", FALLBACK_LIMIT), ("comments", FALLBACK_LIMIT), ("relevance", 1000)]
+    assert {p.id for p in found} == set(FALLBACK_SORTS)
+    assert window.saturated
+    assert window.scanned == 2 * len(FALLBACK_SORTS)
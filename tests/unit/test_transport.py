@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# SPDX-FileCopyrightText: 2025 stharrold
+# SPDX-License-Identifier: Apache-2.0
+
+import gzip
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import prawcore
+import pytest
+import requests
+
+from src.server import transport
+from src.server.transport import HttpxSession
+
+
+class EchoHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self._reply({"params": parse_qs(urlparse(self.path).query)})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"])).decode()
+        self._reply({"form": parse_qs(body), "connection": self.headers.get("Connection")})
+
+    def _reply(self, payload):
+        body = json.dumps(
+            {**payload, "user_agent": self.headers["User-Agent"], "cookie": self.headers["Cookie"]}
+        ).encode()
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Encoding", "gzip")
+        self.send_header("Set-Cookie", "session_tracker=abc; Path=/")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), EchoHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_requests_reuse_one_connection(server_url):
+    session = HttpxSession(http2=False)
+    for _ in range(5):
+        assert session.request("get", f"{server_url}/r/test").status_code == 200
+
+    stats = session.stats()
+    assert stats["requests"] == 5
+    assert stats["connections_opened"] == 1
+    assert stats["connections_reused"] == 4
+    assert stats["gzip_responses"] == 5
+    assert stats["http_versions"] == {"HTTP/1.1": 5}
+    session.shutdown()
+
+
+def test_requests_arguments_are_translated(server_url):
+    session = HttpxSession(http2=False)
+    response = session.request(
+        "post",
+        f"{server_url}/api/v1/access_token",
+        params={"raw_json": 1, "after": None},
+        data=[("grant_type", "password"), ("scope", "a"), ("scope", "b"), ("skip", None)],
+        headers={"Connection": "close"},
+    )
+    payload = response.json()
+    assert payload["form"] == {"grant_type": ["password"], "scope": ["a", "b"]}
+    # The pool decides when connections close; cookies are never sent back
+    assert payload["connection"] != "close"
+    assert session.request("get", f"{server_url}/").json()["cookie"] is None
+    assert session.stats()["connections_opened"] == 1
+    session.shutdown()
+
+
+def test_prawcore_requestor_uses_the_pool(server_url):
+    session = HttpxSession(http2=False)
+    requestor = prawcore.Requestor(user_agent="ResearchBot/1.0 test", session=session)
+    payload = requestor.request("get", f"{server_url}/", params={"limit": 5}).json()
+    assert payload["params"] == {"limit": ["5"]}
+    assert payload["user_agent"].startswith("ResearchBot/1.0 test")
+    session.shutdown()
+
+
+def test_transport_errors_are_retryable_by_prawcore():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    session = HttpxSession(http2=False)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        session.request("get", f"http://127.0.0.1:{port}/", timeout=1)
+    session.shutdown()
+
+
+def test_forced_http2_without_h2_falls_back_to_http1(monkeypatch, capsys):
+    monkeypatch.setattr(transport, "http2_available", lambda: False)
+    monkeypatch.setenv("REDDIT_HTTP2", "1")
+
+    session = HttpxSession.from_env()
+    assert session.http2 is False
+    assert "h2 package is not installed" in capsys.readouterr().err
+    session.shutdown()